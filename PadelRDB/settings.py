@@ -23,24 +23,33 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'PadelRDB_app.compression.CompressionMiddleware',  # Brotli/gzip das respostas dinâmicas (nunca em páginas com token CSRF)
+    'PadelRDB_app.preload.PreloadMiddleware',  # Link: rel=preload (CSS e imagem principal); o CDN faz os 103 Early Hints
+    'PadelRDB_app.memory.MemoryMiddleware',  # RSS por URL, tracemalloc opcional e teto de memória por worker
     # Podes deixar sempre ligado sem problema; se preferires, mantém condicional:
     *(['whitenoise.middleware.WhiteNoiseMiddleware'] if not DEBUG else []),
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.middleware.locale.LocaleMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'PadelRDB_app.usercache.CachedAuthenticationMiddleware',  # AuthenticationMiddleware com o utilizador em cache
+    'PadelRDB_app.profiling.ProfilingMiddleware',  # Só atua com PROFILE_SAMPLE_RATE / SLOW_QUERY_MS / header de staff
+    'PadelRDB_app.ratelimit.RateLimitMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'PadelRDB.urls'
 
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -48,6 +57,9 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # ► Em produção os templates são compilados uma vez por processo (cached loader);
+            #   em DEBUG são relidos do disco a cada pedido para veres as alterações logo.
+            'loaders': TEMPLATE_LOADERS if DEBUG else [('django.template.loaders.cached.Loader', TEMPLATE_LOADERS)],
         },
     },
 ]
@@ -80,14 +92,42 @@ STATICFILES_DIRS = [os.path.join(BASE_DIR, "PadelRDB_app/static")]
 # ► SEMPRE definido (resolve o erro do collectstatic no Render)
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
-# ► Em produção, usa o storage comprimido/manifest do WhiteNoise
-if not DEBUG:
-    STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
-
 # ---------- MEDIA ----------
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# ► STORAGES substitui STATICFILES_STORAGE (removido no Django 5.1)
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    # ► Em produção, usa o storage comprimido/manifest do WhiteNoise
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+        else 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
+# ► MEDIA_STORAGE=s3 guarda uploads num object store compatível com S3 (o disco do dyno é efémero).
+#   MEDIA_STORAGE=local-object usa o stand-in em MEDIA_ROOT com a mesma API (dev/testes).
+MEDIA_STORAGE = os.environ.get('MEDIA_STORAGE', 'filesystem')
+if MEDIA_STORAGE in ('s3', 'local-object'):
+    STORAGES['default'] = {
+        'BACKEND': 'PadelRDB_app.storage.ObjectStorage',
+        'OPTIONS': {
+            'bucket': os.environ.get('OBJECT_STORAGE_BUCKET', 'padelrdb-media'),
+            'location': os.environ.get('OBJECT_STORAGE_LOCATION', 'media'),
+            'endpoint_url': os.environ.get('OBJECT_STORAGE_ENDPOINT_URL'),
+            'region_name': os.environ.get('OBJECT_STORAGE_REGION'),
+            'access_key': os.environ.get('OBJECT_STORAGE_ACCESS_KEY'),
+            'secret_key': os.environ.get('OBJECT_STORAGE_SECRET_KEY'),
+            'base_url': os.environ.get('OBJECT_STORAGE_BASE_URL'),
+            # ► CDN opcional; com chave de assinatura os URLs levam expires + signature
+            'cdn_domain': os.environ.get('OBJECT_STORAGE_CDN_DOMAIN'),
+            'signing_key': os.environ.get('OBJECT_STORAGE_CDN_SIGNING_KEY'),
+            'url_expiry': int(os.environ.get('OBJECT_STORAGE_URL_EXPIRY', 3600)),
+            'local_root': MEDIA_ROOT if MEDIA_STORAGE == 'local-object' else None,
+        },
+    }
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 AUTH_USER_MODEL = 'PadelRDB_app.CustomUser'
 
@@ -96,3 +136,119 @@ CSRF_TRUSTED_ORIGINS = ['https://padelrdb.onrender.com']
 
 # quando estás atrás de proxy (Render) em HTTPS
 SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
+
+# ---------- JOBS ----------
+# ► Fila de jobs na base de dados (sem broker). Worker: python manage.py run_jobs
+# ► JOB_QUEUE_EAGER=True corre os jobs inline (útil em dev sem worker)
+JOB_QUEUE_EAGER = os.environ.get('JOB_QUEUE_EAGER', 'False') == 'True'
+# ► Máximo de jobs a correr ao mesmo tempo por fila; 'leaderboards' um de cada vez, porque cada
+#   update desloca os ranks dos outros (ver leaderboards.update_racket)
+JOB_QUEUE_CONCURRENCY = {'media': 2, 'network': 4, 'leaderboards': 1}
+JOB_QUEUE_BACKOFF_BASE = 10  # segundos; duplica a cada tentativa
+JOB_QUEUE_BACKOFF_MAX = 3600
+PROFILE_IMAGE_MAX_SIZE = 512
+
+# ---------- VIDEOS ----------
+# ► Endpoint oEmbed do YouTube (títulos/autores dos vídeos); o teste de carga aponta-o para um stand-in local
+YOUTUBE_OEMBED_URL = os.environ.get('YOUTUBE_OEMBED_URL', 'https://www.youtube.com/oembed')
+
+# ---------- LEADERBOARDS ----------
+# ► Peso do prior bayesiano (nº de reviews "virtuais" com a média global). None = média de reviews por raquete.
+LEADERBOARD_PRIOR_WEIGHT = None
+# ► Cada review muda as médias globais: um rebuild completo (debounced) corre no máximo este nº de segundos depois
+LEADERBOARD_REBUILD_DELAY = 300
+
+# ---------- CACHE ----------
+# ► Com REDIS_URL a cache é partilhada entre workers/instâncias (necessário para o rate limiting);
+#   sem ela cada processo tem a sua LocMemCache.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+
+# ---------- SESSIONS ----------
+# ► Sessões lidas da cache; a escrita na BD é adiada (write-behind): a chave vai para um set no Redis
+#   e o worker (run_jobs) grava as sessões marcadas a cada SESSION_WRITE_BEHIND_DELAY segundos. Só com cache
+#   partilhada (Redis): com LocMemCache cada worker teria a sua cópia e um logout noutro worker
+#   não a apagava (a sessão continuava válida), por isso sem Redis as sessões vivem só na BD.
+SESSION_ENGINE = 'PadelRDB_app.sessions' if os.environ.get('REDIS_URL') else 'django.contrib.sessions.backends.db'
+SESSION_WRITE_BEHIND_DELAY = 30 if os.environ.get('REDIS_URL') else 0
+# ► Utilizador autenticado em cache (ver usercache.py); sem Redis a invalidação seria só local, por isso fica desligada (0).
+USER_CACHE_TIMEOUT = 300 if os.environ.get('REDIS_URL') else 0
+SESSION_CLEANUP_INTERVAL = 3600  # O worker (run_jobs) apaga as sessões expiradas de hora a hora
+
+# ---------- RATE LIMITING ----------
+# ► Por nome de URL; só conta POSTs. 'user' = por utilizador autenticado, 'ip' = por IP do cliente.
+RATE_LIMITS = {
+    'login': {'ip': '10/m'},
+    'create': {'ip': '5/h'},
+    'submit_review': {'user': '20/m', 'ip': '60/m'},
+    'upload-profile-photo': {'user': '5/m', 'ip': '20/m'},
+    'change_password': {'user': '5/m', 'ip': '20/m'},
+    'change_password_ajax': {'user': '5/m', 'ip': '20/m'},
+}
+
+# ---------- PROFILING ----------
+# ► Opt-in. Fração dos pedidos perfilados com cProfile (0.01 = 1%); staff força com o header X-Profile: 1
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+PROFILE_HEADER = 'X-Profile'
+# ► Queries mais lentas do que isto (ms) ficam guardadas com o EXPLAIN e o call site; None desliga
+SLOW_QUERY_MS = float(os.environ['SLOW_QUERY_MS']) if os.environ.get('SLOW_QUERY_MS') else None
+PROFILE_KEEP = 500  # perfis e slow queries guardados de cada (os mais antigos são apagados)
+
+# ---------- MEMORY ----------
+# ► RSS de cada worker por nome de URL em /staff/memory/. MEMORY_TRACEMALLOC=True junta as maiores
+#   alocações (snapshots periódicos + uma amostra dos pedidos), com algum custo de CPU e memória.
+MEMORY_TRACEMALLOC = os.environ.get('MEMORY_TRACEMALLOC', 'False') == 'True'
+MEMORY_SNAPSHOT_INTERVAL = 300  # segundos entre snapshots periódicos
+MEMORY_SAMPLE_RATE = 0.01  # fração dos pedidos entre dois snapshots (top alocações por URL)
+# ► Acima disto (MB de RSS) o worker acaba os pedidos em curso e o gunicorn substitui-o; None desliga
+MEMORY_MAX_RSS_MB = int(os.environ['MEMORY_MAX_RSS_MB']) if os.environ.get('MEMORY_MAX_RSS_MB') else None
+
+# ---------- RECOMMENDATIONS ----------
+# ► Fatorização das reviews (ver recommendations.py): treino completo com python manage.py
+#   train_recommendations (correr de noite); as reviews novas entram num treino incremental em background
+RECOMMENDER_FACTORS = 16  # dimensão dos vetores de utilizador e de raquete
+RECOMMENDER_ITERATIONS = 10  # passagens de ALS num treino completo
+RECOMMENDER_REGULARIZATION = 0.1
+RECOMMENDER_RETRAIN_DELAY = 600  # segundos entre a primeira review nova e o treino incremental que a inclui
+RECOMMENDER_RELOAD_INTERVAL = 60  # cada processo procura um modelo novo no máximo uma vez neste intervalo
+RECOMMENDER_KEEP = 3  # modelos guardados (os mais antigos são apagados)
+RECOMMENDER_SHOWN = 6  # raquetes em "Recommended for you"
+
+# ---------- REVIEW MODERATION ----------
+# ► Comentários quase iguais a outras reviews (MinHash LSH, ver duplicates.py) são recusados no submit
+REVIEW_DUPLICATE_SIMILARITY = 0.7  # semelhança de Jaccard (shingles de 5 caracteres) a partir da qual conta como cópia
+REVIEW_DUPLICATE_LIMIT = 2  # recusado quando já existem tantas reviews quase iguais
+REVIEW_DUPLICATE_MIN_LENGTH = 40  # comentários mais curtos ("Great racket!") não são comparados
+
+# ---------- STATIC EXPORT ----------
+# ► python manage.py export_static escreve as páginas do catálogo (anónimas) para um CDN servir (ver prerender.py)
+STATIC_EXPORT_ROOT = os.environ.get('STATIC_EXPORT_ROOT', os.path.join(BASE_DIR, 'prerendered'))
+STATIC_EXPORT_WORKERS = 4  # processos a renderizar em paralelo
+
+# ---------- COMPRESSION ----------
+# ► Respostas dinâmicas em Brotli (se o pacote brotli estiver instalado) ou gzip; os estáticos já vêm do WhiteNoise
+COMPRESSION_MIN_SIZE = 860  # bytes; abaixo disto não compensa
+COMPRESSION_BROTLI_QUALITY = 4  # 0-11; 4 comprime melhor que gzip 6 e mais depressa
+COMPRESSION_GZIP_LEVEL = 6
+PRELOAD_IMAGES = 1  # imagens "eager" (image_attrs lazy=False) anunciadas no header Link
+
+# ---------- WARM-UP ----------
+# ► Páginas pedidas no arranque (ver warmup.py) antes de o /readyz responder 200
+WARMUP_RACKETS = 20  # raquetes com mais reviews cuja página é pré-renderizada
+WARMUP_WORKERS = 4  # pedidos de warm-up em paralelo
+
+# ---------- CHUNKED UPLOADS ----------
+CHUNKED_UPLOAD_CHUNK_SIZE = 5 * 1024 * 1024  # 5 MB (também o mínimo de uma parte multipart no S3)
+CHUNKED_UPLOAD_MAX_SIZE = 50 * 1024 * 1024
+CHUNKED_UPLOAD_EXPIRY_HOURS = 24  # Uploads paradas há mais tempo (e os seus chunks) são apagadas pelo `maintenance`
+
+# ---------- MAINTENANCE ----------
+# ► `python manage.py maintenance` (cron diário): media órfã, uploads abandonadas, sessões expiradas, VACUUM/ANALYZE.
+MEDIA_GC_GRACE_HOURS = 24  # Ficheiros mais recentes nunca são órfãos: a linha que os referencia pode ainda não ter feito commit
+MEDIA_GC_BATCH_SIZE = 500
+MEDIA_GC_QUARANTINE_DAYS = 30  # Órfãos ficam em media/_quarantine/<data>/ este tempo antes de serem apagados
@@ -0,0 +1,34 @@
+# ► Settings do teste de carga (python manage.py load_test): as de produção, mas com
+#   BD e media descartáveis em LOADTEST_DIR e o oEmbed do YouTube num stand-in local.
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import STORAGES
+
+LOADTEST_DIR = os.environ.get('LOADTEST_DIR', os.path.join(BASE_DIR, 'loadtest-data'))  # noqa: F405
+
+DEBUG = False
+ALLOWED_HOSTS = ['127.0.0.1', 'localhost']
+
+# ► SQLite em WAL aguenta vários workers a escrever; BEGIN IMMEDIATE evita "database is locked" a meio
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(LOADTEST_DIR, 'db.sqlite3'),
+        'OPTIONS': {
+            'timeout': 30,
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;',
+        },
+    }
+}
+
+MEDIA_ROOT = os.path.join(LOADTEST_DIR, 'media')
+STORAGES = {
+    **STORAGES,
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    # ► Só se pedem páginas e JSON; sem manifest não é preciso correr o collectstatic
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+JOB_QUEUE_EAGER = False  # Os jobs correm num run_jobs à parte, como em produção
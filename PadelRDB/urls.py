@@ -1,9 +1,10 @@
 from django.conf import settings
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf.urls.i18n import i18n_patterns
 from django.conf.urls.static import static
-from PadelRDB_app import views
+from django.views.i18n import set_language
+from PadelRDB_app import api, health, memory, uploads, views
 from PadelRDB_app.views import (
     profile_view, change_password_ajax, review_view, delete_review,
     upload_profile_photo, delete_profile_photo, get_review, CustomPasswordChangeView, CustomLoginView, create_account,
@@ -11,7 +12,17 @@ from PadelRDB_app.views import (
 
 # Include only this outside
 urlpatterns = [
-    path('i18n/', include('django.conf.urls.i18n')),
+    path('i18n/setlang/', set_language, name='set_language'),
+    path('healthz', health.healthz, name='healthz'),
+    path('readyz', health.readyz, name='readyz'),
+    path('staff/memory/', memory.memory_status, name='memory_status'),
+    path('api/v1/brands/', api.brands, name='api_brands'),
+    path('api/v1/rackets/', api.rackets, name='api_rackets'),
+    path('api/v1/rackets/<slug:slug>/', api.racket, name='api_racket'),
+    path('uploads/', uploads.create_session, name='upload_create'),
+    path('uploads/<uuid:session_id>/', uploads.session_status, name='upload_status'),
+    path('uploads/<uuid:session_id>/chunks/<int:index>/', uploads.upload_chunk, name='upload_chunk'),
+    path('uploads/<uuid:session_id>/complete/', uploads.complete_session, name='upload_complete'),
 ]
 
 # Wrap everything else in i18n_patterns
@@ -39,6 +50,11 @@ urlpatterns += i18n_patterns(
     path('get_review/', views.get_review, name='get_review'),
     path('change-password/', CustomPasswordChangeView.as_view(), name='change_password'),
     path('review-entry/', views.review_gate, name='review_entry'),
+    path('leaderboards/<str:attribute>/', views.leaderboard, name='leaderboard'),
+    path('compare/', views.compare, name='compare'),
+    path('compare.json', views.compare_json, name='compare_json'),
+    path('get-trend/<slug:slug>/', views.get_trend, name='get_trend'),
+    re_path(r'^export/(?P<dataset>reviews|rackets)\.(?P<fmt>csv|ndjson)$', views.export_data, name='export_data'),
     
 
 )
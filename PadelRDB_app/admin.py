@@ -1,14 +1,39 @@
 from django.contrib import admin
-from .models import Brand, Racket, RacketImage, Review
+from .models import Brand, Racket, RacketImage, RacketVideo, Review, StoreLink
 
 class RacketImageInline(admin.TabularInline):
     model = RacketImage
     extra = 3  # Show 3 empty slots for images by default
 
-class RacketAdmin(admin.ModelAdmin):
-    inlines = [RacketImageInline]  # Attach showcase images to each racket
+class StoreLinkInline(admin.TabularInline):
+    model = StoreLink
+    extra = 1
+    fields = ('kind', 'retailer', 'retailer_name', 'url', 'position', 'status', 'http_status', 'checked_at', 'price', 'currency')
+    readonly_fields = ('status', 'http_status', 'checked_at', 'price', 'currency')
 
-admin.site.register(Brand)
+class RacketVideoInline(admin.TabularInline):
+    model = RacketVideo
+    extra = 1
+    fields = ('url', 'position', 'title', 'creator')
+    readonly_fields = ('title', 'creator')
+
+class ChunkedUploadAdminMixin:
+    """Adds a drag & drop area that uploads files in resumable chunks (see uploads.py)."""
+    change_form_template = 'admin/chunked_upload_change_form.html'
+    chunked_upload_target = None
+
+    def render_change_form(self, request, context, *args, **kwargs):
+        context['chunked_upload_target'] = self.chunked_upload_target
+        return super().render_change_form(request, context, *args, **kwargs)
+
+class RacketAdmin(ChunkedUploadAdminMixin, admin.ModelAdmin):
+    inlines = [RacketImageInline, StoreLinkInline, RacketVideoInline]  # Attach showcase images, shops and videos to each racket
+    chunked_upload_target = 'racket_image'
+
+class BrandAdmin(ChunkedUploadAdminMixin, admin.ModelAdmin):
+    chunked_upload_target = 'brand_logo'
+
+admin.site.register(Brand, BrandAdmin)
 admin.site.register(Racket, RacketAdmin)
 admin.site.register(RacketImage)
 
@@ -42,3 +67,87 @@ class CustomUserAdmin(UserAdmin):
     )
 
 admin.site.register(CustomUser, CustomUserAdmin)
+
+
+from .models import Job
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('task', 'queue', 'status', 'priority', 'attempts', 'run_at', 'finished_at')
+    list_filter = ('status', 'queue', 'task')
+    search_fields = ('task', 'dedup_key', 'last_error')
+    readonly_fields = ('created_at', 'locked_at', 'locked_by', 'last_error')
+
+
+from django.utils.html import format_html
+from .models import RequestProfile, SlowQuery
+
+class ReadOnlyAdmin(admin.ModelAdmin):
+    """Captured data: browse and delete, never add or edit."""
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+class SlowQueryInline(admin.TabularInline):
+    model = SlowQuery
+    fields = ('duration_ms', 'call_site', 'sql')
+    extra = 0
+    can_delete = False
+    show_change_link = True
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(ReadOnlyAdmin):
+    list_display = ('created_at', 'method', 'path', 'view_name', 'status_code', 'duration_ms', 'query_count', 'query_ms', 'reason')
+    list_filter = ('reason', 'view_name', 'status_code')
+    search_fields = ('path', 'view_name')
+    fields = ('created_at', 'method', 'path', 'view_name', 'status_code', 'duration_ms', 'query_count', 'query_ms',
+              'reason', 'user_id', 'report')
+    inlines = [SlowQueryInline]
+
+    @admin.display(description='Profile')
+    def report(self, obj):
+        return format_html('<pre style="white-space: pre; overflow-x: auto">{}</pre>', obj.stats)
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(ReadOnlyAdmin):
+    list_display = ('created_at', 'duration_ms', 'view_name', 'call_site', 'short_sql')
+    list_filter = ('view_name',)
+    search_fields = ('sql', 'view_name', 'call_site')
+    fields = ('created_at', 'duration_ms', 'view_name', 'path', 'call_site', 'profile', 'statement', 'plan')
+
+    @admin.display(description='SQL')
+    def short_sql(self, obj):
+        return obj.sql[:120]
+
+    @admin.display(description='SQL')
+    def statement(self, obj):
+        return format_html('<pre style="white-space: pre-wrap">{}</pre>', obj.sql)
+
+    @admin.display(description='EXPLAIN')
+    def plan(self, obj):
+        return format_html('<pre style="white-space: pre">{}</pre>', obj.explain or '-')
+
+
+from .models import RecommenderModel
+
+@admin.register(RecommenderModel)
+class RecommenderModelAdmin(ReadOnlyAdmin):
+    list_display = ('trained_at', 'incremental', 'factors', 'review_count', 'users', 'rackets', 'rmse')
+    list_filter = ('incremental',)
+    fields = ('trained_at', 'incremental', 'factors', 'global_mean', 'review_count', 'users', 'rackets', 'rmse', 'popular')
+
+    @admin.display(description='Users')
+    def users(self, obj):
+        return len(obj.user_ids) // 8  # int64 ids
+
+    @admin.display(description='Rackets')
+    def rackets(self, obj):
+        return len(obj.racket_ids) // 8
@@ -0,0 +1,244 @@
+"""
+Public read-only catalog API (v1).
+
+Lists use keyset pagination (`?cursor=` from the previous page's `next`),
+`?fields=` to request only some fields, `?changed_since=<ISO datetime with
+offset>` for incremental syncs, and an ETag per page computed from the page's
+keys before any row is serialized, so revalidation costs one narrow query.
+Both rely on Racket.updated_at moving whenever anything a racket's payload
+shows does: its reviews, brand, store links and videos bump it (see
+signals.py and crawler.record()).
+
+Deletions are not part of `changed_since` syncs: a deleted racket or brand
+simply stops being listed, with no tombstone. Clients that mirror the
+catalog must run a full sync (no `changed_since`) from time to time and drop
+whatever it no longer returns.
+"""
+
+import hashlib
+
+from django.core.files.storage import default_storage
+from django.db.models import Q
+from django.http import HttpResponseNotModified, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils.dateparse import parse_datetime
+from django.utils import timezone
+from django.utils.http import parse_etags, quote_etag
+
+from .models import Brand, Racket, RacketVideo, StoreLink
+from .pagination import decode_cursor, encode_cursor
+from .scores import SCORE_FIELDS, SPEC_FIELDS, score_summary
+
+# Public field -> model columns it needs ('scores', 'store_links' and 'media_urls' are loaded separately)
+RACKET_FIELDS = {
+    'slug': ['slug'],
+    'name': ['name'],
+    'brand': ['brand__name'],
+    'thumbnail': ['thumbnail'],
+    'specs': SPEC_FIELDS,
+    'store_links': [],
+    'media_urls': [],
+    'scores': [],
+    'updated_at': ['updated_at'],
+}
+
+BRAND_FIELDS = {
+    'name': ['name'],
+    'logo': ['logo'],
+    'updated_at': ['updated_at'],
+}
+
+
+class BadRequest(Exception):
+    pass
+
+
+# Helper Functions
+def _media_url(name):
+    return default_storage.url(name) if name else ''
+
+
+def _decode_cursor(cursor):
+    """{'id': int, 'updated_at': datetime} from a cursor; BadRequest for anything else, not a 500 later."""
+    try:
+        values = decode_cursor(cursor)
+        if not isinstance(values, dict) or not isinstance(values.get('id'), int) or isinstance(values['id'], bool):
+            raise ValueError
+        updated_at = parse_datetime(values.get('updated_at') or '') if isinstance(values.get('updated_at'), str) else None
+    except ValueError:  # parse_datetime raises it for well-formed but impossible dates
+        raise BadRequest("Invalid cursor")
+    if updated_at is None or timezone.is_naive(updated_at):
+        raise BadRequest("Invalid cursor")
+    return {'id': values['id'], 'updated_at': updated_at}
+
+
+def _requested_fields(request, available):
+    fields = request.GET.get('fields')
+    if not fields:
+        return list(available)
+    requested = [field.strip() for field in fields.split(',') if field.strip()]
+    unknown = set(requested) - set(available)
+    if unknown:
+        raise BadRequest(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return requested
+
+
+def _page_keys(request, queryset):
+    """
+    Keyset page: the (id, updated_at) keys of up to `limit` rows after the
+    cursor. Ordered by id, or by (updated_at, id) when `changed_since` is given.
+    """
+    try:
+        limit = min(int(request.GET.get('limit', 50)), 200)
+    except ValueError:
+        raise BadRequest("Invalid limit")
+    if limit < 1:
+        raise BadRequest("Invalid limit")
+
+    changed_since = request.GET.get('changed_since')
+    if changed_since:
+        try:
+            since = parse_datetime(changed_since)
+        except ValueError:
+            since = None
+        if since is None:
+            raise BadRequest("changed_since must be an ISO 8601 datetime")
+        if timezone.is_naive(since):
+            raise BadRequest("changed_since must include a UTC offset, e.g. 2025-01-31T12:00:00Z")
+        queryset = queryset.filter(updated_at__gte=since).order_by('updated_at', 'id')
+    else:
+        queryset = queryset.order_by('id')
+
+    cursor = request.GET.get('cursor')
+    if cursor:
+        last = _decode_cursor(cursor)
+        if changed_since:
+            queryset = queryset.filter(
+                Q(updated_at__gt=last['updated_at']) | Q(updated_at=last['updated_at'], id__gt=last['id'])
+            )
+        else:
+            queryset = queryset.filter(id__gt=last['id'])
+
+    keys = list(queryset.values_list('id', 'updated_at')[:limit + 1])
+    next_cursor = None
+    if len(keys) > limit:
+        keys = keys[:limit]
+        last_id, last_updated = keys[-1]
+        next_cursor = encode_cursor({'id': last_id, 'updated_at': last_updated.isoformat()})
+    return keys, next_cursor
+
+
+def _etag(keys, fields, next_cursor=None):
+    # Covers the page's rows, their versions, the field selection and whether a next page exists
+    digest = hashlib.md5(repr((fields, next_cursor, [(pk, updated.isoformat()) for pk, updated in keys])).encode())
+    return quote_etag(digest.hexdigest())
+
+
+def _not_modified(request, etag):
+    # Weak comparison (RFC 9110): compressed responses carry the tag as W/"..." (see compression.py)
+    return etag in [tag.removeprefix('W/') for tag in parse_etags(request.headers.get('If-None-Match', ''))]
+
+
+def _next_url(request, next_cursor):
+    if not next_cursor:
+        return None
+    query = request.GET.copy()
+    query['cursor'] = next_cursor
+    return request.build_absolute_uri(f"{request.path}?{query.urlencode()}")
+
+
+def _json(data, etag):
+    response = JsonResponse(data)
+    response['ETag'] = etag
+    response['Cache-Control'] = 'public, max-age=60'
+    return response
+
+
+def _serialize_racket(row, fields, related):
+    item = {}
+    for field in fields:
+        if field == 'specs':
+            item['specs'] = {spec: row[spec] for spec in SPEC_FIELDS}
+        elif field == 'scores':
+            item['scores'] = {
+                user_type: {
+                    'count': values['total_reviews'],
+                    **{attribute: values[key] for key, attribute in SCORE_FIELDS.items()},
+                }
+                for user_type, values in related['scores'][row['id']].items()
+            }
+        elif field in ('store_links', 'media_urls'):
+            item[field] = related[field][row['id']]
+        elif field == 'brand':
+            item['brand'] = row['brand__name']
+        elif field == 'thumbnail':
+            item['thumbnail'] = _media_url(row['thumbnail'])
+        else:
+            item[field] = row[field]
+    return item
+
+
+def _racket_rows(ids, fields):
+    columns = {'id'} | {column for field in fields for column in RACKET_FIELDS[field]}
+    rows = {row['id']: row for row in Racket.objects.filter(id__in=ids).values(*columns)}
+    # One grouped query per related field that was asked for
+    loaders = {'scores': score_summary, 'store_links': StoreLink.as_json, 'media_urls': RacketVideo.urls}
+    related = {field: loader(ids) for field, loader in loaders.items() if field in fields}
+    return [_serialize_racket(rows[pk], fields, related) for pk in ids if pk in rows]
+
+
+def _api_view(view):
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return JsonResponse({'error': 'Method not allowed'}, status=405)
+        try:
+            return view(request, *args, **kwargs)
+        except BadRequest as error:
+            return JsonResponse({'error': str(error)}, status=400)
+    wrapper.__name__ = view.__name__
+    return wrapper
+
+
+# Views
+@_api_view
+def brands(request):
+    fields = _requested_fields(request, BRAND_FIELDS)
+    keys, next_cursor = _page_keys(request, Brand.objects.all())
+    etag = _etag(keys, fields, next_cursor)
+    if _not_modified(request, etag):
+        return HttpResponseNotModified(headers={'ETag': etag})
+
+    ids = [pk for pk, updated in keys]
+    rows = {row['id']: row for row in Brand.objects.filter(id__in=ids).values('id', 'name', 'logo', 'updated_at')}
+    data = [
+        {field: _media_url(rows[pk]['logo']) if field == 'logo' else rows[pk][field] for field in fields}
+        for pk in ids if pk in rows
+    ]
+    return _json({'data': data, 'next': _next_url(request, next_cursor)}, etag)
+
+
+@_api_view
+def rackets(request):
+    fields = _requested_fields(request, RACKET_FIELDS)
+    queryset = Racket.objects.all()
+    brand = request.GET.get('brand')
+    if brand:
+        queryset = queryset.filter(brand__name=brand.lower())
+
+    keys, next_cursor = _page_keys(request, queryset)
+    etag = _etag(keys, fields, next_cursor)
+    if _not_modified(request, etag):
+        return HttpResponseNotModified(headers={'ETag': etag})
+
+    data = _racket_rows([pk for pk, updated in keys], fields)
+    return _json({'data': data, 'next': _next_url(request, next_cursor)}, etag)
+
+
+@_api_view
+def racket(request, slug):
+    fields = _requested_fields(request, RACKET_FIELDS)
+    key = get_object_or_404(Racket.objects.values_list('id', 'updated_at'), slug=slug)
+    etag = _etag([key], fields)
+    if _not_modified(request, etag):
+        return HttpResponseNotModified(headers={'ETag': etag})
+    return _json({'data': _racket_rows([key[0]], fields)[0]}, etag)
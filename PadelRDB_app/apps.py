@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class PadelrdbAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'PadelRDB_app'
+
+    def ready(self):
+        from . import tasks  # noqa: F401  Registers background tasks with the job queue
+        from . import signals  # noqa: F401  Queues refreshes of derived data on review writes
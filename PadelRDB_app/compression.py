@@ -0,0 +1,147 @@
+"""
+Brotli/gzip compression of dynamic responses.
+
+CompressionMiddleware compresses the HTML, JSON and text responses the
+views return (WhiteNoise already serves static files pre-compressed) with
+the best coding the client accepts: Brotli when the brotli package is
+installed, gzip otherwise. Streaming responses (the CSV/NDJSON exports) are
+compressed chunk by chunk as they are sent, sync or async. Responses under
+COMPRESSION_MIN_SIZE bytes are left alone, as are files, partial content,
+responses that are already encoded and those marked Cache-Control:
+no-transform.
+
+BREACH: compressing a page that reflects request input next to a secret
+lets an attacker guess the secret from the compressed size. A response for
+which the CSRF token was rendered (get_token() was called while it was
+built, so CsrfViewMiddleware sets the cookie) is therefore never compressed; those are the form pages (login,
+sign-up, review, profile), not the catalog.
+"""
+
+import re
+import zlib
+
+from django.conf import settings
+from django.http import FileResponse
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+COMPRESSIBLE_TYPES = {
+    'text/html', 'text/plain', 'text/css', 'text/csv', 'text/javascript', 'text/xml',
+    'application/json', 'application/x-ndjson', 'application/javascript', 'application/xml', 'image/svg+xml',
+}
+QUALITY = re.compile(r'q\s*=\s*([0-9.]+)')
+
+
+# Helper Functions
+def choose_encoding(accept_encoding):
+    """'br', 'gzip' or None: the coding with the highest q the client accepts that can be produced."""
+    accepted = {}
+    for part in accept_encoding.split(','):
+        coding, _, params = part.partition(';')
+        match = QUALITY.search(params)
+        try:
+            accepted[coding.strip().lower()] = float(match.group(1)) if match else 1.0
+        except ValueError:
+            continue
+    best, best_q = None, 0.0
+    for coding in (('br', 'gzip') if brotli is not None else ('gzip',)):
+        q = accepted.get(coding, accepted.get('*', 0.0))
+        if q > best_q:  # Ties keep the first: Brotli
+            best, best_q = coding, q
+    return best
+
+
+def compressor(coding):
+    """(compress, finish) callables of a fresh streaming compressor."""
+    if coding == 'br':
+        engine = brotli.Compressor(quality=getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 4))
+        return engine.process, engine.finish
+    engine = zlib.compressobj(getattr(settings, 'COMPRESSION_GZIP_LEVEL', 6), zlib.DEFLATED, 31)
+    return engine.compress, engine.flush
+
+
+def compress(content, coding):
+    add, finish = compressor(coding)
+    return add(content) + finish()
+
+
+def compress_stream(chunks, coding):
+    add, finish = compressor(coding)
+    for chunk in chunks:
+        data = add(chunk)
+        if data:
+            yield data
+    yield finish()
+
+
+async def compress_async_stream(chunks, coding):
+    add, finish = compressor(coding)
+    async for chunk in chunks:
+        data = add(chunk)
+        if data:
+            yield data
+    yield finish()
+
+
+def compressible(response):
+    """Whether the response is of a kind worth compressing, whoever asks for it."""
+    content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+    return (
+        content_type in COMPRESSIBLE_TYPES
+        and response.status_code >= 200 and response.status_code not in (204, 206, 304)
+        and not response.has_header('Content-Encoding')
+        and not isinstance(response, FileResponse)
+        and 'no-transform' not in response.get('Cache-Control', '')
+    )
+
+
+def csrf_token_used(request, response):
+    """
+    Whether get_token() ran for this response: CsrfViewMiddleware then sends
+    the cookie (and clears the request flag it set).
+    """
+    return settings.CSRF_COOKIE_NAME in response.cookies or bool(request.META.get('CSRF_COOKIE_NEEDS_UPDATE'))
+
+
+class CompressionMiddleware:
+    """Brotli/gzip for dynamic responses, except pages carrying a CSRF token (see module docstring)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not compressible(response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))  # Caches must keep one copy per coding
+
+        if csrf_token_used(request, response):
+            return response  # BREACH: the page embeds the CSRF token
+        coding = choose_encoding(request.headers.get('Accept-Encoding', ''))
+        if coding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = compress_async_stream(response.streaming_content, coding)
+            else:
+                response.streaming_content = compress_stream(response.streaming_content, coding)
+            del response['Content-Length']
+        else:
+            if len(response.content) < getattr(settings, 'COMPRESSION_MIN_SIZE', 860):
+                return response
+            compressed = compress(response.content, coding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag  # Same resource, different bytes
+        response['Content-Encoding'] = coding
+        return response
@@ -0,0 +1,271 @@
+"""
+Store-link health checks and price snapshots.
+
+`crawl()` fetches many links concurrently on one asyncio event loop with
+httpx, at most `concurrency` at a time (a semaphore, so time spent queued
+for a slot never counts against a request's timeout). Every host also gets
+its own concurrency cap and a minimum gap between
+requests (raised to the host's robots.txt Crawl-delay), paths disallowed by
+robots.txt are skipped, and requests are conditional on the ETag /
+Last-Modified from the previous check. `record()` then writes the results
+synchronously: link status on StoreLink and one PriceSnapshot per price
+read, so pages only ever read stored data.
+"""
+
+import asyncio
+import json
+import re
+import time
+from decimal import Decimal, InvalidOperation
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import PriceSnapshot, Racket, StoreLink
+
+USER_AGENT = 'PadelRDB-linkcheck/1.0 (+https://padelrdb.onrender.com)'
+MAX_BODY = 2 * 1024 * 1024  # Prices are near the top of product pages; don't download more
+DEAD_AFTER = 3  # Consecutive failed checks before a link is hidden
+GONE = {404, 410}  # Dead immediately
+
+PRICE_META = {'product:price:amount', 'og:price:amount', 'price'}
+CURRENCY_META = {'product:price:currency', 'og:price:currency', 'pricecurrency'}
+
+
+# Helper Functions
+class _PriceParser(HTMLParser):
+    """Collects price <meta> tags (OpenGraph / microdata) and JSON-LD blocks."""
+
+    def __init__(self):
+        super().__init__()
+        self.meta = {}
+        self.json_ld = []
+        self._in_json_ld = False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'script' and (attrs.get('type') or '').lower() == 'application/ld+json':
+            self._in_json_ld = True
+            self.json_ld.append('')
+            return
+        key = (attrs.get('property') or attrs.get('itemprop') or attrs.get('name') or '').lower()
+        value = attrs.get('content')
+        if key in PRICE_META | CURRENCY_META and value and key not in self.meta:
+            self.meta[key] = value
+
+    def handle_endtag(self, tag):
+        if tag == 'script':
+            self._in_json_ld = False
+
+    def handle_data(self, data):
+        if self._in_json_ld:
+            self.json_ld[-1] += data
+
+
+def parse_price(text):
+    """'1.299,95 €' -> Decimal('1299.95'); None if there is no number."""
+    number = re.sub(r'[^\d.,]', '', str(text))
+    if not number:
+        return None
+    if ',' in number and '.' in number:
+        decimal_mark = ',' if number.rfind(',') > number.rfind('.') else '.'
+    elif ',' in number:
+        decimal_mark = ',' if len(number) - number.rfind(',') - 1 in (1, 2) else ''
+    else:
+        decimal_mark = '.' if number.count('.') == 1 and len(number) - number.rfind('.') - 1 in (1, 2) else ''
+    thousands = {',', '.'} - {decimal_mark}
+    number = ''.join(char for char in number if char not in thousands).replace(',', '.')
+    try:
+        return Decimal(number).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        return None
+
+
+def _json_ld_offers(node):
+    if isinstance(node, list):
+        for item in node:
+            yield from _json_ld_offers(item)
+    elif isinstance(node, dict):
+        if 'price' in node or 'lowPrice' in node:
+            yield node
+        for key in ('offers', '@graph', 'mainEntity'):
+            if key in node:
+                yield from _json_ld_offers(node[key])
+
+
+def extract_price(html):
+    """(price, currency) from a product page's JSON-LD or price meta tags, or (None, '')."""
+    parser = _PriceParser()
+    try:
+        parser.feed(html)
+    except Exception:
+        return None, ''
+
+    for block in parser.json_ld:
+        try:
+            data = json.loads(block)
+        except ValueError:
+            continue
+        for offer in _json_ld_offers(data):
+            price = parse_price(offer.get('price', offer.get('lowPrice', '')))
+            if price is not None:
+                return price, str(offer.get('priceCurrency') or '')[:3].upper()
+
+    amount = next((parser.meta[key] for key in PRICE_META if key in parser.meta), None)
+    price = parse_price(amount) if amount else None
+    if price is None:
+        return None, ''
+    currency = next((parser.meta[key] for key in CURRENCY_META if key in parser.meta), '')
+    return price, currency[:3].upper()
+
+
+class _Host:
+    """Per-host concurrency cap, request pacing and robots.txt rules."""
+
+    def __init__(self, per_host, delay):
+        self.semaphore = asyncio.Semaphore(per_host)
+        self.delay = delay
+        self.next_request = 0.0
+        self.pace_lock = asyncio.Lock()
+        self.robots_lock = asyncio.Lock()
+        self.robots = None
+
+    async def load_robots(self, client, origin, slots):
+        async with self.robots_lock:
+            if self.robots is not None:
+                return
+            robots = RobotFileParser()
+            try:
+                async with slots:
+                    response = await client.get(f"{origin}/robots.txt")
+                robots.parse(response.text.splitlines() if response.status_code == 200 else [])
+            except Exception:
+                robots.parse([])
+            self.delay = max(self.delay, float(robots.crawl_delay(USER_AGENT) or 0))
+            self.robots = robots
+
+    async def wait_turn(self):
+        async with self.pace_lock:
+            now = time.monotonic()
+            wait = self.next_request - now
+            self.next_request = max(now, self.next_request) + self.delay
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+async def _check(client, hosts, slots, link, per_host, delay):
+    parts = urlsplit(link['url'])
+    host = hosts.setdefault(parts.netloc, _Host(per_host, delay))
+    result = {'id': link['id'], 'http_status': None, 'error': '', 'price': None, 'currency': '',
+              'etag': link['etag'], 'last_modified': link['last_modified'], 'blocked': False}
+
+    await host.load_robots(client, f"{parts.scheme}://{parts.netloc}", slots)
+    if not host.robots.can_fetch(USER_AGENT, link['url']):
+        result['blocked'] = True
+        return result
+
+    headers = {}
+    if link['etag']:
+        headers['If-None-Match'] = link['etag']
+    if link['last_modified']:
+        headers['If-Modified-Since'] = link['last_modified']
+
+    async with host.semaphore:
+        await host.wait_turn()
+        async with slots:
+            try:
+                async with client.stream('GET', link['url'], headers=headers) as response:
+                    result['http_status'] = response.status_code
+                    if response.status_code == 200:
+                        body = b''
+                        async for chunk in response.aiter_bytes():
+                            body += chunk
+                            if len(body) >= MAX_BODY:
+                                break
+                        text = body.decode(response.encoding or 'utf-8', errors='replace')
+                        result['price'], result['currency'] = extract_price(text)
+                        result['etag'] = response.headers.get('ETag', '')[:255]
+                        result['last_modified'] = response.headers.get('Last-Modified', '')[:64]
+            except Exception as error:  # Timeouts, DNS and TLS errors all count as a failed check
+                result['http_status'] = None
+                result['error'] = f"{type(error).__name__}: {error}"[:200]
+    return result
+
+
+async def crawl(links, per_host=2, concurrency=20, timeout=10.0, delay=1.0):
+    """
+    Check `links` (dicts with id, url, etag, last_modified) concurrently.
+    Returns one result dict per link.
+    """
+    import httpx
+
+    # The semaphore is the overall cap: never wait on httpx's pool, whose wait would count as a failure
+    slots = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    hosts = {}
+    async with httpx.AsyncClient(
+        timeout=httpx.Timeout(timeout, pool=None), limits=limits, follow_redirects=True,
+        headers={'User-Agent': USER_AGENT},
+    ) as client:
+        return await asyncio.gather(*(_check(client, hosts, slots, link, per_host, delay) for link in links))
+
+
+def links_to_check(stale_after=None, retailer=None):
+    links = StoreLink.objects.order_by('id')
+    if stale_after is not None:
+        links = links.exclude(checked_at__gte=timezone.now() - stale_after)
+    if retailer:
+        links = links.filter(retailer=retailer)
+    return list(links.values('id', 'url', 'etag', 'last_modified'))
+
+
+@transaction.atomic
+def record(results):
+    """Store crawl results. Returns counts per outcome."""
+    now = timezone.now()
+    counts = {'ok': 0, 'not_modified': 0, 'failed': 0, 'dead': 0, 'blocked': 0, 'prices': 0}
+    previous = {
+        row['id']: row for row in
+        StoreLink.objects.filter(pk__in=[result['id'] for result in results])
+        .values('id', 'racket_id', 'status', 'failures', 'price', 'currency')
+    }
+    snapshots, changed_rackets = [], set()
+    for result in results:
+        link = previous.get(result['id'])
+        if link is None:
+            continue  # Deleted while the crawl ran
+        status = result['http_status']
+        fields = {'checked_at': now}
+        if result['blocked']:
+            counts['blocked'] += 1
+        elif status == 304 or (status is not None and 200 <= status < 300):
+            counts['ok' if status != 304 else 'not_modified'] += 1
+            fields.update(status='ok', http_status=status, failures=0,
+                          etag=result['etag'], last_modified=result['last_modified'])
+            if result['price'] is not None:
+                counts['prices'] += 1
+                fields.update(price=result['price'], currency=result['currency'], price_at=now)
+                # Compared as stored: the column keeps two decimal places
+                if (result['price'].quantize(Decimal('0.01')), result['currency']) != (link['price'], link['currency']):
+                    changed_rackets.add(link['racket_id'])
+                snapshots.append(PriceSnapshot(
+                    link_id=link['id'], price=result['price'], currency=result['currency'], captured_at=now,
+                ))
+        else:
+            failures = link['failures'] + 1
+            dead = status in GONE or failures >= DEAD_AFTER
+            counts['dead' if dead else 'failed'] += 1
+            fields.update(http_status=status, failures=failures, status='dead' if dead else link['status'])
+
+        if fields.get('status', link['status']) != link['status']:
+            changed_rackets.add(link['racket_id'])
+        StoreLink.objects.filter(pk=link['id']).update(**fields)
+
+    PriceSnapshot.objects.bulk_create(snapshots, batch_size=500)
+    # Links appearing or disappearing and new prices are part of the racket's public data (API changed_since,
+    # incremental static exports)
+    Racket.objects.filter(pk__in=changed_rackets).update(updated_at=now)
+    return counts
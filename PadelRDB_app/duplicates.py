@@ -0,0 +1,210 @@
+"""
+Near-duplicate review comments: shingling, MinHash and locality-sensitive hashing.
+
+A comment is normalised (lower case, punctuation and repeated spaces
+dropped) and cut into overlapping SHINGLE_SIZE-character shingles. Its
+MinHash signature is the minimum of NUM_PERM random hash functions over
+those shingles: two signatures agree at any position with probability equal
+to the Jaccard similarity of the two shingle sets. The signature is split
+into BANDS bands of ROWS values and every band is hashed into a bucket, so
+that comments sharing any bucket are candidates. With 16 bands of 8 a pair
+at similarity 0.9 becomes a candidate almost surely, one at 0.5 about 6% of
+the time. Candidates are then checked with their exact Jaccard similarity.
+
+The buckets live in ReviewBucket: one indexed lookup per comment finds its
+candidates whatever the size of the corpus, and each review write replaces
+that review's rows (see signals.py). Changing the shingle size, NUM_PERM,
+BANDS or SEED invalidates every stored bucket: rebuild them with
+python manage.py cluster_reviews --rebuild.
+
+Comments shorter than REVIEW_DUPLICATE_MIN_LENGTH characters are left out:
+"Great racket!" is a common opinion, not spam.
+"""
+
+import hashlib
+import re
+import unicodedata
+import zlib
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+
+from .models import Review, ReviewBucket
+
+SHINGLE_SIZE = 5
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SEED = 20240611  # Fixed: stored buckets must be reproducible in every process
+MAX_CANDIDATES = 200  # Per lookup; a bucket this crowded is already a spam wave
+
+_permutations = None
+
+
+# Helper Functions
+def normalize(text):
+    text = unicodedata.normalize('NFKD', text or '').encode('ascii', 'ignore').decode().lower()
+    return ' '.join(re.findall(r'[a-z0-9]+', text))
+
+
+def shingles(text):
+    """The set of SHINGLE_SIZE-character pieces of the normalised text."""
+    text = normalize(text)
+    return {text[start:start + SHINGLE_SIZE] for start in range(max(len(text) - SHINGLE_SIZE + 1, 1))}
+
+
+def jaccard(first, second):
+    return len(first & second) / len(first | second) if first and second else 0.0
+
+
+def indexable(text):
+    return len(normalize(text)) >= getattr(settings, 'REVIEW_DUPLICATE_MIN_LENGTH', 40)
+
+
+def _hash_functions():
+    """
+    NUM_PERM (a, b) pairs of the multiply-add-shift hashes
+    ((a * x + b) mod 2**64) >> 32, strongly universal on 32-bit keys, drawn
+    once per process. uint64 arithmetic wraps, which gives the mod for free.
+    """
+    global _permutations
+    if _permutations is None:
+        import numpy as np
+
+        rng = np.random.default_rng(SEED)
+        _permutations = (rng.integers(0, 1 << 64, NUM_PERM, dtype=np.uint64, endpoint=False),
+                         rng.integers(0, 1 << 64, NUM_PERM, dtype=np.uint64, endpoint=False))
+    return _permutations
+
+
+def signatures(texts):
+    """
+    MinHash signatures of many texts at once: a (len(texts), NUM_PERM)
+    uint64 array. All the texts' shingle hashes go through the hash
+    functions in one vectorised pass, and np.minimum.reduceat takes each
+    text's minima, so keep batches to a few hundred comments.
+    """
+    import numpy as np
+
+    a, b = _hash_functions()
+    hashes = [np.fromiter((zlib.crc32(shingle.encode()) for shingle in shingles(text)), dtype=np.uint64)
+              for text in texts]
+    if not hashes:
+        return np.empty((0, NUM_PERM), dtype=np.uint64)
+    starts = np.cumsum([0] + [len(values) for values in hashes[:-1]])
+    permuted = (a[:, None] * np.concatenate(hashes)[None, :] + b[:, None]) >> np.uint64(32)
+    return np.minimum.reduceat(permuted, starts, axis=1).T
+
+
+def band_keys(signature):
+    """One signed 64-bit bucket key per band; the band number is part of the key."""
+    return [
+        int.from_bytes(
+            hashlib.blake2b(bytes([band]) + signature[band * ROWS:(band + 1) * ROWS].tobytes(), digest_size=8).digest(),
+            'big', signed=True,
+        )
+        for band in range(BANDS)
+    ]
+
+
+@transaction.atomic
+def index_review(review_id, comment):
+    """Replace the review's buckets after a write (none for short comments)."""
+    ReviewBucket.objects.filter(review_id=review_id).delete()
+    if indexable(comment) and Review.objects.filter(pk=review_id).exists():
+        ReviewBucket.objects.bulk_create(
+            ReviewBucket(review_id=review_id, band=band, bucket=key)
+            for band, key in enumerate(band_keys(signatures([comment])[0]))
+        )
+
+
+def rebuild_index(batch_size=250):
+    """Recompute every review's buckets, a batch of signatures at a time. Returns the number indexed."""
+    ReviewBucket.objects.all().delete()
+    indexed = 0
+    reviews = Review.objects.exclude(comment='').order_by('pk').values_list('pk', 'comment')
+    batch = []
+    for row in reviews.iterator(chunk_size=batch_size):
+        if indexable(row[1]):
+            batch.append(row)
+        if len(batch) == batch_size:
+            indexed += _index_batch(batch)
+            batch = []
+    return indexed + _index_batch(batch)
+
+
+def _index_batch(rows):
+    if not rows:
+        return 0
+    buckets = [
+        ReviewBucket(review_id=review_id, band=band, bucket=key)
+        for (review_id, comment), signature in zip(rows, signatures([comment for review_id, comment in rows]))
+        for band, key in enumerate(band_keys(signature))
+    ]
+    ReviewBucket.objects.bulk_create(buckets, batch_size=1000)
+    return len(rows)
+
+
+def near_duplicates(comment, exclude=None, similarity=None):
+    """
+    Reviews whose comment is at least `similarity` (Jaccard, default
+    REVIEW_DUPLICATE_SIMILARITY) like this one, most similar first, as
+    (review, similarity) pairs. `exclude` is a review id to leave out, e.g.
+    the one being edited.
+    """
+    if not indexable(comment):
+        return []
+    similarity = similarity or getattr(settings, 'REVIEW_DUPLICATE_SIMILARITY', 0.7)
+    candidate_ids = (
+        ReviewBucket.objects.filter(bucket__in=band_keys(signatures([comment])[0]))
+        .exclude(review_id=exclude)
+        .values_list('review_id', flat=True).distinct()[:MAX_CANDIDATES]
+    )
+    own = shingles(comment)
+    matches = [
+        (review, jaccard(own, shingles(review.comment)))
+        for review in Review.objects.filter(pk__in=list(candidate_ids)).select_related('user', 'racket')
+    ]
+    return sorted(((review, score) for review, score in matches if score >= similarity), key=lambda pair: -pair[1])
+
+
+def clusters(similarity=None, min_size=2):
+    """
+    Groups of reviews linked by near-duplicate comments, largest first. Only
+    reviews sharing a bucket are ever compared, and each linked pair is
+    checked with its exact similarity before joining two groups.
+    """
+    similarity = similarity or getattr(settings, 'REVIEW_DUPLICATE_SIMILARITY', 0.7)
+    crowded = ReviewBucket.objects.values('bucket').annotate(size=Count('id')).filter(size__gt=1).values('bucket')
+    members = {}
+    for bucket, review_id in ReviewBucket.objects.filter(bucket__in=crowded).values_list('bucket', 'review_id'):
+        members.setdefault(bucket, []).append(review_id)
+
+    comments = dict(Review.objects.filter(lsh_buckets__bucket__in=crowded).distinct().values_list('pk', 'comment'))
+    shingle_sets = {review_id: shingles(comment) for review_id, comment in comments.items()}
+
+    parent = {review_id: review_id for review_id in shingle_sets}
+
+    def find(review_id):
+        while parent[review_id] != review_id:
+            parent[review_id] = parent[parent[review_id]]
+            review_id = parent[review_id]
+        return review_id
+
+    # Members of a bucket agree on a whole band, so checking each against the first is enough to link them
+    checked = set()
+    for ids in members.values():
+        first = ids[0]
+        for other in ids[1:]:
+            pair = (min(first, other), max(first, other))
+            if pair in checked or find(first) == find(other):
+                continue
+            checked.add(pair)
+            if jaccard(shingle_sets[first], shingle_sets[other]) >= similarity:
+                parent[find(other)] = find(first)
+
+    groups = {}
+    for review_id in shingle_sets:
+        groups.setdefault(find(review_id), []).append(review_id)
+    return sorted((sorted(ids) for ids in groups.values() if len(ids) >= min_size), key=lambda ids: (-len(ids), ids[0]))
@@ -0,0 +1,135 @@
+import csv
+import json
+import zlib
+from datetime import date, datetime, time, timedelta
+from itertools import islice
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from .models import LeaderboardEntry, Racket, RacketVideo, Review, StoreLink
+
+CHUNK_SIZE = 2000
+
+REVIEW_COLUMNS = [
+    ('id', 'id'),
+    ('created_at', 'created_at'),
+    ('user_id', 'user_id'),
+    ('user_type', 'user_type'),
+    ('racket_id', 'racket_id'),
+    ('racket_slug', 'racket__slug'),
+    ('racket_name', 'racket__name'),
+    ('brand', 'racket__brand__name'),
+    *[(attribute, attribute) for attribute in LeaderboardEntry.ATTRIBUTES],
+    ('comment', 'comment'),
+]
+
+RACKET_COLUMNS = [
+    ('id', 'id'),
+    ('slug', 'slug'),
+    ('name', 'name'),
+    ('brand', 'brand__name'),
+    ('core', 'core'),
+    ('surface', 'surface'),
+    ('weight', 'weight'),
+    ('shape', 'shape'),
+    ('balance', 'balance'),
+    ('gametype', 'gametype'),
+    ('finish', 'finish'),
+    ('media_urls', None),  # Filled from RacketVideo
+    ('store_links', None),  # Filled from StoreLink
+]
+
+
+# Helper Functions
+def parse_day(value):
+    """YYYY-MM-DD -> date; raises ValueError on bad input."""
+    return date.fromisoformat(value) if value else None
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min), timezone.get_current_timezone())
+
+
+def review_rows(since=None, until=None, brand=None):
+    """
+    Reviews joined with racket and brand as plain tuples, read through a
+    server-side cursor so memory stays flat whatever the table size.
+    """
+    reviews = Review.objects.order_by('id')
+    if since:
+        reviews = reviews.filter(created_at__gte=_day_start(since))
+    if until:
+        reviews = reviews.filter(created_at__lt=_day_start(until + timedelta(days=1)))
+    if brand:
+        reviews = reviews.filter(racket__brand__name=brand.lower())
+    return reviews.values_list(*[field for column, field in REVIEW_COLUMNS]).iterator(chunk_size=CHUNK_SIZE)
+
+
+def racket_rows(brand=None):
+    """Rackets as plain tuples, with their videos and store links loaded per chunk of rows."""
+    rackets = Racket.objects.order_by('id')
+    if brand:
+        rackets = rackets.filter(brand__name=brand.lower())
+    rows = rackets.values_list(*[field for column, field in RACKET_COLUMNS if field]).iterator(chunk_size=CHUNK_SIZE)
+    for batch in iter(lambda: list(islice(rows, CHUNK_SIZE)), []):
+        ids = [row[0] for row in batch]
+        videos, links = RacketVideo.urls(ids), StoreLink.as_json(ids)
+        for row in batch:
+            yield (*row, videos[row[0]], links[row[0]])
+
+
+class _Echo:
+    """File-like object whose write() returns the line, so csv.writer can feed a generator."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(columns, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow([column for column, field in columns])
+    for row in rows:
+        yield writer.writerow(
+            json.dumps(value) if isinstance(value, (dict, list)) else value for value in row
+        )
+
+
+def ndjson_lines(columns, rows):
+    names = [column for column, field in columns]
+    for row in rows:
+        yield json.dumps(dict(zip(names, row)), cls=DjangoJSONEncoder) + '\n'
+
+
+def encode(lines, batch_size=256):
+    """Join small lines into larger byte chunks to cut per-chunk overhead."""
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= batch_size:
+            yield ''.join(batch).encode()
+            batch = []
+    if batch:
+        yield ''.join(batch).encode()
+
+
+def gzip_stream(chunks):
+    """Compress a byte stream on the fly into a single gzip member."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_stream(dataset, fmt, compress=False, since=None, until=None, brand=None):
+    """Byte chunks of a full export. `dataset` is 'reviews' or 'rackets', `fmt` 'csv' or 'ndjson'."""
+    if dataset == 'reviews':
+        columns, rows = REVIEW_COLUMNS, review_rows(since, until, brand)
+    else:
+        columns, rows = RACKET_COLUMNS, racket_rows(brand)
+
+    lines = csv_lines(columns, rows) if fmt == 'csv' else ndjson_lines(columns, rows)
+    chunks = encode(lines)
+    return gzip_stream(chunks) if compress else chunks
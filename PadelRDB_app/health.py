@@ -0,0 +1,37 @@
+"""
+Liveness and readiness probes for the platform's health checks.
+
+/healthz answers as long as the process can serve a request. /readyz
+answers 200 only once this process has finished its warm-up (warmup.py)
+and the database accepts a query; until then it answers 503, so traffic
+is not routed to a cold or disconnected worker.
+"""
+
+from django.db import DatabaseError, connection
+from django.http import JsonResponse
+from django.views.decorators.cache import never_cache
+
+from .warmup import is_warm
+
+
+# Helper Functions
+def database_ok():
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        return True
+    except DatabaseError:
+        return False
+
+
+# Views
+@never_cache
+def healthz(request):
+    return JsonResponse({'status': 'ok'})
+
+
+@never_cache
+def readyz(request):
+    checks = {'warm': is_warm(), 'database': database_ok()}
+    ready = all(checks.values())
+    return JsonResponse({'status': 'ready' if ready else 'unavailable', 'checks': checks}, status=200 if ready else 503)
@@ -0,0 +1,106 @@
+"""
+Intrinsic dimensions and low-quality placeholders (LQIP) for uploaded images.
+
+Every image field listed in IMAGE_FIELDS has a companion `<field>_details`
+JSONField holding {'name', 'width', 'height', 'placeholder'}, computed once
+per file by a background job. `placeholder` is a tiny WebP data URI (a few
+hundred bytes) that templates paint behind the <img> while the real file
+loads; width and height let the browser reserve the box before it arrives.
+Details whose `name` no longer matches the field's file are stale and ignored.
+"""
+
+import base64
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.apps import apps
+from django.core.files.storage import default_storage
+
+IMAGE_FIELDS = {
+    'PadelRDB_app.Racket': ['thumbnail'],
+    'PadelRDB_app.RacketImage': ['image'],
+    'PadelRDB_app.Brand': ['logo'],
+    'PadelRDB_app.CustomUser': ['profile_image'],
+}
+
+PLACEHOLDER_SIZE = 16  # Longest side of the placeholder, in pixels
+
+# EXIF orientations that the browser applies when displaying the image
+ORIENTATION_TRANSPOSE = {2: 'FLIP_LEFT_RIGHT', 3: 'ROTATE_180', 4: 'FLIP_TOP_BOTTOM', 5: 'TRANSPOSE',
+                         6: 'ROTATE_270', 7: 'TRANSVERSE', 8: 'ROTATE_90'}
+
+
+# Helper Functions
+def measure(source):
+    """Displayed width, height and placeholder data URI of an open image file."""
+    from PIL import Image
+
+    image = Image.open(source)
+    width, height = image.size
+    orientation = image.getexif().get(0x0112)
+    # JPEGs can be decoded straight at a fraction of their size, which is most of the work
+    image.draft('RGB', (PLACEHOLDER_SIZE * 4, PLACEHOLDER_SIZE * 4))
+    image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P', 'PA') else 'RGB')
+    image.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+    if orientation in ORIENTATION_TRANSPOSE:
+        image = image.transpose(getattr(Image.Transpose, ORIENTATION_TRANSPOSE[orientation]))
+        if orientation >= 5:
+            width, height = height, width
+
+    buffer = BytesIO()
+    image.save(buffer, format='WEBP', quality=40)
+    placeholder = 'data:image/webp;base64,' + base64.b64encode(buffer.getvalue()).decode()
+    return width, height, placeholder
+
+
+def image_details(name):
+    """Details dict for a stored file, or None if it is missing or not an image."""
+    from PIL import UnidentifiedImageError
+
+    try:
+        with default_storage.open(name) as source:
+            width, height, placeholder = measure(source)
+    except (FileNotFoundError, UnidentifiedImageError, OSError, SyntaxError):
+        return None
+    return {'name': name, 'width': width, 'height': height, 'placeholder': placeholder}
+
+
+def is_stale(instance, field):
+    name = getattr(instance, field).name
+    return bool(name) and getattr(instance, f'{field}_details').get('name') != name
+
+
+def refresh_details(model, pk, field):
+    """Compute and store the details of one object's image, unless the file changed meanwhile."""
+    name = model.objects.filter(pk=pk).values_list(field, flat=True).first()
+    if not name:
+        return
+    details = image_details(name)
+    if details is not None:
+        # update() so concurrent edits of other fields are not overwritten
+        model.objects.filter(pk=pk, **{field: name}).update(**{f'{field}_details': details})
+
+
+def backfill(workers=8, force=False):
+    """
+    Compute missing or stale details for every image field. Files are read
+    and decoded on a thread pool (storage reads and Pillow decoding release
+    the GIL); rows are written from the calling thread. Returns (updated, failed).
+    """
+    updated = failed = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for label, fields in IMAGE_FIELDS.items():
+            model = apps.get_model(label)
+            for field in fields:
+                rows = model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+                pending = [
+                    (pk, name) for pk, name, details in rows.values_list('pk', field, f'{field}_details').iterator()
+                    if force or (details or {}).get('name') != name
+                ]
+                for (pk, name), details in zip(pending, pool.map(image_details, [name for pk, name in pending])):
+                    if details is None:
+                        failed += 1
+                        continue
+                    model.objects.filter(pk=pk, **{field: name}).update(**{f'{field}_details': details})
+                    updated += 1
+    return updated, failed
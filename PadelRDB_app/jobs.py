@@ -0,0 +1,194 @@
+import logging
+import random
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from django.db.models import Count, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.lookups import LessThan
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# Task name -> callable, filled by the @task decorator (see tasks.py)
+TASKS = {}
+
+
+def task(name=None, queue='default', priority=0, max_attempts=5):
+    """Register a function as a background task, runnable by the `run_jobs` worker."""
+    def decorator(func):
+        func.task_name = name or func.__name__
+        func.queue = queue
+        func.priority = priority
+        func.max_attempts = max_attempts
+        TASKS[func.task_name] = func
+        return func
+    return decorator
+
+
+def enqueue(func, payload=None, dedup_key=None, priority=None, delay=None):
+    """
+    Queue a task for the worker and return the Job.
+
+    If a job with the same `dedup_key` is already queued, that job is returned
+    instead of creating a second one.
+    """
+    payload = payload or {}
+
+    if getattr(settings, 'JOB_QUEUE_EAGER', False):
+        func(**payload)
+        return None
+
+    fields = {
+        'task': func.task_name,
+        'payload': payload,
+        'queue': func.queue,
+        'priority': func.priority if priority is None else priority,
+        'max_attempts': func.max_attempts,
+        'dedup_key': dedup_key,
+        'run_at': timezone.now() + (delay or timedelta(0)),
+    }
+    if dedup_key:
+        existing = Job.objects.filter(dedup_key=dedup_key, status='queued').first()
+        if existing:
+            return existing
+    try:
+        with transaction.atomic():
+            return Job.objects.create(**fields)
+    except IntegrityError:
+        # Lost a race with another request enqueueing the same key
+        return Job.objects.filter(dedup_key=dedup_key, status='queued').first()
+
+
+def backoff(attempts):
+    """Seconds to wait before retry number `attempts`: exponential with jitter, capped."""
+    base = getattr(settings, 'JOB_QUEUE_BACKOFF_BASE', 10)
+    cap = getattr(settings, 'JOB_QUEUE_BACKOFF_MAX', 3600)
+    return min(cap, base * 2 ** (attempts - 1)) * random.uniform(0.8, 1.2)
+
+
+def _queue_limit(queue):
+    return getattr(settings, 'JOB_QUEUE_CONCURRENCY', {}).get(queue)
+
+
+def _queue_is_full(queue):
+    """A hint to skip a queue early; _claim() is what enforces the limit."""
+    limit = _queue_limit(queue)
+    if limit is None:
+        return False
+    return Job.objects.filter(queue=queue, status='running').count() >= limit
+
+
+def _lock_queue(queue):
+    """
+    On PostgreSQL, serialize the claims on `queue` until the transaction ends:
+    under READ COMMITTED two concurrent UPDATEs would each count the running
+    jobs without the other's. SQLite runs one write statement at a time.
+    """
+    connection = connections[Job.objects.db]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_xact_lock(hashtext(%s))', [f"jobs:{queue}"])
+
+
+def _claim(job, worker_id):
+    """
+    Mark `job` running unless another worker took it or its queue is at its
+    concurrency limit, both checked by the UPDATE itself. Returns whether it
+    was claimed.
+    """
+    # Conditional update instead of SELECT ... FOR UPDATE so this also works on SQLite
+    claimable = Job.objects.filter(pk=job.pk, status='queued')
+    limit = _queue_limit(job.queue)
+    with transaction.atomic():
+        if limit is not None:
+            _lock_queue(job.queue)
+            running = (
+                Job.objects.filter(queue=job.queue, status='running')
+                .order_by().values('queue').annotate(count=Count('pk')).values('count')
+            )
+            claimable = claimable.filter(LessThan(Coalesce(Subquery(running), 0), limit))
+        return bool(claimable.update(
+            status='running', locked_at=timezone.now(), locked_by=worker_id, attempts=job.attempts + 1,
+        ))
+
+
+def claim_next(worker_id, queues=None):
+    """
+    Atomically claim the highest-priority due job, honouring per-queue
+    concurrency limits (see _claim). Returns None when nothing is claimable.
+    """
+    candidates = Job.objects.filter(status='queued', run_at__lte=timezone.now())
+    if queues:
+        candidates = candidates.filter(queue__in=queues)
+
+    full_queues = set()
+    for job in candidates.order_by('-priority', 'run_at')[:20]:
+        if job.queue in full_queues:
+            continue
+        if _queue_is_full(job.queue):
+            full_queues.add(job.queue)
+            continue
+        if _claim(job, worker_id):
+            job.refresh_from_db()
+            return job
+    return None
+
+
+def run_job(job):
+    """Run a claimed job, then mark it done or schedule a retry with backoff."""
+    func = TASKS.get(job.task)
+    try:
+        if func is None:
+            raise LookupError(f"Unknown task: {job.task}")
+        func(**job.payload)
+    except Exception:
+        job.last_error = traceback.format_exc()
+        job.locked_at = None
+        job.locked_by = ''
+        if job.attempts >= job.max_attempts:
+            job.status = 'failed'
+            job.finished_at = timezone.now()
+            logger.error("Job %s (%s) failed permanently", job.pk, job.task)
+        else:
+            job.status = 'queued'
+            job.run_at = timezone.now() + timedelta(seconds=backoff(job.attempts))
+            logger.warning("Job %s (%s) failed, retry %s scheduled", job.pk, job.task, job.attempts)
+        try:
+            with transaction.atomic():
+                job.save()
+        except IntegrityError:
+            # A fresh job with the same dedup key was queued meanwhile; it supersedes this retry
+            job.dedup_key = None
+            job.save()
+        return False
+
+    job.status = 'done'
+    job.finished_at = timezone.now()
+    job.locked_at = None
+    job.save(update_fields=['status', 'finished_at', 'locked_at'])
+    return True
+
+
+def requeue_stale(timeout):
+    """Put back jobs whose worker died mid-run (locked longer than `timeout`)."""
+    cutoff = timezone.now() - timedelta(seconds=timeout)
+    requeued = 0
+    for job in Job.objects.filter(status='running', locked_at__lt=cutoff):
+        job.status = 'queued'
+        job.locked_at = None
+        job.locked_by = ''
+        if job.dedup_key and Job.objects.filter(dedup_key=job.dedup_key, status='queued').exists():
+            job.dedup_key = None  # Keep the newer queued twin as the deduplicated one
+        job.save()
+        requeued += 1
+    return requeued
+
+
+def purge_finished(older_than):
+    cutoff = timezone.now() - timedelta(seconds=older_than)
+    return Job.objects.filter(status__in=['done', 'failed'], finished_at__lt=cutoff).delete()[0]
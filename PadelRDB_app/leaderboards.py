@@ -0,0 +1,159 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count, F, Q, Sum
+
+from .models import LeaderboardEntry, Review
+
+ATTRIBUTES = LeaderboardEntry.ATTRIBUTES
+USER_TYPES = [user_type for user_type, label in Review.USER_TYPES]
+
+
+# Helper Functions
+def bayesian_score(total, count, prior_mean, prior_weight):
+    """
+    Average pulled towards the global mean: a racket needs many reviews before
+    its own average dominates, so one 10/10 review can't top the board.
+    """
+    return (prior_weight * prior_mean + total) / (prior_weight + count)
+
+
+def _prior_weight(default):
+    weight = getattr(settings, 'LEADERBOARD_PRIOR_WEIGHT', None)
+    return weight if weight is not None else default
+
+
+def global_means(user_type):
+    """Mean rating per attribute over every review of this user type."""
+    means = Review.objects.filter(user_type=user_type).aggregate(
+        **{attribute: Avg(attribute) for attribute in ATTRIBUTES}
+    )
+    return {attribute: means[attribute] or 0.0 for attribute in ATTRIBUTES}
+
+
+def _racket_totals(reviews):
+    """One grouped query: review count and per-attribute sums per (racket, user type)."""
+    return reviews.values('racket_id', 'user_type').annotate(
+        count=Count('id'),
+        **{f'sum_{attribute}': Sum(attribute) for attribute in ATTRIBUTES},
+    )
+
+
+def _score_all(rows):
+    """Every board's entries, ranked, from the grouped totals of all reviews."""
+    entries = []
+    for user_type in USER_TYPES:
+        group = [row for row in rows if row['user_type'] == user_type]
+        if not group:
+            continue
+        review_total = sum(row['count'] for row in group)
+        prior_weight = _prior_weight(review_total / len(group))
+
+        for attribute in ATTRIBUTES:
+            prior_mean = sum(row[f'sum_{attribute}'] for row in group) / review_total
+            scored = sorted(
+                (
+                    (bayesian_score(row[f'sum_{attribute}'], row['count'], prior_mean, prior_weight),
+                     row[f'sum_{attribute}'] / row['count'], row['count'], row['racket_id'])
+                    for row in group
+                ),
+                key=lambda item: (-item[0], -item[2], item[3]),
+            )
+            entries.extend(
+                LeaderboardEntry(
+                    attribute=attribute, user_type=user_type, racket_id=racket_id,
+                    rank=rank, score=score, average=average, review_count=count,
+                )
+                for rank, (score, average, count, racket_id) in enumerate(scored, start=1)
+            )
+    return entries
+
+
+def rebuild_all():
+    """
+    Recompute every leaderboard from scratch in one pass over the grouped totals
+    and replace the stored rows. Returns the number of rows written.
+
+    The stored rows are locked first, in id order like update_racket() does,
+    so an update running meanwhile can't be overwritten with older totals.
+    """
+    with transaction.atomic():
+        list(LeaderboardEntry.objects.select_for_update().order_by('id').values_list('id'))
+        entries = _score_all(list(_racket_totals(Review.objects.all())))
+        LeaderboardEntry.objects.all().delete()
+        LeaderboardEntry.objects.bulk_create(entries, batch_size=1000)
+    return len(entries)
+
+
+def _ranked_before(score, count, racket_id):
+    # Same ordering as rebuild_all: score desc, review count desc, racket id asc
+    return (
+        Q(score__gt=score)
+        | Q(score=score, review_count__gt=count)
+        | Q(score=score, review_count=count, racket_id__lt=racket_id)
+    )
+
+
+def _remove(board, entry):
+    entry.delete()
+    board.filter(rank__gt=entry.rank).update(rank=F('rank') - 1)
+
+
+@transaction.atomic
+def update_racket(racket_id):
+    """
+    Re-score one racket after its reviews changed and move it to its new
+    position, shifting only the ranks in between. The review also moves the
+    prior (the user type's global means) that every other racket's score is
+    pulled towards; those scores and ranks stay slightly stale until the
+    rebuild_leaderboards job that each review write schedules, debounced by
+    LEADERBOARD_REBUILD_DELAY, re-scores the whole board.
+
+    Reading a rank and shifting the others must not interleave with another
+    racket's update: the user type's boards are locked (SELECT ... FOR
+    UPDATE, in id order so two updates can't deadlock) before they are read.
+    Only a board with no rows at all has nothing to lock; the refresh
+    task's queue also runs one job at a time (JOB_QUEUE_CONCURRENCY, enforced
+    by the claiming UPDATE, see jobs._claim).
+    """
+    totals = {row['user_type']: row for row in _racket_totals(Review.objects.filter(racket_id=racket_id))}
+
+    for user_type in USER_TYPES:
+        list(LeaderboardEntry.objects.select_for_update().filter(user_type=user_type).order_by('id').values_list('id'))
+        row = totals.get(user_type)
+        existing = {
+            entry.attribute: entry
+            for entry in LeaderboardEntry.objects.filter(racket_id=racket_id, user_type=user_type)
+        }
+        if row is None:
+            for attribute, entry in existing.items():
+                _remove(LeaderboardEntry.objects.filter(attribute=attribute, user_type=user_type), entry)
+            continue
+
+        means = global_means(user_type)
+        stats = Review.objects.filter(user_type=user_type).aggregate(
+            reviews=Count('id'), rackets=Count('racket', distinct=True),
+        )
+        prior_weight = _prior_weight(stats['reviews'] / stats['rackets'])
+
+        for attribute in ATTRIBUTES:
+            board = LeaderboardEntry.objects.filter(attribute=attribute, user_type=user_type)
+            if attribute in existing:
+                _remove(board, existing[attribute])
+
+            total, count = row[f'sum_{attribute}'], row['count']
+            score = bayesian_score(total, count, means[attribute], prior_weight)
+            rank = board.filter(_ranked_before(score, count, racket_id)).count() + 1
+            board.filter(rank__gte=rank).update(rank=F('rank') + 1)
+            LeaderboardEntry.objects.create(
+                attribute=attribute, user_type=user_type, racket_id=racket_id,
+                rank=rank, score=score, average=total / count, review_count=count,
+            )
+
+
+def top(attribute, user_type, limit=50):
+    """A leaderboard page: one range read on the (attribute, user_type, rank) index."""
+    return (
+        LeaderboardEntry.objects.filter(attribute=attribute, user_type=user_type)
+        .select_related('racket__brand')
+        .order_by('rank')[:limit]
+    )
@@ -0,0 +1,344 @@
+"""
+End-to-end load test: how many requests per second one gunicorn dyno sustains.
+
+`seed()` fills a throwaway database (PadelRDB.settings_loadtest) with a
+dataset scaled from SCALE_1 and returns the catalog of pages to visit. The
+load_test command boots gunicorn and a run_jobs worker on that database,
+with YouTube oEmbed served by OEmbedStandIn. It then calls `run_stage()` at
+increasing concurrency.
+
+Each virtual user picks flows from TRAFFIC_MIX back to back, with no think
+time. The flows are mostly anonymous browse -> brand page -> racket page,
+some logged-in review flows and a few profile photo uploads. Each virtual
+user has its own X-Forwarded-For address, so the rate limits apply per
+client as in production, and paces its POSTs under its per-user limits
+(RATE_LIMITS): a review or upload that is not due yet becomes a browse.
+`summarize()` turns the samples into throughput, latency percentiles and
+error rates per endpoint, which the command saves as one JSON report per
+commit. A 429 that still gets through is counted as throttled, not as an
+error: the report measures capacity, not the rate limiter.
+"""
+
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from urllib.parse import parse_qs, urlsplit
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Avg, Count
+from django.utils.text import slugify
+
+from .leaderboards import rebuild_all
+from .models import Brand, CustomUser, LeaderboardEntry, Racket, RacketVideo, Review, StoreLink, UserReviewStats
+from .ratelimit import parse_rate
+from .recommendations import train
+from .rollups import backfill
+
+SCALE_1 = {'brands': 12, 'rackets_per_brand': 40, 'users': 2000, 'reviews_per_user': 10, 'videos_per_racket': 2}
+PASSWORD = 'load-test-password'
+COMMENT_WORDS = ('solid sweet spot power control heavy light head balance soft hard foam carbon grip spin '
+                 'volley smash bandeja vibora comfort elbow exit fast slow round diamond teardrop rough').split()
+GAME_TYPES = ['Power', 'Control', 'Polyvalent']
+
+# Flow name, share of the flows started, whether it needs a logged-in user
+TRAFFIC_MIX = [
+    ('browse', 80, False),
+    ('review', 17, True),
+    ('upload', 3, True),
+]
+# Flow -> the RATE_LIMITS entry of the POST it ends with
+PACED_FLOWS = {'review': 'submit_review', 'upload': 'upload-profile-photo'}
+PACING_MARGIN = 1.1  # The sliding estimate can exceed the true rate: stay a little under it
+
+
+# Helper Functions
+def _png(size=(64, 64), color=(40, 120, 200)):
+    from PIL import Image
+
+    buffer = BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of sorted `values`."""
+    if not values:
+        return None
+    return values[min(len(values) - 1, max(0, round(fraction * len(values)) - 1))]
+
+
+def flow_intervals():
+    """Seconds a virtual user waits between two runs of each paced flow, from its per-user limit."""
+    intervals = {}
+    for flow, name in PACED_FLOWS.items():
+        rate = getattr(settings, 'RATE_LIMITS', {}).get(name, {}).get('user')
+        if rate:
+            count, period = parse_rate(rate)
+            intervals[flow] = period / count * PACING_MARGIN
+    return intervals
+
+
+def seed(scale=1.0, random_seed=1):
+    """
+    Create the scaled dataset with bulk inserts (no signals) and the derived
+    tables the signals would have filled. Returns the catalog the virtual
+    users pick pages from. Deterministic for a given scale and seed.
+    """
+    rng = random.Random(random_seed)
+    counts = {key: max(1, round(value * scale)) for key, value in SCALE_1.items()}
+    counts['reviews_per_user'] = SCALE_1['reviews_per_user']
+    counts['videos_per_racket'] = SCALE_1['videos_per_racket']
+
+    image = default_storage.save('loadtest/placeholder.png', ContentFile(_png()))
+    password = make_password(PASSWORD)  # Hashed once: PBKDF2 per user would dominate seeding
+
+    with transaction.atomic():
+        Brand.objects.bulk_create([Brand(name=f"brand{index:02d}", logo=image) for index in range(counts['brands'])])
+        brands = list(Brand.objects.order_by('id'))
+        Racket.objects.bulk_create([
+            Racket(
+                brand=brand, name=f"{brand.name} model {index:03d}", slug=slugify(f"{brand.name} model {index:03d}"),
+                core='EVA', surface='Carbon', weight='365 g', shape=rng.choice(['Round', 'Teardrop', 'Diamond']),
+                balance='Medium', gametype=rng.choice(GAME_TYPES), finish='Matte', thumbnail=image,
+            )
+            for brand in brands for index in range(counts['rackets_per_brand'])
+        ], batch_size=1000)
+        rackets = list(Racket.objects.select_related('brand').order_by('id'))
+        RacketVideo.objects.bulk_create([
+            RacketVideo(racket=racket, url=f"https://www.youtube.com/watch?v={racket.id:06d}{index}", position=index)
+            for racket in rackets for index in range(counts['videos_per_racket'])
+        ], batch_size=1000)
+        StoreLink.objects.bulk_create([
+            StoreLink(racket=racket, kind=kind, retailer=retailer, url=f"https://{retailer}.example/{racket.slug}")
+            for racket in rackets
+            for kind, retailer in [('brand', racket.brand.name), ('retailer', 'padelmarket'), ('retailer', 'adidas')]
+        ], batch_size=1000)
+
+        CustomUser.objects.bulk_create([
+            CustomUser(username=f"load{index:05d}", password=password,
+                       user_type='expert' if index % 10 == 0 else 'regular')
+            for index in range(counts['users'])
+        ], batch_size=1000)
+        users = list(CustomUser.objects.filter(username__startswith='load').order_by('id').values_list('id', 'user_type'))
+        reviews = []
+        for user_id, user_type in users:
+            for racket in rng.sample(rackets, min(counts['reviews_per_user'], len(rackets))):
+                reviews.append(Review(
+                    user_id=user_id, user_type=user_type, racket=racket, comment=f"Review of {racket.name}",
+                    **{attribute: rng.randint(1, 10) for attribute in LeaderboardEntry.ATTRIBUTES},
+                ))
+        Review.objects.bulk_create(reviews, batch_size=2000)
+
+        stats = (
+            Review.objects.values('user_id')
+            .annotate(review_count=Count('id'), brands_covered=Count('racket__brand', distinct=True),
+                      **{f'avg_{attribute}': Avg(attribute) for attribute in LeaderboardEntry.ATTRIBUTES})
+            .order_by()
+        )
+        UserReviewStats.objects.bulk_create([UserReviewStats(**row) for row in stats], batch_size=1000)
+
+    rebuild_all()
+    backfill()
+    train()  # As after the nightly run: browse and profile pages serve from a model
+
+    return {
+        'scale': scale,
+        'counts': counts,
+        'password': PASSWORD,
+        'brands': [{'id': brand.id, 'name': brand.name} for brand in brands],
+        'rackets': [{'id': racket.id, 'brand': racket.brand.name, 'slug': racket.slug} for racket in rackets],
+        'users': list(CustomUser.objects.filter(username__startswith='load').order_by('id').values_list('username', flat=True)),
+    }
+
+
+class OEmbedStandIn:
+    """Local stand-in for YouTube's oEmbed endpoint, answering after `latency` seconds like the real one."""
+
+    def __init__(self, latency=0.15):
+        latency_ = latency
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                time.sleep(latency_)
+                url = parse_qs(urlsplit(self.path).query).get('url', [''])[0]
+                body = json.dumps({
+                    'title': f"Review video {url[-7:]}", 'author_name': 'Load Test Channel',
+                    'thumbnail_url': 'https://img.youtube.com/vi/loadtest/hqdefault.jpg',
+                }).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/oembed"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class VirtualUser:
+    """One simulated client: its own address, an anonymous and a logged-in cookie jar."""
+
+    def __init__(self, base_url, catalog, index, samples, rng):
+        import httpx
+
+        self.catalog, self.samples, self.rng = catalog, samples, rng
+        self.intervals, self.next_run = flow_intervals(), {}
+        self.username = catalog['users'][index % len(catalog['users'])]
+        headers = {'X-Forwarded-For': f"10.{index // 65536 % 256}.{index // 256 % 256}.{index % 256}"}
+        self.anonymous = httpx.AsyncClient(base_url=base_url, headers=headers, timeout=30)
+        self.member = httpx.AsyncClient(base_url=base_url, headers=headers, timeout=30)
+
+    async def close(self):
+        await self.anonymous.aclose()
+        await self.member.aclose()
+
+    async def request(self, client, name, method, path, **kwargs):
+        if client is self.member and method == 'POST':
+            kwargs.setdefault('headers', {})['X-CSRFToken'] = client.cookies.get('csrftoken', '')
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, path, **kwargs)
+            status = response.status_code
+            error = status >= 400 and status != 429  # Throttled: counted apart by summarize()
+        except Exception:  # Timeouts and refused connections count as errors
+            response, status, error = None, None, True
+        self.samples.append((name, time.perf_counter() - start, status, error))
+        return response
+
+    async def log_in(self):
+        """Untimed: logging in happens before the stage's clock starts."""
+        await self.member.get('/en/login/')
+        response = await self.member.post('/en/login/', data={
+            'username': self.username, 'password': self.catalog['password'],
+            'csrfmiddlewaretoken': self.member.cookies.get('csrftoken', ''),
+        })
+        return response.status_code == 302
+
+    async def browse(self):
+        racket = self.rng.choice(self.catalog['rackets'])
+        await self.request(self.anonymous, 'browse', 'GET', '/en/browse/')
+        await self.request(self.anonymous, 'brand_page', 'GET', f"/en/browse/{racket['brand']}/")
+        await self.request(self.anonymous, 'racket_detail', 'GET', f"/en/browse/{racket['brand']}/{racket['slug']}/")
+
+    async def review(self):
+        brand = self.rng.choice(self.catalog['brands'])
+        await self.request(self.member, 'review_view', 'GET', '/en/review/')
+        response = await self.request(self.member, 'get_models', 'GET', '/en/get_models', params={'brand_id': brand['id']})
+        models = response.json() if response is not None and response.status_code == 200 else []
+        if not models:
+            return
+        racket_id = self.rng.choice(models)['id']
+        await self.request(self.member, 'get_review', 'GET', '/en/get_review/', params={'racket_id': racket_id})
+        scores = {attribute: self.rng.randint(1, 10) for attribute in LeaderboardEntry.ATTRIBUTES}
+        # Each comment different, as real ones are: identical text is refused as copy-pasted
+        comment = ' '.join(self.rng.choices(COMMENT_WORDS, k=12))
+        await self.request(self.member, 'submit_review', 'POST', '/en/submit-review/',
+                           data={'racket_id': racket_id, 'comment': comment, **scores})
+
+    async def upload(self):
+        image = _png(color=(self.rng.randrange(256), 80, 80))
+        await self.request(self.member, 'upload_profile_photo', 'POST', '/en/upload-profile-photo/',
+                           files={'profile_image': ('photo.png', image, 'image/png')})
+
+    async def run(self, deadline, logged_in):
+        flows = [name for name, share, member in TRAFFIC_MIX if logged_in or not member]
+        weights = [share for name, share, member in TRAFFIC_MIX if logged_in or not member]
+        while time.monotonic() < deadline:
+            flow = self.rng.choices(flows, weights)[0]
+            if time.monotonic() < self.next_run.get(flow, 0):
+                flow = 'browse'  # Its rate limit would refuse it: read some pages meanwhile
+            await getattr(self, flow)()
+            if flow in self.intervals:
+                self.next_run[flow] = time.monotonic() + self.intervals[flow]
+
+
+async def run_stage(base_url, catalog, concurrency, duration, random_seed=1):
+    """Run `concurrency` virtual users for `duration` seconds. Returns (samples, elapsed, login_failures)."""
+    samples = []
+    users = [
+        VirtualUser(base_url, catalog, index, samples, random.Random(random_seed * 100003 + index))
+        for index in range(concurrency)
+    ]
+    try:
+        logged_in = await asyncio.gather(*(user.log_in() for user in users))
+        start = time.monotonic()
+        await asyncio.gather(*(user.run(start + duration, ok) for user, ok in zip(users, logged_in)))
+        return samples, time.monotonic() - start, logged_in.count(False)
+    finally:
+        await asyncio.gather(*(user.close() for user in users))
+
+
+def summarize(samples, elapsed):
+    """
+    Throughput, latency percentiles (ms), error rate and throttled rate (429s,
+    not errors), overall and per endpoint.
+    """
+    def stats(rows):
+        latencies = sorted(latency * 1000 for _, latency, _, _ in rows)
+        errors = sum(1 for _, _, _, error in rows if error)
+        throttled = sum(1 for _, _, status, _ in rows if status == 429)
+        return {
+            'requests': len(rows),
+            'rps': round(len(rows) / elapsed, 1) if elapsed else 0,
+            'errors': errors,
+            'error_rate': round(errors / len(rows), 4) if rows else 0,
+            'throttled': throttled,
+            'throttle_rate': round(throttled / len(rows), 4) if rows else 0,
+            **{name: round(percentile(latencies, fraction), 1) if latencies else None
+               for name, fraction in [('p50', 0.5), ('p90', 0.9), ('p99', 0.99), ('max', 1.0)]},
+        }
+
+    by_endpoint = {}
+    for sample in samples:
+        by_endpoint.setdefault(sample[0], []).append(sample)
+    statuses = {}
+    for name, _, status, error in samples:
+        if error or status == 429:
+            key = f"{name} {status or 'failed'}"
+            statuses[key] = statuses.get(key, 0) + 1
+    return {
+        **stats(samples),
+        'endpoints': {name: stats(rows) for name, rows in sorted(by_endpoint.items())},
+        'error_statuses': statuses,
+    }
+
+
+def compare(report, baseline):
+    """Lines comparing the throughput, p90 and error rates of each concurrency level with a baseline report."""
+    before = {stage['concurrency']: stage for stage in baseline['stages']}
+    lines = []
+    for stage in report['stages']:
+        old = before.get(stage['concurrency'])
+        if old is None or not old['rps']:
+            continue
+        change = (stage['rps'] - old['rps']) / old['rps'] * 100
+        lines.append(
+            f"c={stage['concurrency']:<4} rps {old['rps']:>7} -> {stage['rps']:<7} ({change:+.1f}%)   "
+            f"p90 {old['p90']} -> {stage['p90']} ms   errors {old['error_rate']:.2%} -> {stage['error_rate']:.2%}   "
+            f"throttled {old.get('throttle_rate', 0):.2%} -> {stage.get('throttle_rate', 0):.2%}"
+        )
+    return lines
+
+
+def report_path(directory, commit):
+    return os.path.join(directory, f"{commit}.json")
@@ -0,0 +1,274 @@
+"""
+Housekeeping: orphaned media, abandoned chunked uploads, expired sessions and the database itself.
+
+collect_media() walks the media storage one directory listing at a time and
+checks every file against the set of names referenced by any FileField
+(plus the fields' defaults and the chunk folders of uploads still in
+progress), built in a single pass over those columns. Orphans are deleted,
+or moved under QUARANTINE/<date>/ to be deleted MEDIA_GC_QUARANTINE_DAYS
+later, in batches of MEDIA_GC_BATCH_SIZE. Right before acting on a batch,
+its names are looked up again, so a row saved while the walk ran keeps its
+file. Files younger than MEDIA_GC_GRACE_HOURS are left alone: an upload is
+written to storage before its row commits.
+
+optimize_database() runs ANALYZE and VACUUM on SQLite, VACUUM (ANALYZE) on
+PostgreSQL and OPTIMIZE TABLE on MySQL. clear_sessions() deletes expired
+sessions. Each returns what it reclaimed; see `manage.py maintenance`.
+"""
+
+import os
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db import DEFAULT_DB_ALIAS, connections, models
+from django.utils import timezone
+
+from .models import UploadSession
+
+QUARANTINE = '_quarantine'
+UPLOADS = 'uploads'
+
+
+# Helper Functions
+def file_fields():
+    """(model, field name) of every FileField (ImageField included) of every installed model."""
+    return [
+        (model, field.name)
+        for model in apps.get_models()
+        for field in model._meta.concrete_fields
+        if isinstance(field, models.FileField)
+    ]
+
+
+def default_names():
+    """Files the fields fall back to (e.g. the default profile picture): never orphans."""
+    names = set()
+    for model, name in file_fields():
+        default = model._meta.get_field(name).default
+        if isinstance(default, str) and default:
+            names.add(default)
+    return names
+
+
+def live_upload_prefixes():
+    """`uploads/<id>/` of every chunked upload that may still be resumed or assembled."""
+    return {f"{UPLOADS}/{session_id}/" for session_id in UploadSession.objects.values_list('id', flat=True)}
+
+
+def referenced_names():
+    """Every file name stored in any FileField column, in one pass over each column."""
+    names = default_names()
+    for model, field in file_fields():
+        rows = model._base_manager.exclude(**{field: ''}).exclude(**{f"{field}__isnull": True})
+        names.update(rows.values_list(field, flat=True).iterator(chunk_size=5000))
+    return names
+
+
+def referenced_among(names):
+    """The subset of `names` that some row (or a field default) references right now."""
+    names = set(names)
+    found = names & default_names()
+    for model, field in file_fields():
+        found.update(model._base_manager.filter(**{f"{field}__in": names}).values_list(field, flat=True))
+    return found
+
+
+def walk(storage, path='', skip=()):
+    """Every file name under `path`, one directory listing at a time, except under the `skip` directories."""
+    try:
+        directories, files = storage.listdir(path)
+    except FileNotFoundError:
+        return  # Nothing was ever stored there
+    for filename in files:
+        yield f"{path}/{filename}" if path else filename
+    for directory in directories:
+        directory = f"{path}/{directory}" if path else directory
+        if directory not in skip:
+            yield from walk(storage, directory, skip)
+
+
+def _size(storage, name):
+    try:
+        return storage.size(name)
+    except (OSError, NotImplementedError):
+        return 0
+
+
+def _younger_than(storage, name, cutoff):
+    try:
+        return storage.get_modified_time(name) > cutoff
+    except (OSError, NotImplementedError):
+        return True  # Can't tell: keep it
+
+
+def _quarantine(storage, name, day):
+    with storage.open(name) as source:
+        storage.save(f"{QUARANTINE}/{day}/{name}", source)
+    storage.delete(name)
+
+
+def purge_quarantine(storage=None, keep_days=None, dry_run=False):
+    """Delete the quarantine days older than `keep_days`. Returns (files, bytes)."""
+    storage = storage or default_storage
+    keep_days = getattr(settings, 'MEDIA_GC_QUARANTINE_DAYS', 30) if keep_days is None else keep_days
+    cutoff = (timezone.now() - timedelta(days=keep_days)).date().isoformat()
+    files = reclaimed = 0
+    try:
+        days = storage.listdir(QUARANTINE)[0]
+    except FileNotFoundError:
+        return 0, 0
+    for day in days:
+        if day >= cutoff:
+            continue  # ISO dates sort by date
+        for name in walk(storage, f"{QUARANTINE}/{day}"):
+            files += 1
+            reclaimed += _size(storage, name)
+            if not dry_run:
+                storage.delete(name)
+    return files, reclaimed
+
+
+def prune_empty_directories(storage):
+    """Remove the directories the deletions left empty (local file storage only; object stores have none)."""
+    if not isinstance(storage, FileSystemStorage) or not os.path.isdir(storage.location):
+        return 0
+    removed = 0
+    for dirpath, dirnames, filenames in os.walk(storage.location, topdown=False):
+        if dirpath != storage.location and not os.listdir(dirpath):
+            os.rmdir(dirpath)
+            removed += 1
+    return removed
+
+
+def expire_upload_sessions(max_age_hours=None, dry_run=False):
+    """
+    Delete chunked uploads untouched for `max_age_hours` (default
+    CHUNKED_UPLOAD_EXPIRY_HOURS) with their chunks: abandoned ones, failed
+    ones and finished ones alike. Returns the number of sessions.
+    """
+    max_age_hours = max_age_hours or getattr(settings, 'CHUNKED_UPLOAD_EXPIRY_HOURS', 24)
+    stale = UploadSession.objects.filter(updated_at__lt=timezone.now() - timedelta(hours=max_age_hours))
+    if dry_run:
+        return stale.count()
+    from .uploads import discard_chunks
+
+    expired = 0
+    for session in stale.iterator():
+        discard_chunks(session)
+        session.delete()
+        expired += 1
+    return expired
+
+
+def collect_media(storage=None, mode='quarantine', grace_hours=None, batch_size=None, log=None):
+    """
+    Find the media files nothing references and, unless `mode` is 'report',
+    delete them ('delete') or move them to the quarantine ('quarantine').
+    Returns a report; `log` is called with each orphan's name and size.
+    """
+    storage = storage or default_storage
+    grace_hours = getattr(settings, 'MEDIA_GC_GRACE_HOURS', 24) if grace_hours is None else grace_hours
+    batch_size = batch_size or getattr(settings, 'MEDIA_GC_BATCH_SIZE', 500)
+    cutoff = timezone.now() - timedelta(hours=grace_hours)
+    day = timezone.now().date().isoformat()
+
+    referenced = referenced_names()
+    uploads = live_upload_prefixes()
+    report = {'scanned': 0, 'referenced': 0, 'orphans': 0, 'recent': 0, 'removed': 0, 'bytes': 0}
+
+    def flush(batch):
+        if not batch:
+            return
+        kept = referenced_among(batch)  # Saved since the set was built
+        for name in batch:
+            if name in kept:
+                continue
+            size = _size(storage, name)
+            report['orphans'] += 1
+            report['bytes'] += size
+            if log:
+                log(name, size)
+            if mode == 'delete':
+                storage.delete(name)
+            elif mode == 'quarantine':
+                _quarantine(storage, name, day)
+            if mode != 'report':
+                report['removed'] += 1
+
+    batch = []
+    for name in walk(storage, skip={QUARANTINE}):
+        report['scanned'] += 1
+        if name in referenced or (name.startswith(f"{UPLOADS}/") and name[:name.rfind('/') + 1] in uploads):
+            report['referenced'] += 1
+            continue
+        if _younger_than(storage, name, cutoff):
+            report['recent'] += 1
+            continue
+        batch.append(name)
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    flush(batch)
+
+    if mode != 'report':
+        report['directories'] = prune_empty_directories(storage)
+    return report
+
+
+def database_size(using=DEFAULT_DB_ALIAS):
+    """Size of the database in bytes, or None where it can't be asked."""
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute('PRAGMA page_count')
+            pages = cursor.fetchone()[0]
+            cursor.execute('PRAGMA page_size')
+            return pages * cursor.fetchone()[0]
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT pg_database_size(current_database())')
+            return cursor.fetchone()[0]
+        if connection.vendor == 'mysql':
+            cursor.execute(
+                'SELECT SUM(data_length + index_length) FROM information_schema.tables WHERE table_schema = DATABASE()'
+            )
+            return int(cursor.fetchone()[0] or 0)
+    return None
+
+
+def optimize_database(using=DEFAULT_DB_ALIAS):
+    """
+    Refresh the planner statistics and give freed pages back. On SQLite
+    VACUUM rewrites the whole file (it needs as much free disk); PostgreSQL
+    gets a plain VACUUM, which doesn't lock the tables (VACUUM FULL would).
+    Must run outside a transaction. Returns (size before, size after).
+    """
+    connection = connections[using]
+    if connection.in_atomic_block:
+        raise RuntimeError("VACUUM can't run inside a transaction.")
+    before = database_size(using)
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute('ANALYZE')
+            cursor.execute('VACUUM')
+        elif connection.vendor == 'postgresql':
+            cursor.execute('VACUUM (ANALYZE)')
+        elif connection.vendor == 'mysql':
+            for table in connection.introspection.table_names(cursor):
+                cursor.execute(f'OPTIMIZE TABLE {connection.ops.quote_name(table)}')
+                cursor.fetchall()
+    return before, database_size(using)
+
+
+def clear_sessions(dry_run=False):
+    """Delete expired sessions. Returns how many there were (None for engines without a table)."""
+    from importlib import import_module
+
+    store = import_module(settings.SESSION_ENGINE).SessionStore
+    if not hasattr(store, 'get_model_class'):
+        return None  # Cache or cookie sessions expire on their own
+    expired = store.get_model_class().objects.filter(expire_date__lt=timezone.now()).count()
+    if not dry_run:
+        store.clear_expired()
+    return expired
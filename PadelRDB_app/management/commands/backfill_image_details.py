@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from PadelRDB_app.images import backfill
+
+
+class Command(BaseCommand):
+    help = "Compute the size and placeholder of every stored image that doesn't have them yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8, help="Images processed in parallel.")
+        parser.add_argument('--force', action='store_true', help="Recompute details that are already up to date.")
+
+    def handle(self, *args, **options):
+        updated, failed = backfill(workers=options['workers'], force=options['force'])
+        self.stdout.write(self.style.SUCCESS(f"Image details updated: {updated}, unreadable: {failed}."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from PadelRDB_app.rollups import backfill
+
+
+class Command(BaseCommand):
+    help = "Rebuild the weekly and monthly rating rollups from every existing review."
+
+    def handle(self, *args, **options):
+        written = backfill()
+        self.stdout.write(self.style.SUCCESS(f"Rating rollups rebuilt: {written} rows."))
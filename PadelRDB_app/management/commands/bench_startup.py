@@ -0,0 +1,127 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from PadelRDB_app.warmup import default_host
+
+# Runs in a fresh interpreter. "cold": load the app and serve like a worker
+# started without preload_app. "preload": load and warm up the app once, then
+# fork workers that serve their first requests, like gunicorn with preload_app.
+PROBE = r'''
+import gc, json, os, sys, time
+from wsgiref.util import setup_testing_defaults
+
+mode, path, host, runs = sys.argv[1], sys.argv[2], sys.argv[3], int(sys.argv[4])
+start = time.perf_counter()
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'PadelRDB.settings')
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+load_ms = (time.perf_counter() - start) * 1000
+
+
+def serve():
+    environ = {}
+    setup_testing_defaults(environ)
+    environ.update(PATH_INFO=path, HTTP_HOST=host, HTTP_X_FORWARDED_PROTO='https')
+    statuses = []
+    begin = time.perf_counter()
+    body = application(environ, lambda status, headers, exc_info=None: statuses.append(int(status[:3])))
+    for _ in body:
+        pass
+    if hasattr(body, 'close'):
+        body.close()
+    return (time.perf_counter() - begin) * 1000, statuses[0]
+
+
+def worker():
+    first_ms, status = serve()
+    second_ms, _ = serve()
+    return {'load_ms': load_ms, 'first_ms': first_ms, 'second_ms': second_ms, 'status': status}
+
+
+if mode == 'cold':
+    print(json.dumps(worker()))
+else:
+    from PadelRDB_app.warmup import warm_process
+    warm_process()
+    gc.freeze()
+    for _ in range(runs):
+        read, write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read)
+            os.write(write, json.dumps(worker()).encode())
+            os._exit(0)
+        os.close(write)
+        with os.fdopen(read) as pipe:
+            print(pipe.read())
+        os.waitpid(pid, 0)
+'''
+
+
+# Helper Functions
+def run_probe(mode, path, host, runs, importtime=False):
+    command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', PROBE, mode, path, host, str(runs)]
+    result = subprocess.run(command, cwd=settings.BASE_DIR, capture_output=True, text=True)
+    if result.returncode:
+        raise CommandError(f"Probe failed:\n{result.stderr[-2000:]}")
+    return [json.loads(line) for line in result.stdout.splitlines() if line.startswith('{')], result.stderr
+
+
+def import_totals(stderr):
+    """Self import time in ms per top-level package, from -X importtime output."""
+    totals = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        package = name.strip().split('.')[0]
+        totals[package] = totals.get(package, 0) + int(self_us) / 1000
+    return totals
+
+
+def summary(samples, key):
+    values = [sample[key] for sample in samples]
+    return f"median {statistics.median(values):.1f} ms (min {min(values):.1f}, max {max(values):.1f})"
+
+
+class Command(BaseCommand):
+    help = "Measure worker startup: import time and time to first response, cold and with preload_app."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/en/browse/', help="Path of the first request.")
+        parser.add_argument('--host', help="Host header. Default: the first ALLOWED_HOSTS entry.")
+        parser.add_argument('--runs', type=int, default=5, help="Workers to start per mode.")
+        parser.add_argument('--top', type=int, default=10, help="Packages to list in the import breakdown.")
+
+    def handle(self, *args, **options):
+        host = options['host'] or default_host()
+        path, runs = options['path'], options['runs']
+
+        cold = []
+        for _ in range(runs):
+            cold += run_probe('cold', path, host, 1)[0]
+        preloaded, _ = run_probe('preload', path, host, runs)
+
+        statuses = {sample['status'] for sample in cold + preloaded}
+        if statuses != {200}:
+            self.stderr.write(f"Warning: {path} answered {sorted(statuses)}; check --path and --host.")
+
+        self.stdout.write(f"Cold worker ({runs} runs, fresh interpreter each):")
+        self.stdout.write(f"  app import:      {summary(cold, 'load_ms')}")
+        self.stdout.write(f"  first response:  {summary(cold, 'first_ms')}")
+        self.stdout.write(f"  second response: {summary(cold, 'second_ms')}")
+        self.stdout.write(f"Preloaded worker ({runs} forks of one warm master):")
+        self.stdout.write(f"  first response:  {summary(preloaded, 'first_ms')}")
+        self.stdout.write(f"  second response: {summary(preloaded, 'second_ms')}")
+
+        _, stderr = run_probe('cold', path, host, 1, importtime=True)
+        totals = sorted(import_totals(stderr).items(), key=lambda item: item[1], reverse=True)
+        self.stdout.write("Import time by package (one cold worker, first request included):")
+        for package, ms in totals[:options['top']]:
+            self.stdout.write(f"  {package:<24} {ms:8.1f} ms")
@@ -0,0 +1,89 @@
+import re
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.template import RequestContext, engines
+from django.template.engine import Engine
+from django.test import RequestFactory
+
+from PadelRDB_app.models import Racket, Review
+from PadelRDB_app.scores import score_summary
+
+LOADERS = ['django.template.loaders.filesystem.Loader', 'django.template.loaders.app_directories.Loader']
+
+# The markup every {% score_bar %} replaced: a 10-iteration loop with a filter and a comparison per segment
+INLINE_BAR = (
+    '<div class="rating-bar">{%% for i in "1234567890"|make_list %%}'
+    '<div class="bar {%% if forloop.counter <= %s|default:0 %%} filled {%% endif %%}"></div>'
+    '{%% endfor %%}</div>'
+)
+
+
+# Helper Functions
+def racket_detail_context(racket):
+    """The racket_detail view's context, with every query already evaluated."""
+    scores = score_summary([racket.id])[racket.id]
+    comments = list(Review.objects.filter(racket=racket).select_related('user').order_by('-created_at'))
+    return {
+        'racket': racket,
+        'user_scores': scores['regular'],
+        'expert_scores': scores['expert'],
+        'comments': comments,
+        'latest_comment': comments[0] if comments else None,
+    }
+
+
+def inline_bars(source):
+    """racket_detail.html as it was before the score_bar tag."""
+    return re.sub(r'{%\s*score_bar\s+(\S+)\s*%}', lambda match: INLINE_BAR % match.group(1), source)
+
+
+class Command(BaseCommand):
+    help = (
+        "Time racket_detail.html renders (no database time): with and without the cached template loader, "
+        "and with the score_bar tag against the inline bar markup it replaced."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--racket', help="Slug of the racket to render. Default: the first one.")
+        parser.add_argument('--iterations', type=int, default=200)
+
+    def handle(self, *args, **options):
+        rackets = Racket.objects.select_related('brand').prefetch_related('store_links', 'videos')
+        racket = rackets.filter(slug=options['racket']).first() if options['racket'] else rackets.first()
+        if racket is None:
+            raise CommandError("No racket to render.")
+
+        request = RequestFactory().get(f'/browse/{racket.brand.name}/{racket.slug}/')
+        request.user = AnonymousUser()
+        context = racket_detail_context(racket)
+
+        configured = engines['django'].engine
+        shared = dict(
+            dirs=configured.dirs, context_processors=configured.context_processors,
+            libraries=configured.libraries, debug=False,
+        )
+        variants = [
+            ('uncached loader', Engine(loaders=LOADERS, **shared)),
+            ('cached loader', Engine(loaders=[('django.template.loaders.cached.Loader', LOADERS)], **shared)),
+        ]
+
+        for label, engine in variants:
+            self._time(f"racket_detail.html, {label}", lambda: engine.get_template('racket_detail.html'),
+                       request, context, options['iterations'])
+
+        # Both compiled once, so only the bars differ
+        engine = variants[1][1]
+        source = engine.find_template('racket_detail.html')[0].source
+        for label, template in [('inline bar markup', engine.from_string(inline_bars(source))),
+                                ('score_bar tag', engine.from_string(source))]:
+            self._time(f"racket_detail.html, {label}", lambda: template, request, context, options['iterations'])
+
+    def _time(self, label, get_template, request, context, iterations):
+        get_template().render(RequestContext(request, context))  # Warm up
+        start = time.perf_counter()
+        for _ in range(iterations):
+            get_template().render(RequestContext(request, context))
+        elapsed = (time.perf_counter() - start) / iterations
+        self.stdout.write(f"{label}: {elapsed * 1000:.2f} ms per render")
@@ -0,0 +1,35 @@
+import asyncio
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from PadelRDB_app.crawler import crawl, links_to_check, record
+
+
+class Command(BaseCommand):
+    help = "Check every store link concurrently, hide dead ones and record the prices found (run daily)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stale-after', type=float, default=20,
+                            help="Only links not checked in this many hours. 0 checks every link.")
+        parser.add_argument('--retailer', help="Only links of this retailer key.")
+        parser.add_argument('--per-host', type=int, default=2, help="Concurrent requests per host.")
+        parser.add_argument('--concurrency', type=int, default=20, help="Concurrent requests overall.")
+        parser.add_argument('--delay', type=float, default=1.0,
+                            help="Minimum seconds between requests to one host (robots.txt Crawl-delay wins if longer).")
+        parser.add_argument('--timeout', type=float, default=10.0, help="Seconds before a request is abandoned.")
+
+    def handle(self, *args, **options):
+        stale_after = timedelta(hours=options['stale_after']) if options['stale_after'] else None
+        links = links_to_check(stale_after, options['retailer'])
+        results = asyncio.run(crawl(
+            links, per_host=options['per_host'], concurrency=options['concurrency'],
+            timeout=options['timeout'], delay=options['delay'],
+        ))
+        for result in results:
+            if result['error'] and options['verbosity'] > 1:
+                self.stderr.write(f"Link {result['id']}: {result['error']}")
+        counts = record(results)
+        self.stdout.write(self.style.SUCCESS(
+            f"Checked {len(links)} links: " + ", ".join(f"{count} {outcome}" for outcome, count in counts.items())
+        ))
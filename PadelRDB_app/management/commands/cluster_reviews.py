@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from PadelRDB_app.duplicates import clusters, normalize, rebuild_index
+from PadelRDB_app.models import Review
+
+
+class Command(BaseCommand):
+    help = (
+        "Group existing reviews whose comments are near-duplicates (MinHash LSH, see duplicates.py), "
+        "largest group first, for moderation."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true',
+                            help="Recompute every review's LSH buckets first (after bulk imports or a parameter change).")
+        parser.add_argument('--similarity', type=float, help="Jaccard threshold. Default: REVIEW_DUPLICATE_SIMILARITY.")
+        parser.add_argument('--min-size', type=int, default=3, help="Smallest group to report.")
+        parser.add_argument('--limit', type=int, default=20, help="Groups to print.")
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            self.stdout.write(f"Indexed {rebuild_index()} comments.")
+
+        groups = clusters(options['similarity'], options['min_size'])
+        self.stdout.write(f"{len(groups)} group{'s' if len(groups) != 1 else ''} of {options['min_size']}+ near-duplicate reviews.")
+        for ids in groups[:options['limit']]:
+            reviews = list(Review.objects.filter(pk__in=ids).select_related('user', 'racket').order_by('created_at'))
+            users = {review.user.username for review in reviews}
+            rackets = {review.racket.name for review in reviews}
+            self.stdout.write(self.style.WARNING(
+                f"\n{len(reviews)} reviews by {len(users)} user{'s' if len(users) != 1 else ''} "
+                f"on {len(rackets)} racket{'s' if len(rackets) != 1 else ''}: \"{normalize(reviews[0].comment)[:100]}\""
+            ))
+            for review in reviews:
+                self.stdout.write(f"  #{review.pk} {review.created_at:%Y-%m-%d} {review.user.username} on {review.racket.name}")
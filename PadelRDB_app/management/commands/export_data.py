@@ -0,0 +1,38 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from PadelRDB_app.exports import export_stream, parse_day
+
+
+class Command(BaseCommand):
+    help = "Stream reviews or the racket catalog as CSV or NDJSON (optionally gzipped) to a file or stdout."
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=['reviews', 'rackets'])
+        parser.add_argument('--format', choices=['csv', 'ndjson'], default='csv')
+        parser.add_argument('--output', help="File to write to. Default: stdout.")
+        parser.add_argument('--gzip', action='store_true', help="Compress the output with gzip.")
+        parser.add_argument('--since', help="Only reviews created on or after this day (YYYY-MM-DD).")
+        parser.add_argument('--until', help="Only reviews created on or before this day (YYYY-MM-DD).")
+        parser.add_argument('--brand', help="Only rackets of this brand.")
+
+    def handle(self, *args, **options):
+        try:
+            since = parse_day(options['since'])
+            until = parse_day(options['until'])
+        except ValueError:
+            raise CommandError("Dates must be YYYY-MM-DD.")
+
+        chunks = export_stream(
+            options['dataset'], options['format'], options['gzip'], since, until, options['brand'],
+        )
+        output = open(options['output'], 'wb') if options['output'] else sys.stdout.buffer
+        try:
+            for chunk in chunks:
+                output.write(chunk)
+        finally:
+            if options['output']:
+                output.close()
+            else:
+                output.flush()
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from PadelRDB_app.prerender import export
+
+
+class Command(BaseCommand):
+    help = (
+        "Pre-render browse, all rackets, every brand page and every racket page in every language, plus a "
+        "sitemap, into a static directory for a CDN. Only pages whose data changed since the last export are "
+        "rendered again unless --full is given (needed after template or code changes)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help="Directory to write. Default: STATIC_EXPORT_ROOT.")
+        parser.add_argument('--full', action='store_true', help="Render every page again.")
+        parser.add_argument('--workers', type=int, help="Rendering processes. Default: STATIC_EXPORT_WORKERS.")
+        parser.add_argument('--host', help="Host header to render with. Default: the first ALLOWED_HOSTS entry.")
+        parser.add_argument('--base-url', help="Origin of the sitemap URLs. Default: https://<host>.")
+        parser.add_argument('--language', action='append', dest='languages',
+                            help="Only this language prefix (repeatable). Default: every language with a catalog.")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        report = export(output=options['output'], full=options['full'], workers=options['workers'],
+                        host=options['host'], base_url=options['base_url'], languages=options['languages'])
+        self.stdout.write(
+            f"{report['rendered']} of {report['pages']} pages rendered ({', '.join(report['languages'])}), "
+            f"{report['written']} written, {report['removed']} removed, in {time.perf_counter() - start:.1f}s "
+            f"into {report['output']}."
+        )
+        for path, status in report['failed']:
+            self.stderr.write(f"  {path}: {status or 'exception'}")
+        if report['failed']:
+            raise CommandError(f"{len(report['failed'])} pages could not be rendered; their previous copies are kept.")
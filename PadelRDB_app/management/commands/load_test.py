@@ -0,0 +1,178 @@
+import asyncio
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from PadelRDB_app.loadtest import TRAFFIC_MIX, OEmbedStandIn, compare, report_path, run_stage, summarize
+
+
+# Helper Functions
+def git_commit():
+    """Short hash of HEAD, with '-dirty' when tracked files have uncommitted changes."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=settings.BASE_DIR,
+                               capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+    return f"{commit}-dirty" if dirty else commit
+
+
+def wait_ready(base_url, timeout):
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/readyz", timeout=2).status_code == 200:
+                return True
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    return False
+
+
+def stop(process):
+    if process.poll() is None:
+        process.terminate()
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+class Command(BaseCommand):
+    help = (
+        "Boot the app under gunicorn on a seeded throwaway database, with a local oEmbed stand-in and a "
+        "run_jobs worker, replay the production traffic mix at increasing concurrency and report "
+        "throughput, latency percentiles and error rates. Reports are saved per commit for comparison."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', default='1,4,16,32', help="Comma-separated virtual user counts, one stage each.")
+        parser.add_argument('--duration', type=float, default=30, help="Seconds per stage.")
+        parser.add_argument('--scale', type=float, default=1.0, help="Dataset size (see seed_load_data).")
+        parser.add_argument('--workers', type=int, default=2, help="Gunicorn workers (WEB_CONCURRENCY).")
+        parser.add_argument('--threads', type=int, help="Threads per worker. Default: gunicorn.conf.py's.")
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--oembed-latency', type=float, default=0.15, help="Seconds the oEmbed stand-in takes.")
+        parser.add_argument('--data-dir', help="Keep the seeded database here and reuse it on later runs.")
+        parser.add_argument('--output', default=os.path.join(settings.BASE_DIR, 'loadtest-reports'),
+                            help="Directory for the <commit>.json reports.")
+        parser.add_argument('--baseline', help="Report file, or commit of a report in --output, to compare with.")
+
+    def handle(self, *args, **options):
+        levels = [int(level) for level in options['concurrency'].split(',') if level.strip()]
+        baseline = self.load_baseline(options)
+        data_dir = options['data_dir'] or tempfile.mkdtemp(prefix='padelrdb-loadtest-')
+        os.makedirs(data_dir, exist_ok=True)
+        base_url = f"http://127.0.0.1:{options['port']}"
+
+        with OEmbedStandIn(options['oembed_latency']) as oembed:
+            env = {
+                **os.environ,
+                'DJANGO_SETTINGS_MODULE': 'PadelRDB.settings_loadtest',
+                'LOADTEST_DIR': data_dir,
+                'YOUTUBE_OEMBED_URL': oembed.url,
+                'PORT': str(options['port']),
+                'WEB_CONCURRENCY': str(options['workers']),
+            }
+            if options['threads']:
+                env['GUNICORN_THREADS'] = str(options['threads'])
+
+            catalog_file = os.path.join(data_dir, 'catalog.json')
+            if not os.path.exists(catalog_file):
+                self.stdout.write(f"Seeding {data_dir} at scale {options['scale']}...")
+                for command in (['migrate', '--noinput', '-v0'], ['seed_load_data', '--scale', str(options['scale'])]):
+                    subprocess.run([sys.executable, 'manage.py', *command], cwd=settings.BASE_DIR, env=env, check=True)
+            with open(catalog_file) as file:
+                catalog = json.load(file)
+
+            logs = {name: open(os.path.join(data_dir, f"{name}.log"), 'a') for name in ('gunicorn', 'jobs')}
+            processes = [
+                subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'PadelRDB.wsgi:application'],
+                                 cwd=settings.BASE_DIR, env=env, stdout=logs['gunicorn'], stderr=subprocess.STDOUT),
+                subprocess.Popen([sys.executable, 'manage.py', 'run_jobs'],
+                                 cwd=settings.BASE_DIR, env=env, stdout=logs['jobs'], stderr=subprocess.STDOUT),
+            ]
+            try:
+                if not wait_ready(base_url, timeout=120):
+                    raise CommandError(f"The app never became ready; see {data_dir}/gunicorn.log.")
+                stages = []
+                for concurrency in levels:
+                    samples, elapsed, login_failures = asyncio.run(
+                        run_stage(base_url, catalog, concurrency, options['duration'])
+                    )
+                    stage = {'concurrency': concurrency, 'seconds': round(elapsed, 1),
+                             'login_failures': login_failures, **summarize(samples, elapsed)}
+                    stages.append(stage)
+                    self.stdout.write(
+                        f"c={concurrency:<4} {stage['rps']:>8} req/s  p50 {stage['p50']} ms  p90 {stage['p90']} ms  "
+                        f"p99 {stage['p99']} ms  errors {stage['error_rate']:.2%}  throttled {stage['throttle_rate']:.2%} "
+                        f"of {stage['requests']}"
+                    )
+            finally:
+                for process in processes:
+                    stop(process)
+                for log in logs.values():
+                    log.close()
+
+        report = {
+            'commit': git_commit(),
+            'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'machine': {'cpus': os.cpu_count(), 'python': platform.python_version(), 'platform': platform.platform()},
+            'options': {key: options[key] for key in ('duration', 'scale', 'workers', 'threads', 'oembed_latency')},
+            'dataset': catalog['counts'],
+            'traffic_mix': {name: share for name, share, member in TRAFFIC_MIX},
+            'stages': stages,
+        }
+        self.write_report(report, options['output'])
+        self.print_details(stages[-1] if stages else None)
+        if baseline:
+            self.stdout.write(f"Compared with {baseline['commit']} ({baseline['date']}):")
+            for line in compare(report, baseline):
+                self.stdout.write(f"  {line}")
+
+        if not options['data_dir']:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    def load_baseline(self, options):
+        if not options['baseline']:
+            return None
+        path = options['baseline']
+        if not os.path.exists(path):
+            path = report_path(options['output'], options['baseline'])
+        try:
+            with open(path) as file:
+                return json.load(file)
+        except (OSError, ValueError) as error:
+            raise CommandError(f"Cannot read the baseline report {path}: {error}")
+
+    def write_report(self, report, directory):
+        os.makedirs(directory, exist_ok=True)
+        path = report_path(directory, report['commit'])
+        with open(path, 'w') as file:
+            json.dump(report, file, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Report written to {path}"))
+
+    def print_details(self, stage):
+        if stage is None:
+            return
+        self.stdout.write(f"Endpoints at c={stage['concurrency']}:")
+        for name, row in stage['endpoints'].items():
+            self.stdout.write(
+                f"  {name:<22} {row['requests']:>7} req  p50 {row['p50']} ms  p90 {row['p90']} ms  "
+                f"p99 {row['p99']} ms  errors {row['error_rate']:.2%}  throttled {row['throttle_rate']:.2%}"
+            )
+        for key, count in sorted(stage['error_statuses'].items()):
+            self.stdout.write(f"  {'throttled' if key.endswith(' 429') else 'error'}: {key} x{count}")
@@ -0,0 +1,72 @@
+from django.core.management.base import BaseCommand
+from django.template.defaultfilters import filesizeformat
+
+from PadelRDB_app.maintenance import (
+    clear_sessions, collect_media, expire_upload_sessions, optimize_database, purge_quarantine,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Housekeeping (see maintenance.py): quarantine or delete media files nothing references, drop abandoned "
+        "chunked uploads and expired sessions, then VACUUM/ANALYZE the database. Meant for a daily cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=['report', 'quarantine', 'delete'], default='quarantine',
+                            help="What to do with orphaned media: list it, move it to the quarantine (default) "
+                                 "or delete it.")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Change nothing: report orphans, stale uploads and expired sessions only.")
+        parser.add_argument('--grace-hours', type=float,
+                            help="Leave files younger than this alone. Default: MEDIA_GC_GRACE_HOURS.")
+        parser.add_argument('--batch-size', type=int, help="Orphans re-checked and removed at a time.")
+        parser.add_argument('--verbose-files', action='store_true', help="Print every orphan.")
+        parser.add_argument('--skip-media', action='store_true')
+        parser.add_argument('--skip-sessions', action='store_true')
+        parser.add_argument('--skip-database', action='store_true', help="No VACUUM/ANALYZE.")
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        mode = 'report' if dry_run else options['mode']
+        verb = 'would be' if dry_run else 'were'
+
+        if not options['skip_media']:
+            uploads = expire_upload_sessions(dry_run=dry_run)
+            self.stdout.write(f"{uploads} abandoned upload{'s' if uploads != 1 else ''} {verb} removed.")
+
+            files, reclaimed = purge_quarantine(dry_run=dry_run)
+            if files:
+                self.stdout.write(f"{files} quarantined file{'s' if files != 1 else ''} past their time {verb} "
+                                  f"deleted ({filesizeformat(reclaimed)}).")
+
+            log = (lambda name, size: self.stdout.write(f"  {name} ({filesizeformat(size)})")) \
+                if options['verbose_files'] else None
+            report = collect_media(mode=mode, grace_hours=options['grace_hours'],
+                                   batch_size=options['batch_size'], log=log)
+            self.stdout.write(
+                f"Media: {report['scanned']} files scanned, {report['referenced']} referenced, "
+                f"{report['recent']} too recent to judge, {report['orphans']} orphaned "
+                f"({filesizeformat(report['bytes'])})."
+            )
+            if mode == 'delete':
+                self.stdout.write(self.style.SUCCESS(f"Deleted {report['removed']} orphans, "
+                                                     f"{filesizeformat(report['bytes'])} reclaimed."))
+            elif mode == 'quarantine':
+                self.stdout.write(self.style.SUCCESS(f"Moved {report['removed']} orphans to the quarantine; "
+                                                     f"their space is reclaimed when it is purged."))
+
+        if not options['skip_sessions']:
+            expired = clear_sessions(dry_run=dry_run)
+            if expired is not None:
+                self.stdout.write(f"{expired} expired session{'s' if expired != 1 else ''} {verb} deleted.")
+
+        if not options['skip_database'] and not dry_run:
+            before, after = optimize_database()
+            if before is None:
+                self.stdout.write("Database optimized.")
+            else:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Database optimized: {filesizeformat(before)} -> {filesizeformat(after)} "
+                    f"({filesizeformat(max(before - after, 0))} reclaimed)."
+                ))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from PadelRDB_app.leaderboards import rebuild_all
+
+
+class Command(BaseCommand):
+    help = "Recompute every attribute leaderboard from scratch (run nightly; review writes update incrementally)."
+
+    def handle(self, *args, **options):
+        written = rebuild_all()
+        self.stdout.write(self.style.SUCCESS(f"Leaderboards rebuilt: {written} rows."))
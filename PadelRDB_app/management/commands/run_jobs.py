@@ -0,0 +1,73 @@
+import os
+import signal
+import socket
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from PadelRDB_app.jobs import claim_next, purge_finished, requeue_stale, run_job
+
+
+class Command(BaseCommand):
+    help = "Run the background job worker (database-backed, no external broker)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queue', action='append', dest='queues',
+                            help="Only run jobs from this queue (repeatable). Default: all queues.")
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help="Seconds to sleep when no job is ready.")
+        parser.add_argument('--stale-after', type=int, default=600,
+                            help="Requeue jobs locked by a dead worker for longer than this many seconds.")
+        parser.add_argument('--keep-finished', type=int, default=7 * 24 * 3600,
+                            help="Delete done/failed jobs older than this many seconds.")
+        parser.add_argument('--burst', action='store_true',
+                            help="Exit once no job is ready instead of polling forever.")
+
+    def handle(self, *args, **options):
+        worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        self.stdout.write(f"Worker {worker_id} started")
+        last_maintenance = 0
+        last_session_cleanup = 0
+        last_session_flush = 0
+        while not self.stopping:
+            close_old_connections()
+
+            if time.monotonic() - last_maintenance > 60:
+                requeue_stale(options['stale_after'])
+                purge_finished(options['keep_finished'])
+                last_maintenance = time.monotonic()
+
+            session_store = import_module(settings.SESSION_ENGINE).SessionStore
+            if hasattr(session_store, 'flush_dirty') and \
+                    time.monotonic() - last_session_flush > getattr(settings, 'SESSION_WRITE_BEHIND_DELAY', 0):
+                # Sessions written to the cache only (see sessions.py) reach the database here
+                session_store.flush_dirty()
+                last_session_flush = time.monotonic()
+
+            if time.monotonic() - last_session_cleanup > getattr(settings, 'SESSION_CLEANUP_INTERVAL', 3600):
+                # Expired sessions are never read again; without this the table only grows
+                session_store.clear_expired()
+                last_session_cleanup = time.monotonic()
+
+            job = claim_next(worker_id, options['queues'])
+            if job is None:
+                if options['burst']:
+                    break
+                time.sleep(options['poll_interval'])
+                continue
+
+            ok = run_job(job)
+            self.stdout.write(f"{'done' if ok else 'failed'}: {job.task} #{job.pk} (attempt {job.attempts})")
+
+        self.stdout.write(f"Worker {worker_id} stopped")
+
+    def _stop(self, signum, frame):
+        # Finish the current job, then exit
+        self.stopping = True
@@ -0,0 +1,34 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from PadelRDB_app.loadtest import SCALE_1, seed
+from PadelRDB_app.models import Brand
+
+
+class Command(BaseCommand):
+    help = (
+        f"Fill the load-test database with a scaled dataset (scale 1: {SCALE_1['brands']} brands, "
+        f"{SCALE_1['brands'] * SCALE_1['rackets_per_brand']} rackets, {SCALE_1['users']} users, "
+        f"{SCALE_1['users'] * SCALE_1['reviews_per_user']} reviews) and write catalog.json. "
+        "Only runs with --settings=PadelRDB.settings_loadtest; load_test calls it for you."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1.0)
+        parser.add_argument('--seed', type=int, default=1, help="Random seed: the same seed gives the same dataset.")
+
+    def handle(self, *args, **options):
+        directory = getattr(settings, 'LOADTEST_DIR', None)
+        if directory is None:
+            raise CommandError("Refusing to seed this database: run with --settings=PadelRDB.settings_loadtest.")
+        if Brand.objects.exists():
+            raise CommandError(f"The load-test database in {directory} already has data.")
+
+        catalog = seed(options['scale'], options['seed'])
+        with open(os.path.join(directory, 'catalog.json'), 'w') as file:
+            json.dump(catalog, file)
+        counts = ', '.join(f"{key} {value}" for key, value in catalog['counts'].items())
+        self.stdout.write(self.style.SUCCESS(f"Seeded {directory} ({counts})."))
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from PadelRDB_app.recommendations import train
+
+
+class Command(BaseCommand):
+    help = (
+        "Factorize the user x racket ratings with ALS and store the model behind \"Recommended for you\" "
+        "(run nightly; review writes are folded in incrementally in between)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--factors', type=int, help="Latent factors per user and racket. Default: RECOMMENDER_FACTORS.")
+        parser.add_argument('--iterations', type=int, help="ALS sweeps. Default: RECOMMENDER_ITERATIONS.")
+        parser.add_argument('--reg', type=float, help="Regularization. Default: RECOMMENDER_REGULARIZATION.")
+        parser.add_argument('--incremental', action='store_true',
+                            help="Only refresh the users and rackets whose reviews changed since the latest model.")
+        parser.add_argument('--seed', type=int, default=0, help="Seed of the initial racket factors.")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        model = train(factors=options['factors'], iterations=options['iterations'], reg=options['reg'],
+                      incremental=options['incremental'], seed=options['seed'])
+        if model is None:
+            self.stdout.write("No reviews yet: new users get popular rackets until there are.")
+            return
+        users = len(model.user_ids) // 8
+        rackets = len(model.racket_ids) // 8
+        self.stdout.write(self.style.SUCCESS(
+            f"Trained {model} on {model.review_count} reviews: {users} users, {rackets} rackets, "
+            f"RMSE {model.rmse if model.rmse is None else round(model.rmse, 3)}, {time.perf_counter() - start:.1f}s."
+        ))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from PadelRDB_app.warmup import warm_pages, warm_up, warmup_paths
+
+
+class Command(BaseCommand):
+    help = (
+        "Compile templates and request browse, every brand page, the most-reviewed rackets and the catalog "
+        "JSON endpoints, printing the status and time of each. Gunicorn runs the same warm-up in every "
+        "process (gunicorn.conf.py); run this after a deploy to check those pages and warm the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rackets', type=int, help="Racket pages to request. Default: settings.WARMUP_RACKETS.")
+        parser.add_argument('--workers', type=int, help="Parallel requests. Default: settings.WARMUP_WORKERS.")
+        parser.add_argument('--host', help="Host header. Default: the first ALLOWED_HOSTS entry.")
+
+    def handle(self, *args, **options):
+        loaded = warm_up()
+        self.stdout.write(
+            f"{loaded['urls']} URLs, {loaded['templates']} templates, languages {', '.join(loaded['languages'])}"
+        )
+        for failure in loaded['failed']:
+            self.stderr.write(f"Template failed to compile: {failure}")
+
+        pages = warm_pages(warmup_paths(options['rackets']), options['workers'], options['host'])
+        for path, status, ms in pages:
+            line = f"{status or 'error':>5} {ms:8.1f} ms  {path}"
+            if status and status < 500:
+                self.stdout.write(line)
+            else:
+                self.stderr.write(line)
+        self.stdout.write(f"Warmed {len(pages)} pages in {sum(ms for _, _, ms in pages) / 1000:.2f} s of request time.")
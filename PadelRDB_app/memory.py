@@ -0,0 +1,189 @@
+"""
+Per-worker memory instrumentation.
+
+MemoryMiddleware reads the worker's RSS around every request and keeps, per
+URL name, the number of requests and how much RSS grew while they ran. With
+MEMORY_TRACEMALLOC on, tracemalloc also runs: every MEMORY_SNAPSHOT_INTERVAL
+seconds a snapshot is diffed against the previous one, and a
+MEMORY_SAMPLE_RATE fraction of requests is bracketed by snapshots to record
+the top allocations that request left behind under its URL name.
+/staff/memory/ shows all of it for the worker that answers (the pid is in
+the response). In a threaded worker, concurrent requests share the
+process, so the per-URL numbers are indicative rather than exact.
+
+With MEMORY_MAX_RSS_MB set, a worker that ends a request above the ceiling
+logs why and asks gunicorn to recycle it gracefully (see post_worker_init in
+gunicorn.conf.py); in-flight requests finish first.
+"""
+
+import logging
+import os
+import random
+import resource
+import threading
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+from django.views.decorators.cache import never_cache
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+TOP_ALLOCATIONS = 15
+
+_lock = threading.Lock()
+_state = {
+    'started': time.time(),
+    'requests': 0,
+    'by_url': {},  # URL name -> {'requests', 'rss_growth_kb', 'max_growth_kb', 'top_allocations', 'top_at'}
+    'history': [],  # Periodic {'at', 'rss_kb', 'traced_kb'}, newest last
+    'snapshot': None,  # Last periodic tracemalloc snapshot
+    'snapshot_at': 0.0,
+    'diff': [],  # Top lines of the last periodic diff
+    'recycle': None,  # Set by init_worker() under gunicorn: stops the worker gracefully
+    'recycling': False,
+}
+
+
+# Helper Functions
+def rss_kb():
+    """Current resident set size in KB (peak RSS where /proc is unavailable)."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * PAGE_SIZE // 1024
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # KB on Linux; an upper bound elsewhere
+
+
+def _top(statistics):
+    return [
+        {'where': str(stat.traceback[0]), 'size_kb': round(stat.size_diff / 1024, 1), 'count': stat.count_diff}
+        for stat in statistics[:TOP_ALLOCATIONS] if stat.size_diff > 0
+    ]
+
+
+def _snapshot():
+    return tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+    ])
+
+
+def periodic_snapshot(force=False):
+    """Record RSS (and diff tracemalloc against the last snapshot) when the interval has passed."""
+    now = time.time()
+    interval = getattr(settings, 'MEMORY_SNAPSHOT_INTERVAL', 300)
+    with _lock:
+        if not force and now - _state['snapshot_at'] < interval:
+            return
+        _state['snapshot_at'] = now
+    entry = {'at': now, 'rss_kb': rss_kb(), 'traced_kb': None}
+    snapshot = None
+    if tracemalloc.is_tracing():
+        snapshot = _snapshot()
+        entry['traced_kb'] = tracemalloc.get_traced_memory()[0] // 1024
+    with _lock:
+        if snapshot is not None:
+            if _state['snapshot'] is not None:
+                _state['diff'] = _top(snapshot.compare_to(_state['snapshot'], 'lineno'))
+            _state['snapshot'] = snapshot
+        _state['history'] = (_state['history'] + [entry])[-getattr(settings, 'MEMORY_HISTORY', 48):]
+
+
+def init_worker(recycle):
+    """
+    Called by gunicorn in each new worker: start this worker's numbers from
+    zero (a preloaded master's warm-up is not the worker's) and register the
+    callable that stops it gracefully when it crosses the ceiling.
+    """
+    with _lock:
+        _state.update(started=time.time(), requests=0, by_url={}, history=[], snapshot=None, snapshot_at=0.0,
+                      diff=[], recycle=recycle, recycling=False)
+
+
+def check_ceiling(url_name):
+    ceiling = getattr(settings, 'MEMORY_MAX_RSS_MB', None)
+    if not ceiling or _state['recycle'] is None or _state['recycling']:
+        return  # Only gunicorn workers are recycled
+    rss = rss_kb()
+    if rss <= ceiling * 1024:
+        return
+    with _lock:
+        if _state['recycling']:
+            return
+        _state['recycling'] = True
+        growth = sorted(_state['by_url'].items(), key=lambda item: item[1]['rss_growth_kb'], reverse=True)[:3]
+    logger.warning(
+        "Worker %s over the memory ceiling: RSS %s MB > %s MB after %s requests (last: %s; most growth: %s). "
+        "Recycling gracefully.",
+        os.getpid(), rss // 1024, ceiling, _state['requests'], url_name,
+        ', '.join(f"{name} +{stats['rss_growth_kb'] // 1024} MB" for name, stats in growth) or '-',
+    )
+    _state['recycle']()
+
+
+def status():
+    with _lock:
+        by_url = {name: dict(stats) for name, stats in _state['by_url'].items()}
+        history, diff = list(_state['history']), list(_state['diff'])
+    return {
+        'pid': os.getpid(),
+        'rss_kb': rss_kb(),
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'uptime_s': round(time.time() - _state['started']),
+        'requests': _state['requests'],
+        'ceiling_mb': getattr(settings, 'MEMORY_MAX_RSS_MB', None),
+        'tracemalloc': tracemalloc.is_tracing(),
+        'traced_kb': tracemalloc.get_traced_memory()[0] // 1024 if tracemalloc.is_tracing() else None,
+        'by_url': dict(sorted(by_url.items(), key=lambda item: item[1]['rss_growth_kb'], reverse=True)),
+        'history': history,
+        'last_diff': diff,
+    }
+
+
+class MemoryMiddleware:
+    """Per-URL RSS growth, sampled allocation diffs and the memory ceiling (see module docstring)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if getattr(settings, 'MEMORY_TRACEMALLOC', False) and not tracemalloc.is_tracing():
+            tracemalloc.start(getattr(settings, 'MEMORY_TRACEMALLOC_FRAMES', 1))
+
+    def __call__(self, request):
+        sample = tracemalloc.is_tracing() and random.random() < getattr(settings, 'MEMORY_SAMPLE_RATE', 0.01)
+        before = _snapshot() if sample else None
+        rss_before = rss_kb()
+
+        response = self.get_response(request)
+
+        growth = rss_kb() - rss_before
+        match = getattr(request, 'resolver_match', None)
+        url_name = match.view_name if match else '<unresolved>'
+        top = _top(_snapshot().compare_to(before, 'lineno')) if sample else None
+        with _lock:
+            _state['requests'] += 1
+            stats = _state['by_url'].setdefault(
+                url_name, {'requests': 0, 'rss_growth_kb': 0, 'max_growth_kb': 0, 'top_allocations': [], 'top_at': None},
+            )
+            stats['requests'] += 1
+            stats['rss_growth_kb'] += max(growth, 0)
+            stats['max_growth_kb'] = max(stats['max_growth_kb'], growth)
+            if top is not None:
+                stats['top_allocations'], stats['top_at'] = top, time.time()
+
+        periodic_snapshot()
+        check_ceiling(url_name)
+        return response
+
+
+# Views
+@never_cache
+@staff_member_required
+def memory_status(request):
+    """This worker's memory: ?snapshot=1 takes a periodic snapshot (and diff) now."""
+    if request.GET.get('snapshot'):
+        periodic_snapshot(force=True)
+    return JsonResponse(status())
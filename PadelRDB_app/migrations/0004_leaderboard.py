@@ -0,0 +1,33 @@
+# Generated by Django 5.1.6 on 2026-10-19 12:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PadelRDB_app', '0003_job_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attribute', models.CharField(max_length=20)),
+                ('user_type', models.CharField(choices=[('regular', 'Regular Player'), ('expert', 'Expert Player')], max_length=10)),
+                ('rank', models.PositiveIntegerField()),
+                ('score', models.FloatField()),
+                ('average', models.FloatField()),
+                ('review_count', models.PositiveIntegerField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('racket', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to='PadelRDB_app.racket')),
+            ],
+            options={
+                'ordering': ['attribute', 'user_type', 'rank'],
+                'indexes': [models.Index(fields=['attribute', 'user_type', 'rank'], name='leaderboard_rank_idx')],
+                'constraints': [models.UniqueConstraint(fields=('attribute', 'user_type', 'racket'), name='unique_leaderboard_entry')],
+            },
+        ),
+    ]
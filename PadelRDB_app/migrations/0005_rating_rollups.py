@@ -0,0 +1,47 @@
+# Generated by Django 5.1.6 on 2026-10-19 12:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PadelRDB_app', '0004_leaderboard'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RatingRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_type', models.CharField(choices=[('regular', 'Regular Player'), ('expert', 'Expert Player')], max_length=10)),
+                ('period', models.CharField(choices=[('week', 'Week'), ('month', 'Month')], max_length=5)),
+                ('period_start', models.DateField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('sum_power', models.PositiveIntegerField(default=0)),
+                ('sum_control', models.PositiveIntegerField(default=0)),
+                ('sum_comfort', models.PositiveIntegerField(default=0)),
+                ('sum_agility', models.PositiveIntegerField(default=0)),
+                ('sum_spin', models.PositiveIntegerField(default=0)),
+                ('sum_hard', models.PositiveIntegerField(default=0)),
+                ('sum_exit', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['racket', 'period', 'period_start'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['racket', 'created_at'], name='review_racket_created_idx'),
+        ),
+        migrations.AddField(
+            model_name='ratingrollup',
+            name='racket',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rating_rollups', to='PadelRDB_app.racket'),
+        ),
+        migrations.AddConstraint(
+            model_name='ratingrollup',
+            constraint=models.UniqueConstraint(fields=('racket', 'period', 'user_type', 'period_start'), name='unique_rating_rollup'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.6 on 2026-10-19 12:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PadelRDB_app', '0006_catalog_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserReviewStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('review_count', models.PositiveIntegerField(default=0)),
+                ('brands_covered', models.PositiveIntegerField(default=0)),
+                ('avg_power', models.FloatField(blank=True, null=True)),
+                ('avg_control', models.FloatField(blank=True, null=True)),
+                ('avg_comfort', models.FloatField(blank=True, null=True)),
+                ('avg_agility', models.FloatField(blank=True, null=True)),
+                ('avg_spin', models.FloatField(blank=True, null=True)),
+                ('avg_hard', models.FloatField(blank=True, null=True)),
+                ('avg_exit', models.FloatField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='review_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.1.6 on 2026-10-19 12:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PadelRDB_app', '0009_image_details'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RacketVideo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.URLField(db_index=True, max_length=500)),
+                ('position', models.PositiveSmallIntegerField(default=0)),
+                ('title', models.CharField(blank=True, editable=False, max_length=255)),
+                ('creator', models.CharField(blank=True, editable=False, max_length=255)),
+                ('thumbnail', models.URLField(blank=True, editable=False, max_length=500)),
+                ('fetched_at', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('racket', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='videos', to='PadelRDB_app.racket')),
+            ],
+            options={
+                'ordering': ['racket', 'position', 'id'],
+                'constraints': [models.UniqueConstraint(fields=('racket', 'url'), name='unique_racket_video')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StoreLink',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('brand', 'Brand store'), ('retailer', 'Retailer')], default='retailer', max_length=10)),
+                ('retailer', models.SlugField(db_index=False)),
+                ('retailer_name', models.CharField(blank=True, max_length=100)),
+                ('url', models.URLField(db_index=True, max_length=500)),
+                ('position', models.PositiveSmallIntegerField(default=0)),
+                ('racket', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='store_links', to='PadelRDB_app.racket')),
+            ],
+            options={
+                'ordering': ['racket', 'kind', 'retailer', 'position', 'id'],
+                'indexes': [models.Index(fields=['retailer', 'racket'], name='storelink_retailer_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.1.6 on 2026-10-19 12:55
+
+import re
+
+from django.db import migrations
+from django.utils import timezone
+from django.utils.text import slugify
+
+
+def youtube_thumbnail(url):
+    # What RacketVideo.save() fills in, which bulk_create (and the historical model) skips
+    video_id_match = re.search(r"v=([\w-]+)", url)
+    return f"https://img.youtube.com/vi/{video_id_match.group(1)}/hqdefault.jpg" if video_id_match else ''
+
+
+def copy_to_tables(apps, schema_editor):
+    Racket = apps.get_model('PadelRDB_app', 'Racket')
+    StoreLink = apps.get_model('PadelRDB_app', 'StoreLink')
+    RacketVideo = apps.get_model('PadelRDB_app', 'RacketVideo')
+
+    links, videos = [], []
+    # values() because the new reverse accessors shadow the old field names on the historical model
+    rows = Racket.objects.values('id', 'brand__name', 'store_links', 'media_urls', 'video_details')
+    for row in rows.iterator():
+        store_links = row['store_links'] if isinstance(row['store_links'], dict) else {}
+        for position, url in enumerate(store_links.get('brand', [])):
+            links.append(StoreLink(racket_id=row['id'], kind='brand', retailer=slugify(row['brand__name']),
+                                   url=url, position=position))
+        for retailer, urls in store_links.get('retailers', {}).items():
+            for position, url in enumerate(urls):
+                links.append(StoreLink(racket_id=row['id'], kind='retailer', retailer=slugify(retailer),
+                                       retailer_name=retailer, url=url, position=position))
+
+        details = row['video_details'] or {}
+        for position, url in enumerate(dict.fromkeys(row['media_urls'] or [])):
+            info = details.get(url) or {}
+            videos.append(RacketVideo(
+                racket_id=row['id'], url=url, position=position,
+                title=info.get('title') or '', creator=info.get('creator') or '',
+                thumbnail=info.get('thumbnail') or youtube_thumbnail(url),
+                fetched_at=timezone.now() if url in details else None,
+            ))
+
+    StoreLink.objects.bulk_create(links, batch_size=1000)
+    RacketVideo.objects.bulk_create(videos, batch_size=1000)
+
+
+def copy_to_json(apps, schema_editor):
+    Racket = apps.get_model('PadelRDB_app', 'Racket')
+    StoreLink = apps.get_model('PadelRDB_app', 'StoreLink')
+    RacketVideo = apps.get_model('PadelRDB_app', 'RacketVideo')
+
+    store_links, media_urls, video_details = {}, {}, {}
+    for link in StoreLink.objects.order_by('racket_id', 'kind', 'retailer', 'position', 'id').iterator():
+        racket_links = store_links.setdefault(link.racket_id, {'brand': [], 'retailers': {}})
+        if link.kind == 'brand':
+            racket_links['brand'].append(link.url)
+        else:
+            racket_links['retailers'].setdefault(link.retailer_name or link.retailer, []).append(link.url)
+    for video in RacketVideo.objects.order_by('racket_id', 'position', 'id').iterator():
+        media_urls.setdefault(video.racket_id, []).append(video.url)
+        if video.fetched_at:
+            video_details.setdefault(video.racket_id, {})[video.url] = {
+                'title': video.title, 'thumbnail': video.thumbnail, 'creator': video.creator, 'url': video.url,
+            }
+
+    for racket_id in store_links.keys() | media_urls.keys():
+        Racket.objects.filter(pk=racket_id).update(
+            store_links=store_links.get(racket_id, {}),
+            media_urls=media_urls.get(racket_id, []),
+            video_details=video_details.get(racket_id, {}),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PadelRDB_app', '0010_store_links_videos'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_to_tables, copy_to_json),
+    ]
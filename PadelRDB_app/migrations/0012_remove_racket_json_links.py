@@ -0,0 +1,25 @@
+# Generated by Django 5.1.6 on 2026-10-19 12:55
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PadelRDB_app', '0011_copy_links_and_videos'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='racket',
+            name='media_urls',
+        ),
+        migrations.RemoveField(
+            model_name='racket',
+            name='store_links',
+        ),
+        migrations.RemoveField(
+            model_name='racket',
+            name='video_details',
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 5.1.6 on 2026-10-19 12:57
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PadelRDB_app', '0012_remove_racket_json_links'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('currency', models.CharField(blank=True, max_length=3)),
+                ('captured_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['link', '-captured_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='storelink',
+            name='checked_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='storelink',
+            name='currency',
+            field=models.CharField(blank=True, editable=False, max_length=3),
+        ),
+        migrations.AddField(
+            model_name='storelink',
+            name='etag',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='storelink',
+            name='failures',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='storelink',
+            name='http_status',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='storelink',
+            name='last_modified',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='storelink',
+            name='price',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='storelink',
+            name='price_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='storelink',
+            name='status',
+            field=models.CharField(choices=[('unknown', 'Not checked yet'), ('ok', 'OK'), ('dead', 'Dead')], default='unknown', editable=False, max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='storelink',
+            index=models.Index(fields=['checked_at'], name='storelink_checked_idx'),
+        ),
+        migrations.AddField(
+            model_name='pricesnapshot',
+            name='link',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_snapshots', to='PadelRDB_app.storelink'),
+        ),
+        migrations.AddIndex(
+            model_name='pricesnapshot',
+            index=models.Index(fields=['link', '-captured_at'], name='price_link_captured_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.6 on 2026-10-19 13:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PadelRDB_app', '0014_request_profiles_slow_queries'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecommenderModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('factors', models.PositiveSmallIntegerField()),
+                ('global_mean', models.FloatField()),
+                ('user_ids', models.BinaryField()),
+                ('racket_ids', models.BinaryField()),
+                ('user_bias', models.BinaryField()),
+                ('racket_bias', models.BinaryField()),
+                ('user_factors', models.BinaryField()),
+                ('racket_factors', models.BinaryField()),
+                ('popular', models.JSONField(default=list)),
+                ('review_count', models.PositiveIntegerField(default=0)),
+                ('rmse', models.FloatField(blank=True, null=True)),
+                ('incremental', models.BooleanField(default=False)),
+                ('trained_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'ordering': ['-trained_at'],
+            },
+        ),
+    ]
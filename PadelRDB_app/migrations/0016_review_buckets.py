@@ -0,0 +1,26 @@
+# Generated by Django 5.1.6 on 2026-10-19 13:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PadelRDB_app', '0015_recommender_model'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReviewBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('band', models.PositiveSmallIntegerField()),
+                ('bucket', models.BigIntegerField(db_index=True)),
+                ('review', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lsh_buckets', to='PadelRDB_app.review')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('review', 'band'), name='unique_review_band')],
+            },
+        ),
+    ]
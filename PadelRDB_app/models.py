@@ -2,12 +2,14 @@ from django.db import models
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils.text import slugify
+from django.utils import timezone
 import os
 import math
-import requests
+import uuid
 import re
 from django.core.files.storage import default_storage
 from django.contrib.auth.models import AbstractUser
+from .retailers import get_retailer, logo_url
 
 
 # Helper Functions
@@ -23,6 +25,8 @@ def user_profile_image_path(instance, filename):
 class Brand(models.Model):
     name = models.CharField(max_length=100, unique=True)
     logo = models.ImageField(upload_to='brand_logos/')
+    logo_details = models.JSONField(default=dict, blank=True, editable=False)  # Size and placeholder, see images.py
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         ordering = ['name']
@@ -47,11 +51,12 @@ class Racket(models.Model):
     gametype = models.CharField(max_length=255)
     finish = models.CharField(max_length=255)
     thumbnail = models.ImageField(upload_to=racket_image_path)
-    media_urls = models.JSONField(default=list, blank=True)  # Stores a list of video URLs
-    store_links = models.JSONField(default=dict, blank=True)  # Stores a list of store URLs
+    thumbnail_details = models.JSONField(default=dict, blank=True, editable=False)  # Size and placeholder, see images.py
+    updated_at = models.DateTimeField(auto_now=True)  # Also bumped when the racket's reviews change
 
     class Meta:
         ordering = ['name']
+        indexes = [models.Index(fields=['updated_at', 'id'], name='racket_updated_idx')]
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -65,18 +70,12 @@ class Racket(models.Model):
         super().save(*args, **kwargs)
 
     def categorized_links(self):
-        # Ensure store_links is a dictionary
-        if not isinstance(self.store_links, dict):
-            return {"brand": [], "retailers": []}  # Return an empty valid structure
-
+        """Live store links split into the brand's own shop and retailers (uses prefetched store_links)."""
         categorized = {"brand": [], "retailers": []}
-        for link in self.store_links.get("brand", []):
-            categorized["brand"].append({"url": link, "store": "brand"})
-
-        for retailer, links in self.store_links.get("retailers", {}).items():
-            for link in links:
-                categorized["retailers"].append({"url": link, "store": retailer})
-
+        for link in self.store_links.all():
+            if link.status == 'dead':
+                continue
+            categorized["brand" if link.kind == 'brand' else "retailers"].append(link)
         return categorized
 
     def get_video_details(self, video_url):
@@ -88,8 +87,10 @@ class Racket(models.Model):
         }
 
         if "youtube.com" in video_url or "youtu.be" in video_url:
-            oembed_url = f"https://www.youtube.com/oembed?url={video_url}&format=json"
-            response = requests.get(oembed_url)
+            import requests  # Deferred: ~150 ms of imports no request handler needs
+
+            oembed_url = f"{settings.YOUTUBE_OEMBED_URL}?url={video_url}&format=json"
+            response = requests.get(oembed_url, timeout=10)
 
             if response.status_code == 200:
                 data = response.json()
@@ -105,7 +106,13 @@ class Racket(models.Model):
         return video_info
 
     def get_media_details(self):
-        return [self.get_video_details(url) for url in self.media_urls]
+        """Video details from the stored oEmbed data (uses prefetched videos); missing ones are fetched in the background."""
+        videos = list(self.videos.all())
+        if any(video.fetched_at is None for video in videos) and self.pk:
+            from .jobs import enqueue
+            from .tasks import fetch_video_details
+            enqueue(fetch_video_details, {'racket_id': self.pk}, dedup_key=f"video-details:{self.pk}")
+        return videos
     
     
     def round_nearest_0_1(self, value):
@@ -136,7 +143,8 @@ class Review(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        constraints = [models.UniqueConstraint(fields=['user', 'racket'], name='unique_review')]       
+        constraints = [models.UniqueConstraint(fields=['user', 'racket'], name='unique_review')]
+        indexes = [models.Index(fields=['racket', 'created_at'], name='review_racket_created_idx')]
 
    
    
@@ -156,6 +164,7 @@ class Review(models.Model):
 class RacketImage(models.Model):
     racket = models.ForeignKey(Racket, on_delete=models.CASCADE, related_name='gallery_images')
     image = models.ImageField(upload_to='racket_images/')
+    image_details = models.JSONField(default=dict, blank=True, editable=False)  # Size and placeholder, see images.py
 
 
 class CustomUser(AbstractUser):
@@ -170,6 +179,7 @@ class CustomUser(AbstractUser):
         blank=True,  # Allow empty field
         null=True     # Allow database null value
     )
+    profile_image_details = models.JSONField(default=dict, blank=True, editable=False)  # Size and placeholder, see images.py
 
     def remove_profile_image(self):
         """Deletes the current profile image and resets to default."""
@@ -185,3 +195,347 @@ class CustomUser(AbstractUser):
         """Delete user and their related reviews."""
         self.reviews.all().delete()  # Delete all reviews by the user
         super().delete(*args, **kwargs)
+
+
+class Job(models.Model):
+    """A unit of background work, claimed and run by the `run_jobs` worker."""
+    STATUSES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    task = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    queue = models.CharField(max_length=50, default='default')
+    priority = models.IntegerField(default=0)  # Higher runs first
+    status = models.CharField(max_length=10, choices=STATUSES, default='queued')
+    dedup_key = models.CharField(max_length=255, null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-priority', 'run_at']
+        indexes = [models.Index(fields=['status', 'queue', '-priority', 'run_at'], name='job_claim_idx')]
+        constraints = [
+            # Only one pending job per dedup key; finished jobs don't block new ones
+            models.UniqueConstraint(
+                fields=['dedup_key'],
+                condition=models.Q(status='queued'),
+                name='unique_queued_dedup_key',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.task} [{self.status}]"
+
+
+class LeaderboardEntry(models.Model):
+    """Precomputed rank of a racket for one attribute and reviewer type (see leaderboards.py)."""
+    ATTRIBUTES = ['power', 'control', 'comfort', 'agility', 'spin', 'hard', 'exit']
+
+    attribute = models.CharField(max_length=20)
+    user_type = models.CharField(max_length=10, choices=Review.USER_TYPES)
+    racket = models.ForeignKey(Racket, on_delete=models.CASCADE, related_name='leaderboard_entries')
+    rank = models.PositiveIntegerField()
+    score = models.FloatField()  # Bayesian average
+    average = models.FloatField()  # Raw average
+    review_count = models.PositiveIntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['attribute', 'user_type', 'rank']
+        indexes = [models.Index(fields=['attribute', 'user_type', 'rank'], name='leaderboard_rank_idx')]
+        constraints = [
+            models.UniqueConstraint(fields=['attribute', 'user_type', 'racket'], name='unique_leaderboard_entry'),
+        ]
+
+    def __str__(self):
+        return f"{self.attribute}/{self.user_type} #{self.rank}: {self.racket.name}"
+
+
+class RatingRollup(models.Model):
+    """Per-attribute rating sums and review count of a racket for one week or month (see rollups.py)."""
+    PERIODS = [('week', 'Week'), ('month', 'Month')]
+
+    racket = models.ForeignKey(Racket, on_delete=models.CASCADE, related_name='rating_rollups')
+    user_type = models.CharField(max_length=10, choices=Review.USER_TYPES)
+    period = models.CharField(max_length=5, choices=PERIODS)
+    period_start = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+    sum_power = models.PositiveIntegerField(default=0)
+    sum_control = models.PositiveIntegerField(default=0)
+    sum_comfort = models.PositiveIntegerField(default=0)
+    sum_agility = models.PositiveIntegerField(default=0)
+    sum_spin = models.PositiveIntegerField(default=0)
+    sum_hard = models.PositiveIntegerField(default=0)
+    sum_exit = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['racket', 'period', 'period_start']
+        constraints = [
+            models.UniqueConstraint(fields=['racket', 'period', 'user_type', 'period_start'], name='unique_rating_rollup'),
+        ]
+
+    def __str__(self):
+        return f"{self.racket.name} {self.user_type} {self.period} {self.period_start}"
+
+
+class UserReviewStats(models.Model):
+    """Summary of everything a user has reviewed, refreshed on each of their review writes."""
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='review_stats')
+    review_count = models.PositiveIntegerField(default=0)
+    brands_covered = models.PositiveIntegerField(default=0)
+    avg_power = models.FloatField(null=True, blank=True)
+    avg_control = models.FloatField(null=True, blank=True)
+    avg_comfort = models.FloatField(null=True, blank=True)
+    avg_agility = models.FloatField(null=True, blank=True)
+    avg_spin = models.FloatField(null=True, blank=True)
+    avg_hard = models.FloatField(null=True, blank=True)
+    avg_exit = models.FloatField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @classmethod
+    def refresh(cls, user_id):
+        """Recompute a user's summary with one aggregate over their reviews."""
+        values = Review.objects.filter(user_id=user_id).aggregate(
+            review_count=models.Count('id'),
+            brands_covered=models.Count('racket__brand', distinct=True),
+            **{f'avg_{attribute}': models.Avg(attribute) for attribute in LeaderboardEntry.ATTRIBUTES},
+        )
+        stats, created = cls.objects.update_or_create(user_id=user_id, defaults=values)
+        return stats
+
+    def __str__(self):
+        return f"{self.user.username} review stats"
+
+
+class UploadSession(models.Model):
+    """A resumable chunked upload; chunks are stored under `uploads/<id>/` until assembled (see uploads.py)."""
+    TARGETS = [('racket_image', 'Racket gallery image'), ('brand_logo', 'Brand logo')]
+    STATUSES = [
+        ('uploading', 'Uploading'),
+        ('assembling', 'Assembling'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    target = models.CharField(max_length=20, choices=TARGETS)
+    target_id = models.PositiveIntegerField()
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    chunk_size = models.PositiveIntegerField()
+    received_chunks = models.JSONField(default=list, blank=True)
+    status = models.CharField(max_length=12, choices=STATUSES, default='uploading')
+    result_name = models.CharField(max_length=255, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def chunk_count(self):
+        return max(1, math.ceil(self.size / self.chunk_size))
+
+    def chunk_name(self, index):
+        return f"uploads/{self.id}/{index:06d}"
+
+    def __str__(self):
+        return f"{self.filename} ({self.status})"
+
+
+class StoreLink(models.Model):
+    """A shop selling a racket: the brand's own store or a retailer from retailers.RETAILERS."""
+    KINDS = [('brand', 'Brand store'), ('retailer', 'Retailer')]
+    STATUSES = [('unknown', 'Not checked yet'), ('ok', 'OK'), ('dead', 'Dead')]
+
+    racket = models.ForeignKey(Racket, on_delete=models.CASCADE, related_name='store_links')
+    kind = models.CharField(max_length=10, choices=KINDS, default='retailer')
+    retailer = models.SlugField(max_length=50, db_index=False)  # Registry key; the brand name for brand stores
+    retailer_name = models.CharField(max_length=100, blank=True)  # As entered, e.g. 'Padel Market'; blank: the registry's
+    url = models.URLField(max_length=500, db_index=True)
+    position = models.PositiveSmallIntegerField(default=0)
+    # Latest crawl (see crawler.py)
+    status = models.CharField(max_length=10, choices=STATUSES, default='unknown', editable=False)
+    http_status = models.PositiveSmallIntegerField(null=True, blank=True, editable=False)
+    failures = models.PositiveSmallIntegerField(default=0, editable=False)  # Consecutive failed checks
+    checked_at = models.DateTimeField(null=True, blank=True, editable=False)
+    etag = models.CharField(max_length=255, blank=True, editable=False)
+    last_modified = models.CharField(max_length=64, blank=True, editable=False)
+    price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, editable=False)  # Last known
+    currency = models.CharField(max_length=3, blank=True, editable=False)
+    price_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        ordering = ['racket', 'kind', 'retailer', 'position', 'id']
+        indexes = [
+            models.Index(fields=['retailer', 'racket'], name='storelink_retailer_idx'),
+            models.Index(fields=['checked_at'], name='storelink_checked_idx'),
+        ]
+
+    @property
+    def store_name(self):
+        return self.retailer_name or get_retailer(self.retailer)['name']
+
+    @property
+    def logo_url(self):
+        return logo_url(self.retailer)
+
+    @classmethod
+    def as_json(cls, racket_ids):
+        """The legacy {"brand": [...], "retailers": {name: [...]}} shape per racket, in one query. Dead links are left out."""
+        links = {racket_id: {"brand": [], "retailers": {}} for racket_id in racket_ids}
+        for racket_id, kind, retailer, name, url in cls.objects.filter(racket__in=racket_ids).exclude(status='dead').values_list(
+            'racket_id', 'kind', 'retailer', 'retailer_name', 'url'
+        ):
+            if kind == 'brand':
+                links[racket_id]["brand"].append(url)
+            else:
+                links[racket_id]["retailers"].setdefault(name or get_retailer(retailer)['name'], []).append(url)
+        return links
+
+    def __str__(self):
+        return f"{self.racket.name} @ {self.store_name}"
+
+
+class PriceSnapshot(models.Model):
+    """A price read from a store link's page by the crawler."""
+    link = models.ForeignKey(StoreLink, on_delete=models.CASCADE, related_name='price_snapshots')
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    currency = models.CharField(max_length=3, blank=True)
+    captured_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['link', '-captured_at']
+        indexes = [models.Index(fields=['link', '-captured_at'], name='price_link_captured_idx')]
+
+    def __str__(self):
+        return f"{self.link} {self.price} {self.currency} ({self.captured_at:%Y-%m-%d})"
+
+
+class RacketVideo(models.Model):
+    """A video about a racket; title, creator and thumbnail come from oEmbed, fetched in the background."""
+    racket = models.ForeignKey(Racket, on_delete=models.CASCADE, related_name='videos')
+    url = models.URLField(max_length=500, db_index=True)
+    position = models.PositiveSmallIntegerField(default=0)
+    title = models.CharField(max_length=255, blank=True, editable=False)
+    creator = models.CharField(max_length=255, blank=True, editable=False)
+    thumbnail = models.URLField(max_length=500, blank=True, editable=False)
+    fetched_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        ordering = ['racket', 'position', 'id']
+        constraints = [models.UniqueConstraint(fields=['racket', 'url'], name='unique_racket_video')]
+
+    def save(self, *args, **kwargs):
+        if not self.thumbnail:
+            # YouTube thumbnails can be shown before the oEmbed details arrive
+            video_id_match = re.search(r"v=([\w-]+)", self.url)
+            if video_id_match:
+                self.thumbnail = f"https://img.youtube.com/vi/{video_id_match.group(1)}/hqdefault.jpg"
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def urls(cls, racket_ids):
+        """Video URLs per racket, in one query."""
+        urls = {racket_id: [] for racket_id in racket_ids}
+        for racket_id, url in cls.objects.filter(racket__in=racket_ids).values_list('racket_id', 'url'):
+            urls[racket_id].append(url)
+        return urls
+
+    def __str__(self):
+        return self.title or self.url
+
+
+class RequestProfile(models.Model):
+    """A profiled request (see profiling.py): cProfile statistics plus the request's SQL totals."""
+    REASONS = [
+        ('sampled', 'Sampled'),
+        ('header', 'Staff header'),
+    ]
+
+    path = models.CharField(max_length=500)
+    method = models.CharField(max_length=10)
+    view_name = models.CharField(max_length=200, blank=True, db_index=True)
+    status_code = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+    query_count = models.PositiveIntegerField(default=0)
+    query_ms = models.FloatField(default=0)
+    reason = models.CharField(max_length=10, choices=REASONS)
+    user_id = models.BigIntegerField(null=True, blank=True)  # Not a foreign key: profiles outlive accounts
+    stats = models.TextField()  # pstats report, by cumulative and by own time
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
+
+
+class SlowQuery(models.Model):
+    """A SQL statement slower than SLOW_QUERY_MS, with its query plan and where it came from."""
+    sql = models.TextField()
+    duration_ms = models.FloatField()
+    explain = models.TextField(blank=True)
+    view_name = models.CharField(max_length=200, blank=True, db_index=True)
+    path = models.CharField(max_length=500, blank=True)
+    call_site = models.CharField(max_length=500, blank=True)  # file:line in function, first frame outside Django
+    profile = models.ForeignKey(RequestProfile, null=True, blank=True, on_delete=models.SET_NULL, related_name='slow_queries')
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name_plural = 'slow queries'
+
+    def __str__(self):
+        return f"{self.duration_ms:.0f} ms in {self.view_name or self.path}"
+
+
+class RecommenderModel(models.Model):
+    """
+    One training run of the racket recommender (see recommendations.py). The
+    arrays are stored as raw float32/int64 bytes: ids in row order, then the
+    biases and the factor matrices row by row.
+    """
+    factors = models.PositiveSmallIntegerField()
+    global_mean = models.FloatField()
+    user_ids = models.BinaryField()  # int64, one per row of user_factors
+    racket_ids = models.BinaryField()  # int64, one per row of racket_factors
+    user_bias = models.BinaryField()  # float32
+    racket_bias = models.BinaryField()  # float32
+    user_factors = models.BinaryField()  # float32, users x factors
+    racket_factors = models.BinaryField()  # float32, rackets x factors
+    popular = models.JSONField(default=list)  # Racket ids, best first: the cold-start fallback
+    review_count = models.PositiveIntegerField(default=0)
+    rmse = models.FloatField(null=True, blank=True)  # On the training ratings
+    incremental = models.BooleanField(default=False)
+    trained_at = models.DateTimeField(db_index=True)  # Reviews written after this are not in the model yet
+
+    class Meta:
+        ordering = ['-trained_at']
+
+    def __str__(self):
+        kind = 'incremental' if self.incremental else 'full'
+        return f"{kind} recommender model of {self.trained_at:%Y-%m-%d %H:%M} ({self.factors} factors)"
+
+
+class ReviewBucket(models.Model):
+    """One LSH band of a review comment's MinHash signature (see duplicates.py)."""
+    review = models.ForeignKey(Review, on_delete=models.CASCADE, related_name='lsh_buckets')
+    band = models.PositiveSmallIntegerField()
+    bucket = models.BigIntegerField(db_index=True)  # Hash of the band number and its signature values
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['review', 'band'], name='unique_review_band')]
+
+    def __str__(self):
+        return f"review {self.review_id} band {self.band}"
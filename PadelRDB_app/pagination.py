@@ -0,0 +1,12 @@
+import base64
+import json
+
+
+# Opaque keyset cursors: the sort key of the last row seen, as url-safe base64 JSON
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Raises ValueError if the cursor is malformed."""
+    return json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
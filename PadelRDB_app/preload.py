@@ -0,0 +1,67 @@
+"""
+Preload hints for the resources a page needs first.
+
+PreloadMiddleware adds a Link header to every HTML page naming the
+stylesheets in its <head> and its hero image(s): the first PRELOAD_IMAGES
+images rendered eagerly (image_attrs with lazy=False, such as the racket
+thumbnail on racket_detail). A browser reading the header fetches them
+while it still parses the page.
+
+gunicorn, like any WSGI server, cannot send an informational 103 response
+ahead of the final one. The CDN or proxy in front of it turns these Link
+headers into 103 Early Hints (e.g. Cloudflare replays the Link headers of
+earlier responses for a URL while the origin renders the next one), so the
+stylesheets and the thumbnail are requested before the body is even
+rendered.
+"""
+
+import re
+
+from django.conf import settings
+
+HEAD = re.compile(rb'<head>(.*?)</head>', re.S)
+STYLESHEET = re.compile(rb'<link rel="stylesheet" href="([^"]+)"')
+IMAGE = re.compile(rb'<img\b[^>]*>')
+SRC = re.compile(rb'\bsrc="([^"]+)"')
+
+
+# Helper Functions
+def hints(content, images=1):
+    """Link header values for the page's stylesheets and first `images` eager images."""
+    links = []
+    head = HEAD.search(content)
+    if head:
+        links += [f"<{url.decode()}>; rel=preload; as=style" for url in STYLESHEET.findall(head.group(1))]
+    if images:
+        for tag in IMAGE.finditer(content, head.end() if head else 0):
+            tag = tag.group(0)
+            # image_attrs marks every image; eager ones are decoded async but not loading="lazy"
+            if b'decoding="async"' not in tag or b'loading="lazy"' in tag:
+                continue
+            src = SRC.search(tag)
+            if src:
+                links.append(f"<{src.group(1).decode()}>; rel=preload; as=image; fetchpriority=high")
+                images -= 1
+                if not images:
+                    break
+    return links
+
+
+class PreloadMiddleware:
+    """Link: rel=preload for the stylesheets and hero image of HTML pages (see module docstring)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            response.status_code != 200 or response.streaming
+            or not response.get('Content-Type', '').startswith('text/html')
+        ):
+            return response
+        links = hints(response.content, getattr(settings, 'PRELOAD_IMAGES', 1))
+        if links:
+            existing = response.get('Link')
+            response['Link'] = ', '.join([existing, *links] if existing else links)
+        return response
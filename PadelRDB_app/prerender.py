@@ -0,0 +1,259 @@
+"""
+Static export of the catalog pages, for a CDN (or WhiteNoise) to serve to anonymous visitors.
+
+export() renders browse, all_rackets, every brand_page and every
+racket_detail in every site language through the real WSGI handler, as an
+anonymous visitor, and writes each page to <output>/<path>/index.html so
+that the URL maps straight onto the file. A sitemap.xml listing every page,
+with its other-language alternates, goes next to them.
+
+A manifest.json remembers when the last export ran and a hash of every
+page. An incremental export only renders again:
+
+- the racket pages of rackets whose data, reviews, store links or prices
+  (Racket.updated_at, which crawler.record() bumps too) or video details
+  changed since, or whose brand changed;
+- browse, all_rackets and the brand pages, as soon as anything changed or
+  was deleted (there are few of them, and popular rackets and racket lists
+  depend on every racket);
+- pages that are new, whose file is missing or that failed last time.
+
+Pages whose racket or brand is gone are deleted, and the index and brand
+pages that listed them rendered again. A file is rewritten, and
+its sitemap lastmod moved, only when its content changed, so CDN caches of
+unchanged pages stay valid. Template or code changes need a full export.
+
+Rendering runs in forked worker processes (threads where fork isn't
+available). The pages are the anonymous version: route requests carrying a
+session cookie to the app. Any CSRF token is stripped from them; the
+language switcher needs none, as it links to the page in the other
+language instead of posting to set_language.
+"""
+
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import unquote, unquote_to_bytes
+from wsgiref.util import setup_testing_defaults
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connections
+from django.urls import reverse
+from django.utils import timezone, translation
+
+from .models import Brand, Racket, RacketVideo
+from .warmup import catalog_languages, default_host
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = 'manifest.json'
+SITEMAP_LIMIT = 50000  # URLs per sitemap file (the protocol's maximum)
+CSRF_INPUT = re.compile(rb'<input type="hidden" name="csrfmiddlewaretoken" value="[^"]*">')
+
+_handler = None  # One WSGIHandler per worker process
+
+
+# Helper Functions
+def export_languages():
+    """The i18n_patterns prefix of every language the site has a catalog for."""
+    return sorted({translation.get_supported_language_variant(language) for language in catalog_languages()})
+
+
+def catalog_pages(languages):
+    """
+    {path: (kind, key)} of every page to export: kind is 'index' (browse,
+    all_rackets), 'brand' or 'racket', key the brand or racket id.
+    """
+    brands = list(Brand.objects.order_by('name').values_list('id', 'name'))
+    rackets = list(Racket.objects.order_by('id').values_list('id', 'brand__name', 'slug'))
+    pages = {}
+    for language in languages:
+        with translation.override(language):
+            pages[reverse('browse')] = ('index', None)
+            pages[reverse('all_rackets')] = ('index', None)
+            pages.update((reverse('brand_page', args=[name]), ('brand', brand_id)) for brand_id, name in brands)
+            pages.update(
+                (reverse('racket_detail', args=[brand_name, slug]), ('racket', racket_id))
+                for racket_id, brand_name, slug in rackets
+            )
+    return pages
+
+
+def changed_since(since):
+    """
+    (racket ids, brand ids) whose pages may differ from an export made at
+    `since`. Store links and their prices count through Racket.updated_at:
+    crawler.record() bumps it when a link's status or price changes, not on
+    every check, which would render every racket page again after each crawl.
+    """
+    brand_ids = set(Brand.objects.filter(updated_at__gt=since).values_list('id', flat=True))
+    racket_ids = set(Racket.objects.filter(updated_at__gt=since).values_list('id', flat=True))
+    racket_ids.update(RacketVideo.objects.filter(fetched_at__gt=since).values_list('racket_id', flat=True))
+    racket_ids.update(Racket.objects.filter(brand_id__in=brand_ids).values_list('id', flat=True))
+    return racket_ids, brand_ids
+
+
+def file_path(output, path):
+    """Where the page at URL `path` is written: servers decode the URL before looking for the file."""
+    return os.path.join(output, *unquote(path).strip('/').split('/'), 'index.html')
+
+
+def load_manifest(output):
+    try:
+        with open(os.path.join(output, MANIFEST)) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {'exported_at': None, 'pages': {}}
+
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f"{path}.tmp"
+    with open(temporary, 'wb') as file:
+        file.write(content)
+    os.replace(temporary, path)  # Never serve a half-written page
+
+
+def render_page(job):
+    """
+    Render one page in a worker and write it if its content changed.
+    Returns (path, status, sha256 or None, written).
+    """
+    global _handler
+    path, output, host, previous_sha = job
+    if _handler is None:
+        _handler = WSGIHandler()
+    environ = {}
+    setup_testing_defaults(environ)
+    # PATH_INFO is the decoded path, as bytes in latin-1 (PEP 3333)
+    environ.update(PATH_INFO=unquote_to_bytes(path).decode('latin-1'), HTTP_HOST=host, HTTP_X_FORWARDED_PROTO='https')
+    statuses = []
+    try:
+        response = _handler(environ, lambda status, headers, exc_info=None: statuses.append(int(status[:3])))
+        content = b''.join(response)
+        response.close()
+    except Exception:
+        logger.exception("Export of %s failed", path)
+        return path, None, None, False
+    if statuses[0] != 200:
+        return path, statuses[0], None, False
+    # A token is random per render (unchanged pages would never hash the same) and would match nobody's cookie
+    content = CSRF_INPUT.sub(b'', content)
+    sha = hashlib.sha256(content).hexdigest()
+    target = file_path(output, path)
+    if sha == previous_sha and os.path.exists(target):
+        return path, 200, sha, False
+    _write(target, content)
+    return path, 200, sha, True
+
+
+def _pool(workers):
+    if 'fork' in multiprocessing.get_all_start_methods():
+        connections.close_all()  # Each worker opens its own connection
+        return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork'))
+    return ThreadPoolExecutor(max_workers=workers)
+
+
+def write_sitemap(output, base_url, pages, entries, languages):
+    """sitemap.xml (an index of sitemap-N.xml files past SITEMAP_LIMIT URLs), with hreflang alternates."""
+    alternates = {}
+    for path in pages:
+        language, _, rest = path.lstrip('/').partition('/')
+        alternates.setdefault(rest, []).append((language, path))
+
+    urls = []
+    for path in sorted(pages):
+        rest = path.lstrip('/').partition('/')[2]
+        links = ''.join(
+            f'<xhtml:link rel="alternate" hreflang="{language}" href="{escape(base_url + other)}"/>'
+            for language, other in sorted(alternates[rest]) if len(languages) > 1
+        )
+        urls.append(f"<url><loc>{escape(base_url + path)}</loc><lastmod>{entries[path]['lastmod']}</lastmod>{links}</url>")
+
+    header = ('<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9" '
+              'xmlns:xhtml="http://www.w3.org/1999/xhtml">\n')
+    chunks = [urls[start:start + SITEMAP_LIMIT] for start in range(0, len(urls), SITEMAP_LIMIT)] or [[]]
+    if len(chunks) == 1:
+        _write(os.path.join(output, 'sitemap.xml'), (header + '\n'.join(chunks[0]) + '\n</urlset>\n').encode())
+        return
+    for number, chunk in enumerate(chunks, start=1):
+        _write(os.path.join(output, f'sitemap-{number}.xml'), (header + '\n'.join(chunk) + '\n</urlset>\n').encode())
+    index = ''.join(f"<sitemap><loc>{escape(base_url)}/sitemap-{number}.xml</loc></sitemap>\n"
+                    for number in range(1, len(chunks) + 1))
+    _write(os.path.join(output, 'sitemap.xml'), (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n{index}</sitemapindex>\n'
+    ).encode())
+
+
+def _remove(output, path):
+    target = file_path(output, path)
+    if os.path.exists(target):
+        os.remove(target)
+    directory = os.path.dirname(target)
+    while directory != output and os.path.isdir(directory) and not os.listdir(directory):
+        os.rmdir(directory)
+        directory = os.path.dirname(directory)
+
+
+def export(output=None, full=False, workers=None, host=None, base_url=None, languages=None):
+    """
+    Export the catalog pages into `output` (default STATIC_EXPORT_ROOT):
+    everything with `full` or on the first run, otherwise only what changed
+    since the last export. Returns a report.
+    """
+    output = os.path.abspath(output or settings.STATIC_EXPORT_ROOT)
+    workers = workers or getattr(settings, 'STATIC_EXPORT_WORKERS', 4)
+    host = host or default_host()
+    base_url = (base_url or f"https://{host}").rstrip('/')
+    languages = languages or export_languages()
+
+    started = timezone.now()  # Before reading: changes made during the export go to the next one
+    manifest = load_manifest(output)
+    os.makedirs(output, exist_ok=True)
+    entries = manifest['pages']
+    pages = catalog_pages(languages)
+
+    removed = [path for path in entries if path not in pages]
+    for path in removed:
+        _remove(output, path)
+        del entries[path]
+
+    if full or manifest['exported_at'] is None:
+        todo = list(pages)
+    else:
+        racket_ids, brand_ids = changed_since(datetime.fromisoformat(manifest['exported_at']))
+        # A deleted racket or brand is in neither set, but the lists still link to it
+        anything = bool(racket_ids or brand_ids or removed)
+        todo = [
+            path for path, (kind, key) in pages.items()
+            if path not in entries or not os.path.exists(file_path(output, path))
+            or (kind == 'racket' and key in racket_ids) or (kind != 'racket' and anything)
+        ]
+
+    failed, written = [], 0
+    if todo:
+        jobs = [(path, output, host, entries.get(path, {}).get('sha256')) for path in todo]
+        with _pool(workers) as pool:
+            results = list(pool.map(render_page, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+        for path, status, sha, changed in results:
+            if sha is None:
+                failed.append((path, status))
+                entries.pop(path, None)  # Not in the manifest: the next run renders it again
+                continue
+            if changed or path not in entries:
+                entries[path] = {'sha256': sha, 'lastmod': started.date().isoformat()}
+                written += changed
+
+    write_sitemap(output, base_url, [path for path in pages if path in entries], entries, languages)
+    manifest['exported_at'] = started.isoformat()
+    _write(os.path.join(output, MANIFEST), json.dumps(manifest, indent=1, sort_keys=True).encode())
+    return {'pages': len(pages), 'rendered': len(todo), 'written': written, 'removed': len(removed),
+            'failed': failed, 'output': output, 'languages': languages}
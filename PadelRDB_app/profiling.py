@@ -0,0 +1,152 @@
+"""
+Opt-in request profiling and slow-query capture.
+
+ProfilingMiddleware runs a request under cProfile when it is sampled
+(PROFILE_SAMPLE_RATE) or when a staff user sends the PROFILE_HEADER header,
+and stores the report as a RequestProfile; the header answer carries the
+profile's id in X-Profile-Id. With SLOW_QUERY_MS set, every SQL statement
+of every request is timed, and the slow ones are saved as SlowQuery rows
+with their EXPLAIN output, the view name and the first call site in project
+code. Both are browsed from the admin; only the newest PROFILE_KEEP rows of
+each are kept.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import random
+import time
+import traceback
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+
+from .models import RequestProfile, SlowQuery
+
+MAX_SLOW_QUERIES = 20  # Per request; a request with more has one cause worth fixing first
+EXPLAIN_PREFIXES = {'postgresql': 'EXPLAIN ', 'mysql': 'EXPLAIN ', 'sqlite': 'EXPLAIN QUERY PLAN '}
+
+
+# Helper Functions
+def call_site():
+    """'path/to/file.py:42 in function' for the innermost frame in project code."""
+    base_dir = str(settings.BASE_DIR)
+    for frame in reversed(traceback.extract_stack()):
+        filename = frame.filename
+        if filename.startswith(base_dir) and 'site-packages' not in filename and filename != __file__:
+            return f"{os.path.relpath(filename, base_dir)}:{frame.lineno} in {frame.name}"[:500]
+    return ''
+
+
+def explain(sql, params):
+    """The database's plan for a SELECT, as text; '' for other statements."""
+    prefix = EXPLAIN_PREFIXES.get(connection.vendor)
+    if prefix is None or sql.split(None, 1)[0].upper() not in ('SELECT', 'WITH'):
+        return ''
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql, params)
+            rows = cursor.fetchall()
+    except DatabaseError as error:
+        return f"EXPLAIN failed: {error}"
+    return '\n'.join(str(row[-1]) if connection.vendor == 'sqlite' else ' | '.join(map(str, row)) for row in rows)
+
+
+def stats_report(profiler, limit=40):
+    output = io.StringIO()
+    stats = pstats.Stats(profiler, stream=output).strip_dirs()
+    for title, key in (('By cumulative time', 'cumulative'), ('By own time', 'tottime')):
+        output.write(f"{title}\n")
+        stats.sort_stats(key).print_stats(limit)
+    return output.getvalue()
+
+
+def prune(model):
+    """Delete all but the newest PROFILE_KEEP rows."""
+    keep = getattr(settings, 'PROFILE_KEEP', 500)
+    cutoff = model.objects.order_by('-id').values_list('id', flat=True)[keep:keep + 1].first()
+    if cutoff is not None:
+        model.objects.filter(id__lte=cutoff).delete()
+
+
+class QueryRecorder:
+    """connection.execute_wrapper that times every statement and keeps the slow ones."""
+
+    def __init__(self, threshold_ms):
+        self.threshold_ms = threshold_ms
+        self.count = 0
+        self.total_ms = 0.0
+        self.slow = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            self.count += 1
+            self.total_ms += elapsed
+            if self.threshold_ms is not None and elapsed >= self.threshold_ms and len(self.slow) < MAX_SLOW_QUERIES:
+                self.slow.append((sql, params, many, elapsed, call_site()))
+
+
+class ProfilingMiddleware:
+    """Profiles sampled or staff-requested requests and records slow queries (see module docstring)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        reason = self.profile_reason(request)
+        threshold = getattr(settings, 'SLOW_QUERY_MS', None)
+        if reason is None and threshold is None:
+            return self.get_response(request)
+
+        recorder = QueryRecorder(threshold)
+        profiler = cProfile.Profile() if reason else None
+        start = time.perf_counter()
+        with connection.execute_wrapper(recorder):
+            if profiler is not None:
+                try:
+                    profiler.enable()
+                except ValueError:  # Another profiler is already active in this process
+                    profiler = None
+            try:
+                response = self.get_response(request)
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+        duration_ms = (time.perf_counter() - start) * 1000
+
+        match = getattr(request, 'resolver_match', None)
+        view_name = (match.view_name if match else '')[:200]
+        profile = None
+        if profiler is not None:
+            profile = RequestProfile.objects.create(
+                path=request.get_full_path()[:500], method=request.method, view_name=view_name,
+                status_code=response.status_code, duration_ms=duration_ms,
+                query_count=recorder.count, query_ms=recorder.total_ms, reason=reason,
+                user_id=request.user.pk if request.user.is_authenticated else None,
+                stats=stats_report(profiler),
+            )
+            prune(RequestProfile)
+            if reason == 'header':
+                response['X-Profile-Id'] = str(profile.pk)
+
+        if recorder.slow:
+            SlowQuery.objects.bulk_create([
+                SlowQuery(sql=sql, duration_ms=elapsed, explain='' if many else explain(sql, params),
+                          view_name=view_name, path=request.path[:500], call_site=site, profile=profile)
+                for sql, params, many, elapsed, site in recorder.slow
+            ])
+            prune(SlowQuery)
+        return response
+
+    def profile_reason(self, request):
+        if request.headers.get(getattr(settings, 'PROFILE_HEADER', 'X-Profile')) and request.user.is_staff:
+            return 'header'
+        rate = getattr(settings, 'PROFILE_SAMPLE_RATE', 0)
+        if rate and random.random() < rate:
+            return 'sampled'
+        return None
@@ -0,0 +1,188 @@
+"""
+Sliding-window rate limiting backed by the shared cache.
+
+Each limit counts hits in fixed windows and estimates the sliding rate as
+`previous window * (1 - elapsed fraction) + current window`. Limits are set
+per URL name in settings.RATE_LIMITS, e.g. {'login': {'ip': '10/m'}}, and
+applied by RateLimitMiddleware, or by the @ratelimit decorator for views
+that aren't routed by name. On Redis every counter for a request is read
+and incremented in one pipelined round trip. A rejected request takes its
+hits back, so a client retrying while throttled doesn't extend its wait,
+and Retry-After is the time the estimate lets one more request through.
+"""
+
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+# Helper Functions
+def parse_rate(rate):
+    """'10/m' -> (10, 60)"""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period]
+
+
+def client_ip(request):
+    """
+    The client address, taken from X-Forwarded-For when the app sits behind
+    RATELIMIT_NUM_PROXIES trusted proxies (1 by default when
+    SECURE_PROXY_SSL_HEADER says we are behind one).
+    """
+    num_proxies = getattr(settings, 'RATELIMIT_NUM_PROXIES', 1 if settings.SECURE_PROXY_SSL_HEADER else 0)
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if num_proxies and forwarded:
+        addresses = [address.strip() for address in forwarded.split(',') if address.strip()]
+        if addresses:
+            # Each trusted proxy appends the address it saw; anything further left is client-controlled
+            return addresses[max(len(addresses) - num_proxies, 0)]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _identities(request, scopes):
+    identities = {}
+    if 'ip' in scopes:
+        identities['ip'] = client_ip(request)
+    if 'user' in scopes and request.user.is_authenticated:
+        identities['user'] = str(request.user.pk)
+    return identities
+
+
+def _hit_counters(counters):
+    """
+    Increment each current-window key and read each previous-window key.
+    `counters` is a list of (current_key, previous_key, timeout); returns
+    [(current_count, previous_count)].
+    """
+    client = None
+    if cache.__class__.__name__ == 'RedisCache':
+        client = cache._cache.get_client(write=True)
+
+    if client is not None:
+        pipeline = client.pipeline(transaction=False)
+        for current, previous, timeout in counters:
+            pipeline.incr(cache.make_key(current))
+            pipeline.expire(cache.make_key(current), timeout)
+            pipeline.get(cache.make_key(previous))
+        results = pipeline.execute()
+        return [(int(results[i]), int(results[i + 2] or 0)) for i in range(0, len(results), 3)]
+
+    # Other backends: previous windows in one get_many, then one incr per counter
+    previous_counts = cache.get_many([previous for current, previous, timeout in counters])
+    hits = []
+    for current, previous, timeout in counters:
+        cache.add(current, 0, timeout)
+        try:
+            count = cache.incr(current)
+        except ValueError:
+            cache.set(current, 1, timeout)
+            count = 1
+        hits.append((count, previous_counts.get(previous, 0)))
+    return hits
+
+
+def _unhit_counters(counters):
+    """Take back the hits of a request that was rejected after all."""
+    if cache.__class__.__name__ == 'RedisCache':
+        pipeline = cache._cache.get_client(write=True).pipeline(transaction=False)
+        for current, previous, timeout in counters:
+            pipeline.decr(cache.make_key(current))
+        pipeline.execute()
+        return
+    for current, previous, timeout in counters:
+        try:
+            cache.decr(current)
+        except ValueError:
+            pass  # Expired meanwhile
+
+
+def _wait(limit, period, elapsed, allowed, previous):
+    """
+    Seconds until one more request fits: `previous * (1 - elapsed) + allowed
+    + 1` must get down to `limit`, either in this window as the previous
+    one's weight decays, or in the next one, where this window's `allowed`
+    hits become the decaying previous count.
+    """
+    room = limit - allowed - 1
+    if room >= 0 and previous:
+        return (1 - room / previous - elapsed) * period
+    room = limit - 1
+    fraction = 1 - room / allowed if allowed > room else 0
+    return (1 - elapsed + fraction) * period
+
+
+def check(request, name):
+    """
+    Count this request against the limits configured for `name`.
+    Returns None if allowed, or the number of seconds to wait.
+    """
+    limits = getattr(settings, 'RATE_LIMITS', {}).get(name)
+    if not limits:
+        return None
+
+    now = time.time()
+    rules, counters = [], []
+    for scope, ident in _identities(request, limits).items():
+        limit, period = parse_rate(limits[scope])
+        window = int(now // period)
+        prefix = f"rl:{name}:{scope}:{ident}"
+        rules.append((limit, period, (now % period) / period))
+        counters.append((f"{prefix}:{window}", f"{prefix}:{window - 1}", period * 2))
+    if not counters:
+        return None
+
+    retry_after = None
+    for (limit, period, elapsed), (current, previous) in zip(rules, _hit_counters(counters)):
+        if previous * (1 - elapsed) + current <= limit:
+            continue
+        wait = _wait(limit, period, elapsed, current - 1, previous)
+        retry_after = max(retry_after or 0, math.ceil(max(wait, 1)))
+    if retry_after:
+        _unhit_counters(counters)
+    return retry_after
+
+
+def too_many_requests(retry_after):
+    response = JsonResponse({'error': 'Too many requests. Please try again later.'}, status=429)
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def ratelimit(name):
+    """Apply the RATE_LIMITS entry `name` to a view (POST requests only)."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method == 'POST':
+                retry_after = check(request, name)
+                if retry_after:
+                    return too_many_requests(retry_after)
+            return view(request, *args, **kwargs)
+        wrapper.ratelimited = True
+        return wrapper
+    return decorator
+
+
+class RateLimitMiddleware:
+    """Applies RATE_LIMITS to POSTs on the URL names listed there."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method != 'POST' or getattr(view_func, 'ratelimited', False):
+            return None
+        match = request.resolver_match
+        retry_after = check(request, match.url_name) if match and match.url_name else None
+        if retry_after:
+            return too_many_requests(retry_after)
+        return None
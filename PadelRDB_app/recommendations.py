@@ -0,0 +1,358 @@
+"""
+Personalised racket recommendations from matrix factorisation of the reviews.
+
+Every review is one rating: the mean of its quality scores (hardness is a
+feel preference rather than a verdict, so it is left out). train() fits
+
+    rating ≈ global mean + user bias + racket bias + user factors · racket factors
+
+with alternating least squares over the sparse (user, racket) pairs. Each
+half-step solves the small ridge system of every user (or racket) at once:
+the normal equations are summed per row with np.add.at and handed to
+one batched np.linalg.solve. The result is stored as a RecommenderModel of
+compact float32 arrays. train(incremental=True) starts from the latest model
+and re-solves only the users and rackets whose reviews changed since, with
+the other side held fixed; review writes queue such a run (debounced by
+RECOMMENDER_RETRAIN_DELAY), and a full run from time to time re-fits
+everything.
+
+recommend() keeps the newest model in memory per process, checking for a
+newer one every RECOMMENDER_RELOAD_INTERVAL seconds, and ranks every racket
+for a user with one matrix-vector product and an argpartition. Users the
+model doesn't know yet, and everyone before the first training, get the
+most popular rackets instead.
+
+NumPy is imported inside the functions that need it so that pages without
+recommendations don't pay for the import at start-up.
+"""
+
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from .leaderboards import bayesian_score
+from .models import Racket, RecommenderModel, Review
+
+RATING_ATTRIBUTES = ['power', 'control', 'comfort', 'agility', 'spin', 'exit']
+CHUNK = 50_000  # Ratings per block when summing the normal equations (bounds memory to CHUNK x k x k floats)
+BIAS_SWEEPS = 5
+POPULAR_SIZE = 100
+POPULAR_KEY = 'recommendations:popular'
+
+_lock = threading.Lock()
+_state = {'model': None, 'checked_at': 0.0}
+
+
+# Helper Functions
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def load_ratings(reviews=None):
+    """(user ids, racket ids, ratings) of the given reviews (default: all) as NumPy arrays."""
+    import numpy as np
+
+    reviews = Review.objects.all() if reviews is None else reviews
+    rows = np.array(
+        list(reviews.values_list('user_id', 'racket_id', *RATING_ATTRIBUTES).iterator(chunk_size=10_000)),
+        dtype=np.float64,
+    ).reshape(-1, 2 + len(RATING_ATTRIBUTES))
+    return rows[:, 0].astype(np.int64), rows[:, 1].astype(np.int64), rows[:, 2:].mean(axis=1)
+
+
+def _index(ids, known=None):
+    """Row of every id, adding unseen ids after the `known` ones: (all ids, rows)."""
+    import numpy as np
+
+    known = np.empty(0, dtype=np.int64) if known is None else known
+    new = np.setdiff1d(np.unique(ids), known)
+    all_ids = np.concatenate([known, new])
+    order = np.argsort(all_ids)
+    rows = order[np.searchsorted(all_ids, ids, sorter=order)]
+    return all_ids, rows
+
+
+def _normal_equations(rows, cols, values, other, n):
+    """
+    Sum, for each of the n rows, other[col]ᵀ·other[col] and other[col]·value
+    over that row's ratings: the Gram matrices and right-hand sides of its
+    least-squares problem.
+    """
+    import numpy as np
+
+    k = other.shape[1]
+    gram = np.zeros((n, k * k))
+    rhs = np.zeros((n, k))
+    for start in range(0, len(rows), CHUNK):
+        block = slice(start, start + CHUNK)
+        y = other[cols[block]]
+        np.add.at(gram, rows[block], (y[:, :, None] * y[:, None, :]).reshape(len(y), -1))
+        np.add.at(rhs, rows[block], y * values[block, None])
+    gram = gram.reshape(n, k, k)
+    return gram, rhs
+
+
+def _solve(rows, cols, values, other, n, reg):
+    """
+    Ridge solution for every row at once, with the other side fixed. The
+    penalty grows with the row's rating count (ALS-WR), so heavy reviewers
+    aren't under-regularised and rows without ratings come out as zero.
+    """
+    import numpy as np
+
+    gram, rhs = _normal_equations(rows, cols, values, other, n)
+    counts = np.bincount(rows, minlength=n)
+    gram += (reg * np.maximum(counts, 1))[:, None, None] * np.eye(other.shape[1])
+    return np.linalg.solve(gram, rhs[..., None])[..., 0]
+
+
+def _bias(rows, residuals, n, reg):
+    """Regularised mean residual per row: a bias pulled towards 0 when it rests on few ratings."""
+    import numpy as np
+
+    return np.bincount(rows, weights=residuals, minlength=n) / (np.bincount(rows, minlength=n) + reg)
+
+
+def _rmse(errors):
+    import numpy as np
+
+    return float(np.sqrt(np.mean(errors ** 2))) if len(errors) else None
+
+
+def popular_rackets(limit=POPULAR_SIZE):
+    """
+    Racket ids ranked by their Bayesian-averaged rating, so that a racket
+    needs many good reviews (not one 10/10) to lead: the cold-start list.
+    """
+    rows = list(
+        Review.objects.values('racket_id').annotate(
+            count=Count('id'), total=Sum(sum(F(attribute) for attribute in RATING_ATTRIBUTES)),
+        )
+    )
+    if not rows:
+        return []
+    review_count = sum(row['count'] for row in rows)
+    prior_mean = sum(row['total'] for row in rows) / len(RATING_ATTRIBUTES) / review_count
+    prior_weight = review_count / len(rows)
+    ranked = sorted(
+        rows,
+        key=lambda row: (
+            -bayesian_score(row['total'] / len(RATING_ATTRIBUTES), row['count'], prior_mean, prior_weight),
+            -row['count'], row['racket_id'],
+        ),
+    )
+    return [row['racket_id'] for row in ranked[:limit]]
+
+
+def _arrays(model):
+    """The stored arrays of a RecommenderModel."""
+    import numpy as np
+
+    k = model.factors
+    return {
+        'user_ids': np.frombuffer(model.user_ids, dtype=np.int64),
+        'racket_ids': np.frombuffer(model.racket_ids, dtype=np.int64),
+        'user_bias': np.frombuffer(model.user_bias, dtype=np.float32).astype(np.float64),
+        'racket_bias': np.frombuffer(model.racket_bias, dtype=np.float32).astype(np.float64),
+        'user_factors': np.frombuffer(model.user_factors, dtype=np.float32).reshape(-1, k).astype(np.float64),
+        'racket_factors': np.frombuffer(model.racket_factors, dtype=np.float32).reshape(-1, k).astype(np.float64),
+    }
+
+
+def _save(arrays, factors, global_mean, review_count, rmse, incremental, trained_at):
+    import numpy as np
+
+    def as_bytes(name, dtype):
+        return np.ascontiguousarray(arrays[name], dtype=dtype).tobytes()
+
+    model = RecommenderModel.objects.create(
+        factors=factors, global_mean=global_mean,
+        user_ids=as_bytes('user_ids', np.int64), racket_ids=as_bytes('racket_ids', np.int64),
+        user_bias=as_bytes('user_bias', np.float32), racket_bias=as_bytes('racket_bias', np.float32),
+        user_factors=as_bytes('user_factors', np.float32), racket_factors=as_bytes('racket_factors', np.float32),
+        popular=popular_rackets(), review_count=review_count, rmse=rmse, incremental=incremental,
+        trained_at=trained_at,
+    )
+    keep = _setting('RECOMMENDER_KEEP', 3)
+    stale = RecommenderModel.objects.order_by('-trained_at', '-id').values_list('id', flat=True)[keep:]
+    RecommenderModel.objects.filter(id__in=list(stale)).delete()
+    cache.delete(POPULAR_KEY)
+    return model
+
+
+def train(factors=None, iterations=None, reg=None, incremental=False, seed=0):
+    """
+    Fit the model on every review (or, incrementally, refresh the users and
+    rackets whose reviews changed since the latest model) and store it.
+    Returns the new RecommenderModel, or None when there are no reviews.
+    """
+    previous = RecommenderModel.objects.order_by('-trained_at', '-id').first() if incremental else None
+    if previous is not None:
+        return _train_incremental(previous, reg)
+
+    import numpy as np
+
+    factors = factors or _setting('RECOMMENDER_FACTORS', 16)
+    iterations = iterations or _setting('RECOMMENDER_ITERATIONS', 10)
+    reg = _setting('RECOMMENDER_REGULARIZATION', 0.1) if reg is None else reg
+    trained_at = timezone.now()  # Before reading: writes made during training go to the next run
+
+    user_ids, racket_ids, ratings = load_ratings()
+    if not len(ratings):
+        return None
+    users, user_rows = _index(user_ids)
+    rackets, racket_rows = _index(racket_ids)
+
+    global_mean = ratings.mean()
+    user_bias = np.zeros(len(users))
+    racket_bias = np.zeros(len(rackets))
+    for _ in range(BIAS_SWEEPS):
+        racket_bias = _bias(racket_rows, ratings - global_mean - user_bias[user_rows], len(rackets), reg * 10)
+        user_bias = _bias(user_rows, ratings - global_mean - racket_bias[racket_rows], len(users), reg * 10)
+    residuals = ratings - global_mean - user_bias[user_rows] - racket_bias[racket_rows]
+
+    rng = np.random.default_rng(seed)
+    racket_factors = rng.normal(scale=0.1, size=(len(rackets), factors))
+    user_factors = np.zeros((len(users), factors))
+    for _ in range(iterations):
+        user_factors = _solve(user_rows, racket_rows, residuals, racket_factors, len(users), reg)
+        racket_factors = _solve(racket_rows, user_rows, residuals, user_factors, len(rackets), reg)
+
+    errors = residuals - np.einsum('ij,ij->i', user_factors[user_rows], racket_factors[racket_rows])
+    arrays = {'user_ids': users, 'racket_ids': rackets, 'user_bias': user_bias, 'racket_bias': racket_bias,
+              'user_factors': user_factors, 'racket_factors': racket_factors}
+    return _save(arrays, factors, global_mean, len(ratings), _rmse(errors), False, trained_at)
+
+
+def _train_incremental(previous, reg):
+    """
+    Fold the changes since `previous` in: rackets whose reviews changed are
+    re-solved against the stored user factors, then the users who wrote,
+    edited or deleted a review are re-solved against the updated rackets.
+    New users and rackets get rows; everything else is kept as it was.
+    Returns `previous` itself when nothing changed.
+    """
+    import numpy as np
+
+    reg = _setting('RECOMMENDER_REGULARIZATION', 0.1) if reg is None else reg
+    trained_at = timezone.now()
+    since = previous.trained_at
+    arrays = _arrays(previous)
+    global_mean = previous.global_mean
+
+    changed = Review.objects.filter(Q(racket__updated_at__gt=since) | Q(user__review_stats__updated_at__gt=since))
+    user_ids, racket_ids, ratings = load_ratings(changed)
+    changed_users = set(
+        Review.objects.filter(user__review_stats__updated_at__gt=since).values_list('user_id', flat=True).distinct()
+    )
+    changed_rackets = set(Racket.objects.filter(updated_at__gt=since).values_list('id', flat=True))
+    if not changed_users and not changed_rackets:
+        return previous
+
+    users, user_rows = _index(user_ids, arrays['user_ids'])
+    rackets, racket_rows = _index(racket_ids, arrays['racket_ids'])
+    factors = previous.factors
+
+    def grow(values, size, shape=()):
+        return np.concatenate([values, np.zeros((size - len(values), *shape))])
+
+    user_bias = grow(arrays['user_bias'], len(users))
+    racket_bias = grow(arrays['racket_bias'], len(rackets))
+    user_factors = grow(arrays['user_factors'], len(users), (factors,))
+    racket_factors = grow(arrays['racket_factors'], len(rackets), (factors,))
+
+    # Rackets first, from every rating they now have
+    mask = np.isin(racket_ids, list(changed_rackets))
+    if mask.any():
+        rows, cols, values = racket_rows[mask], user_rows[mask], ratings[mask]
+        touched = np.unique(rows)
+        bias = _bias(rows, values - global_mean - user_bias[cols], len(rackets), reg * 10)
+        solved = _solve(rows, cols, values - global_mean - user_bias[cols] - bias[rows], user_factors, len(rackets), reg)
+        racket_bias[touched], racket_factors[touched] = bias[touched], solved[touched]
+
+    # Then the users, against the updated rackets
+    mask = np.isin(user_ids, list(changed_users))
+    if mask.any():
+        rows, cols, values = user_rows[mask], racket_rows[mask], ratings[mask]
+        touched = np.unique(rows)
+        bias = _bias(rows, values - global_mean - racket_bias[cols], len(users), reg * 10)
+        solved = _solve(rows, cols, values - global_mean - racket_bias[cols] - bias[rows], racket_factors, len(users), reg)
+        user_bias[touched], user_factors[touched] = bias[touched], solved[touched]
+
+    errors = ratings - (global_mean + user_bias[user_rows] + racket_bias[racket_rows]
+                        + np.einsum('ij,ij->i', user_factors[user_rows], racket_factors[racket_rows]))
+    arrays = {'user_ids': users, 'racket_ids': rackets, 'user_bias': user_bias, 'racket_bias': racket_bias,
+              'user_factors': user_factors, 'racket_factors': racket_factors}
+    review_count = Review.objects.count()
+    return _save(arrays, factors, global_mean, review_count, _rmse(errors), True, trained_at)
+
+
+def current_model():
+    """
+    This process's copy of the newest model, as arrays plus an id -> row map
+    for users, or None before the first training. The database is asked for
+    the newest model's id at most every RECOMMENDER_RELOAD_INTERVAL seconds.
+    """
+    now = time.monotonic()
+    if now - _state['checked_at'] < _setting('RECOMMENDER_RELOAD_INTERVAL', 60):
+        return _state['model']
+    with _lock:
+        if now - _state['checked_at'] < _setting('RECOMMENDER_RELOAD_INTERVAL', 60):
+            return _state['model']
+        latest_id = RecommenderModel.objects.order_by('-trained_at', '-id').values_list('id', flat=True).first()
+        loaded = _state['model']
+        if latest_id is None:
+            _state['model'] = None
+        elif loaded is None or loaded['id'] != latest_id:
+            model = RecommenderModel.objects.get(pk=latest_id)
+            arrays = _arrays(model)
+            arrays.update(
+                id=model.id, popular=model.popular,
+                user_rows={user_id: row for row, user_id in enumerate(arrays['user_ids'].tolist())},
+                racket_rows={racket_id: row for row, racket_id in enumerate(arrays['racket_ids'].tolist())},
+            )
+            _state['model'] = arrays
+        _state['checked_at'] = now
+        return _state['model']
+
+
+def _popular_ids():
+    model = current_model()
+    if model is not None:
+        return model['popular']
+    return cache.get_or_set(POPULAR_KEY, popular_rackets, _setting('RECOMMENDER_RELOAD_INTERVAL', 60))
+
+
+def recommended_ids(user_id, limit):
+    """Best `limit` racket ids for the user (popular ones for unknown users), minus those they reviewed."""
+    reviewed = set(Review.objects.filter(user_id=user_id).values_list('racket_id', flat=True)) if user_id else set()
+    model = current_model()
+    row = model['user_rows'].get(user_id) if model is not None and user_id else None
+    if row is None:
+        return [racket_id for racket_id in _popular_ids() if racket_id not in reviewed][:limit]
+
+    import numpy as np
+
+    # The global mean and the user's bias shift every score equally, so they can't change the order
+    scores = model['racket_factors'] @ model['user_factors'][row] + model['racket_bias']
+    excluded = [model['racket_rows'][racket_id] for racket_id in reviewed if racket_id in model['racket_rows']]
+    scores[excluded] = -np.inf
+    wanted = min(limit, len(scores) - len(excluded))
+    if wanted <= 0:
+        return []
+    best = np.argpartition(-scores, wanted - 1)[:wanted]
+    best = best[np.argsort(-scores[best])]
+    return model['racket_ids'][best].tolist()
+
+
+def recommend(user, limit=None):
+    """The rackets to show as "Recommended for you", best first, with their brands loaded."""
+    limit = limit or _setting('RECOMMENDER_SHOWN', 6)
+    user_id = user.pk if user is not None and user.is_authenticated else None
+    ids = recommended_ids(user_id, limit)
+    rackets = Racket.objects.select_related('brand').in_bulk(ids)
+    return [rackets[racket_id] for racket_id in ids if racket_id in rackets]  # Rackets deleted since training drop out
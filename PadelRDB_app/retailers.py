@@ -0,0 +1,30 @@
+"""
+Registry of the stores that racket pages link to.
+
+StoreLink.retailer holds a key from RETAILERS (brand shops use the brand
+name); the registry gives its display name and logo, so templates never
+build static paths from free text. Unknown keys fall back to a plain name.
+"""
+
+from django.templatetags.static import static
+from django.utils.text import slugify
+
+RETAILERS = {
+    'adidas': {'name': 'Adidas', 'logo': 'images/store_logos/adidas.png'},
+    'padelmarket': {'name': 'Padelmarket', 'logo': 'images/store_logos/padelmarket.png'},
+}
+
+
+# Helper Functions
+def retailer_key(name):
+    """'Padel Market' -> 'padel-market': the form stored in StoreLink.retailer."""
+    return slugify(name)
+
+
+def get_retailer(key):
+    return RETAILERS.get(key) or {'name': key.replace('-', ' ').title(), 'logo': None}
+
+
+def logo_url(key):
+    logo = get_retailer(key)['logo']
+    return static(logo) if logo else ''
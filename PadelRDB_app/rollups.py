@@ -0,0 +1,102 @@
+from datetime import date, datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, DateField, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .models import LeaderboardEntry, RatingRollup, Review
+
+ATTRIBUTES = LeaderboardEntry.ATTRIBUTES
+PERIODS = [period for period, label in RatingRollup.PERIODS]
+TRUNCATE = {'week': TruncWeek, 'month': TruncMonth}
+
+
+# Helper Functions
+def period_bounds(day, period):
+    """First day of the week (Monday) or month containing `day`, and the first day of the next one."""
+    if period == 'week':
+        start = day - timedelta(days=day.weekday())
+        return start, start + timedelta(days=7)
+    start = day.replace(day=1)
+    return start, (start + timedelta(days=32)).replace(day=1)
+
+
+def _sums():
+    return {'count': Count('id'), **{f'sum_{attribute}': Sum(attribute) for attribute in ATTRIBUTES}}
+
+
+@transaction.atomic
+def refresh_buckets(racket_id, day):
+    """
+    Recompute the week and month buckets of one racket containing `day`, for
+    both user types. Only reviews inside those buckets are read, so the cost
+    is independent of the racket's total review count.
+    """
+    if isinstance(day, str):
+        day = date.fromisoformat(day)
+
+    for period in PERIODS:
+        start, end = period_bounds(day, period)
+        tz = timezone.get_current_timezone()
+        rows = {
+            row.pop('user_type'): row
+            for row in Review.objects.filter(
+                racket_id=racket_id,
+                created_at__gte=timezone.make_aware(datetime.combine(start, time.min), tz),
+                created_at__lt=timezone.make_aware(datetime.combine(end, time.min), tz),
+            ).values('user_type').annotate(**_sums()).order_by()
+        }
+        buckets = RatingRollup.objects.filter(racket_id=racket_id, period=period, period_start=start)
+        buckets.exclude(user_type__in=rows.keys()).delete()
+        for user_type, sums in rows.items():
+            RatingRollup.objects.update_or_create(
+                racket_id=racket_id, period=period, user_type=user_type, period_start=start,
+                defaults=sums,
+            )
+
+
+@transaction.atomic
+def backfill():
+    """Rebuild every bucket from scratch with one grouped query per period. Returns rows written."""
+    RatingRollup.objects.all().delete()
+    written = 0
+    for period in PERIODS:
+        rows = (
+            Review.objects.annotate(period_start=TRUNCATE[period]('created_at', output_field=DateField()))
+            .values('racket_id', 'user_type', 'period_start')
+            .annotate(**_sums())
+            .order_by()
+        )
+        written += len(RatingRollup.objects.bulk_create(
+            (RatingRollup(period=period, **row) for row in rows.iterator(chunk_size=2000)),
+            batch_size=1000,
+        ))
+    return written
+
+
+def trend_series(racket_id, period, attribute):
+    """
+    Chart data from the pre-bucketed rollups: per-period average and the
+    running average up to each period, for both user types.
+    """
+    rollups = (
+        RatingRollup.objects.filter(racket_id=racket_id, period=period)
+        .order_by('period_start')
+        .values('period_start', 'user_type', 'count', f'sum_{attribute}')
+    )
+    labels = sorted({row['period_start'] for row in rollups})
+    series = {}
+    for user_type, label in Review.USER_TYPES:
+        by_start = {row['period_start']: row for row in rollups if row['user_type'] == user_type}
+        average, running, total, count = [], [], 0, 0
+        for start in labels:
+            row = by_start.get(start)
+            if row:
+                total += row[f'sum_{attribute}']
+                count += row['count']
+            average.append(round(row[f'sum_{attribute}'] / row['count'], 2) if row else None)
+            running.append(round(total / count, 2) if count else None)
+        series[user_type] = {'average': average, 'running_average': running}
+
+    return {'labels': [start.isoformat() for start in labels], 'series': series}
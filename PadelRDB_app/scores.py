@@ -0,0 +1,88 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Avg, Count, Max
+
+from .models import Racket, Review
+
+SPEC_FIELDS = ['core', 'surface', 'weight', 'shape', 'balance', 'gametype', 'finish']
+
+# Template key -> Review field
+SCORE_FIELDS = {
+    'avg_power': 'power',
+    'avg_control': 'control',
+    'avg_comfort': 'comfort',
+    'avg_maneuverability': 'agility',
+    'avg_spin': 'spin',
+    'avg_hard': 'hard',
+    'avg_exit': 'exit',
+}
+
+
+# Helper Functions
+def empty_scores():
+    scores = {key: 0 for key in SCORE_FIELDS}
+    scores['total_reviews'] = 0
+    return scores
+
+
+def score_summary(racket_ids):
+    """
+    Per-user-type averages and review counts for many rackets in one grouped
+    query: {racket_id: {'regular': {...}, 'expert': {...}}}.
+    """
+    summary = {racket_id: {'regular': empty_scores(), 'expert': empty_scores()} for racket_id in racket_ids}
+    rows = (
+        Review.objects.filter(racket__in=racket_ids)
+        .values('racket_id', 'user_type')
+        .annotate(total_reviews=Count('id'), **{key: Avg(field) for key, field in SCORE_FIELDS.items()})
+        .order_by()
+    )
+    for row in rows:
+        racket_id = row.pop('racket_id')
+        user_type = row.pop('user_type')
+        summary[racket_id].setdefault(user_type, empty_scores()).update(row)
+    return summary
+
+
+def data_version(slugs):
+    """
+    How many of the rackets exist and the newest updated_at among them and
+    their brands; review writes bump Racket.updated_at (see signals.py). Read
+    from the database, so every worker agrees on it whatever the cache backend.
+    """
+    row = Racket.objects.filter(slug__in=slugs).aggregate(
+        count=Count('id'), racket=Max('updated_at'), brand=Max('brand__updated_at'),
+    )
+    return f"{row['count']}:{row['racket']}:{row['brand']}"
+
+
+def comparison_data(slugs):
+    """
+    Specs and scores for the given rackets in two queries whatever their number,
+    cached by the sorted slug set and its data_version(). Returns a list in
+    the order of `slugs`.
+    """
+    slugs = list(dict.fromkeys(slugs))
+    key_source = f"{','.join(sorted(slugs))}|{data_version(slugs)}"
+    cache_key = f"compare:{hashlib.md5(key_source.encode()).hexdigest()}"
+
+    by_slug = cache.get(cache_key)
+    if by_slug is None:
+        rackets = list(Racket.objects.filter(slug__in=slugs).select_related('brand'))
+        summary = score_summary([racket.id for racket in rackets])
+        by_slug = {
+            racket.slug: {
+                'slug': racket.slug,
+                'name': racket.name,
+                'brand': racket.brand.name,
+                'thumbnail': racket.thumbnail.url if racket.thumbnail else '',
+                'specs': {field: getattr(racket, field) for field in SPEC_FIELDS},
+                'scores': summary[racket.id],
+            }
+            for racket in rackets
+        }
+        cache.set(cache_key, by_slug, getattr(settings, 'COMPARE_CACHE_TIMEOUT', 300))
+
+    return [by_slug[slug] for slug in slugs if slug in by_slug]
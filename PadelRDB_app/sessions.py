@@ -0,0 +1,102 @@
+"""
+Cache-backed sessions with write-behind to the database.
+
+Reads come from the cache (falling back to the database after an eviction
+or restart). Writes go to the cache at once, and the session key is added
+to a Redis set of dirty sessions: no database query on the request path.
+The run_jobs worker calls `flush_dirty()` every SESSION_WRITE_BEHIND_DELAY
+seconds, which pops the set and writes each cached copy to the database, so
+a burst of writes to one session costs one database write. New sessions and
+changes to the logged-in user are written through immediately, so a lost
+cache entry can never resurrect a logged-out user or drop a login. With a
+delay of 0, or a cache other than Redis, every write goes through.
+
+Only use this engine with a cache shared by every worker (Redis): with a
+per-process cache, a session deleted in one worker (logout, password
+change) would stay valid in the others until their copy expires.
+settings.py falls back to the database engine without REDIS_URL.
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.sessions.backends import cached_db
+from django.contrib.sessions.backends.base import UpdateError
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+from django.utils import timezone
+
+AUTH_KEYS = (SESSION_KEY, BACKEND_SESSION_KEY, HASH_SESSION_KEY)
+CLEANUP_BATCH_SIZE = 1000
+DIRTY_KEY = 'sessions:dirty'
+FLUSH_BATCH_SIZE = 500
+
+
+# Helper Functions
+def _redis(cache):
+    """The raw client behind a RedisCache, or None for other backends."""
+    if cache.__class__.__name__ != 'RedisCache':
+        return None
+    return cache._cache.get_client(write=True)
+
+
+class SessionStore(cached_db.SessionStore):
+    def load(self):
+        data = super().load()
+        self._loaded_auth = tuple(data.get(key) for key in AUTH_KEYS)
+        return data
+
+    def _auth_changed(self):
+        current = tuple(self._session.get(key) for key in AUTH_KEYS)
+        return current != getattr(self, '_loaded_auth', (None, None, None))
+
+    def save(self, must_create=False):
+        delay = getattr(settings, 'SESSION_WRITE_BEHIND_DELAY', 0)
+        client = _redis(self._cache)
+        if must_create or not delay or client is None or self.session_key is None or self._auth_changed():
+            return super().save(must_create)
+
+        self._cache.set(self.cache_key, self._get_session(), self.get_expiry_age())
+        client.sadd(self._cache.make_key(DIRTY_KEY), self.session_key)
+
+    def persist(self):
+        """Write the cached copy to the database (see flush_dirty)."""
+        data = self._cache.get(self.cache_key)
+        if data is None:
+            return  # Expired, deleted or evicted: the database copy is all there is
+        self._session_cache = data
+        try:
+            DBStore.save(self)
+        except UpdateError:
+            pass  # Deleted (logged out) since the job was queued
+
+    @classmethod
+    def flush_dirty(cls):
+        """
+        Write every session saved since the last flush to the database. Each
+        key is popped from the set by one worker only. Returns how many.
+        """
+        cache = caches[settings.SESSION_CACHE_ALIAS]
+        client = _redis(cache)
+        if client is None:
+            return 0
+        flushed = 0
+        while True:
+            keys = client.spop(cache.make_key(DIRTY_KEY), FLUSH_BATCH_SIZE)
+            if not keys:
+                return flushed
+            for key in keys:
+                cls(key.decode() if isinstance(key, bytes) else key).persist()
+            flushed += len(keys)
+
+    @classmethod
+    def clear_expired(cls):
+        """Delete expired rows in small batches so cleanup never holds a long lock."""
+        model = cls.get_model_class()
+        while True:
+            keys = list(
+                model.objects.filter(expire_date__lt=timezone.now())
+                .values_list('session_key', flat=True)[:CLEANUP_BATCH_SIZE]
+            )
+            if not keys:
+                break
+            model.objects.filter(session_key__in=keys).delete()
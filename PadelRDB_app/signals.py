@@ -0,0 +1,113 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .duplicates import index_review
+from .jobs import enqueue
+from .images import IMAGE_FIELDS, is_stale
+from .models import Brand, CustomUser, Racket, RacketImage, RacketVideo, Review, StoreLink, UserReviewStats
+from .tasks import (
+    compute_image_details, delete_media, rebuild_leaderboards, refresh_leaderboards, refresh_recommendations,
+    refresh_rollups,
+)
+from .usercache import forget_user
+
+
+# Keep derived review data up to date after every review write, without
+# slowing down the request: the work is queued once the write has committed.
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def review_changed(sender, instance, **kwargs):
+    racket_id = instance.racket_id
+    user_id = instance.user_id
+    # One aggregate over the author's reviews: cheap enough to keep their profile stats current inline
+    transaction.on_commit(lambda: _refresh_user_stats(user_id))
+    # Scores are part of the racket's public data, so incremental API syncs and cached comparisons must see the change
+    transaction.on_commit(lambda: Racket.objects.filter(pk=racket_id).update(updated_at=timezone.now()))
+    transaction.on_commit(
+        lambda: enqueue(refresh_leaderboards, {'racket_id': racket_id}, dedup_key=f"leaderboard:{racket_id}")
+    )
+    # The review moved the global means too: one debounced rebuild re-scores the other rackets
+    rebuild_delay = timedelta(seconds=getattr(settings, 'LEADERBOARD_REBUILD_DELAY', 300))
+    transaction.on_commit(
+        lambda: enqueue(rebuild_leaderboards, dedup_key='leaderboards:rebuild', delay=rebuild_delay)
+    )
+    if instance.created_at:
+        day = timezone.localdate(instance.created_at).isoformat()
+        transaction.on_commit(
+            lambda: enqueue(refresh_rollups, {'racket_id': racket_id, 'day': day}, dedup_key=f"rollup:{racket_id}:{day}")
+        )
+    if kwargs.get('signal') is post_save:
+        # Inline, so that the next submission already sees this comment as a possible duplicate
+        review_id, comment = instance.pk, instance.comment
+        transaction.on_commit(lambda: index_review(review_id, comment))
+    # One debounced run folds every write of the next few minutes into the recommender
+    delay = timedelta(seconds=getattr(settings, 'RECOMMENDER_RETRAIN_DELAY', 600))
+    transaction.on_commit(lambda: enqueue(refresh_recommendations, dedup_key='recommendations', delay=delay))
+
+
+def _refresh_user_stats(user_id):
+    if CustomUser.objects.filter(pk=user_id).exists():
+        UserReviewStats.refresh(user_id)
+
+
+# Brand names, store links and videos are part of a racket's public data, so
+# API syncs (changed_since, ETags) and static exports must see them change:
+# writing them bumps Racket.updated_at. The crawler and fetch_video_details
+# write with update(), which sends no signal, and bump it themselves.
+@receiver(post_save, sender=StoreLink)
+@receiver(post_delete, sender=StoreLink)
+@receiver(post_save, sender=RacketVideo)
+@receiver(post_delete, sender=RacketVideo)
+def racket_data_changed(sender, instance, **kwargs):
+    racket_id = instance.racket_id
+    transaction.on_commit(lambda: Racket.objects.filter(pk=racket_id).update(updated_at=timezone.now()))
+
+
+@receiver(post_save, sender=Brand)
+def brand_changed(sender, instance, created, **kwargs):
+    if created:
+        return
+    brand_id = instance.pk
+    transaction.on_commit(lambda: Racket.objects.filter(brand_id=brand_id).update(updated_at=timezone.now()))
+
+
+# Measure new uploads once, in the background. Profile photos are measured by
+# process_profile_photo after downscaling instead.
+@receiver(post_save, sender=Racket)
+@receiver(post_save, sender=RacketImage)
+@receiver(post_save, sender=Brand)
+def image_saved(sender, instance, **kwargs):
+    model = sender._meta.label
+    for field in IMAGE_FIELDS[model]:
+        if is_stale(instance, field):
+            payload = {'model': model, 'pk': instance.pk, 'field': field}
+            dedup_key = f"image-details:{model}:{instance.pk}:{field}"
+            transaction.on_commit(
+                lambda payload=payload, dedup_key=dedup_key: enqueue(compute_image_details, payload, dedup_key=dedup_key)
+            )
+
+
+# A deleted racket, gallery image, brand or user takes its files along (cascades
+# included); delete_media keeps any file another row still points to.
+@receiver(post_delete, sender=Racket)
+@receiver(post_delete, sender=RacketImage)
+@receiver(post_delete, sender=Brand)
+@receiver(post_delete, sender=CustomUser)
+def files_deleted(sender, instance, **kwargs):
+    names = [getattr(instance, field).name for field in IMAGE_FIELDS[sender._meta.label]]
+    names = [name for name in names if name]
+    if names:
+        transaction.on_commit(lambda: enqueue(delete_media, {'names': names}))
+
+
+# The cached copy used by CachedAuthenticationMiddleware must not outlive a change
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def user_changed(sender, instance, **kwargs):
+    user_id = instance.pk
+    transaction.on_commit(lambda: forget_user(user_id))
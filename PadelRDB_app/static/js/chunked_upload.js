@@ -0,0 +1,123 @@
+// Chunked, resumable uploads for the admin change form (see PadelRDB_app/uploads.py).
+// Several files upload at once; each one is split into chunks that are retried on failure,
+// and a session id kept in localStorage lets a re-dropped file resume where it stopped.
+(function () {
+    const zone = document.getElementById("chunked-upload");
+    if (!zone) {
+        return;
+    }
+    const list = document.getElementById("chunked-upload-list");
+    const input = zone.querySelector("input[type=file]");
+    const target = zone.dataset.target;
+    const targetId = zone.dataset.targetId;
+    const CONCURRENT_FILES = 3;
+    const CHUNK_RETRIES = 5;
+
+    function getCSRFToken() {
+        return document.cookie.split("; ")
+            .find(row => row.startsWith("csrftoken="))
+            ?.split("=")[1];
+    }
+
+    async function api(url, options = {}) {
+        const response = await fetch(url, {
+            credentials: "same-origin",
+            ...options,
+            headers: { "X-CSRFToken": getCSRFToken(), ...(options.headers || {}) },
+        });
+        const data = await response.json();
+        if (!response.ok) {
+            throw new Error(data.error || response.statusText);
+        }
+        return data;
+    }
+
+    async function withRetry(fn) {
+        for (let attempt = 1; ; attempt++) {
+            try {
+                return await fn();
+            } catch (error) {
+                if (attempt >= CHUNK_RETRIES) {
+                    throw error;
+                }
+                await new Promise(resolve => setTimeout(resolve, 1000 * 2 ** attempt));
+            }
+        }
+    }
+
+    async function openSession(file) {
+        const key = `chunked-upload:${target}:${targetId}:${file.name}:${file.size}:${file.lastModified}`;
+        const savedId = localStorage.getItem(key);
+        if (savedId) {
+            try {
+                const session = await api(`/uploads/${savedId}/`);
+                if (session.status === "uploading") {
+                    return { key, session };
+                }
+            } catch (error) {
+                // Expired or unknown session: start over
+            }
+        }
+        const session = await api("/uploads/", {
+            method: "POST",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify({ filename: file.name, size: file.size, target: target, target_id: targetId }),
+        });
+        localStorage.setItem(key, session.id);
+        return { key, session };
+    }
+
+    async function uploadFile(file, row) {
+        const { key, session } = await openSession(file);
+        const received = new Set(session.received_chunks);
+
+        for (let index = 0; index < session.chunk_count; index++) {
+            if (!received.has(index)) {
+                const chunk = file.slice(index * session.chunk_size, (index + 1) * session.chunk_size);
+                await withRetry(() => api(`/uploads/${session.id}/chunks/${index}/`, { method: "PUT", body: chunk }));
+            }
+            row.textContent = `${file.name}: ${Math.round(((index + 1) / session.chunk_count) * 100)}%`;
+        }
+
+        let status = await withRetry(() => api(`/uploads/${session.id}/complete/`, { method: "POST" }));
+        localStorage.removeItem(key);
+        row.textContent = `${file.name}: processing…`;
+        while (status.status === "assembling") {
+            await new Promise(resolve => setTimeout(resolve, 2000));
+            status = await api(`/uploads/${session.id}/`);
+        }
+        if (status.status !== "done") {
+            throw new Error(status.error || "Processing failed");
+        }
+        row.textContent = `${file.name}: done (reload to see it)`;
+    }
+
+    async function uploadAll(files) {
+        const queue = Array.from(files);
+        if (zone.dataset.single) {
+            queue.splice(1);
+        }
+        async function worker() {
+            while (queue.length) {
+                const file = queue.shift();
+                const row = document.createElement("li");
+                row.textContent = `${file.name}: waiting…`;
+                list.appendChild(row);
+                try {
+                    await uploadFile(file, row);
+                } catch (error) {
+                    row.textContent = `${file.name}: failed (${error.message}). Drop it again to resume.`;
+                }
+            }
+        }
+        await Promise.all(Array.from({ length: CONCURRENT_FILES }, worker));
+    }
+
+    zone.addEventListener("click", () => input.click());
+    input.addEventListener("change", () => uploadAll(input.files));
+    zone.addEventListener("dragover", event => event.preventDefault());
+    zone.addEventListener("drop", event => {
+        event.preventDefault();
+        uploadAll(event.dataTransfer.files);
+    });
+})();
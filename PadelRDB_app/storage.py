@@ -0,0 +1,247 @@
+import hashlib
+import hmac
+import mimetypes
+import os
+import posixpath
+import shutil
+import time
+from datetime import datetime, timezone
+from urllib.parse import quote, urlencode
+
+from django.conf import settings
+from django.core.files.base import File
+from django.core.files.storage import Storage
+from django.utils.deconstruct import deconstructible
+
+
+# Helper Functions
+def _is_not_found(error):
+    """True if a client error means the key does not exist (boto3 or stand-in)."""
+    code = getattr(error, 'response', {}).get('Error', {}).get('Code')
+    return code in ('404', 'NoSuchKey', 'NotFound')
+
+
+class ObjectNotFound(Exception):
+    """Raised by LocalObjectClient, shaped like botocore's ClientError."""
+
+    def __init__(self, key):
+        super().__init__(f"Object not found: {key}")
+        self.response = {'Error': {'Code': 'NoSuchKey', 'Key': key}}
+
+
+class LocalObjectClient:
+    """
+    In-process stand-in for the subset of the boto3 S3 client used by
+    ObjectStorage. Objects are plain files under `root/<bucket>/<key>`, so the
+    backend can be exercised in development and tests without an object store.
+    """
+
+    def __init__(self, root):
+        self.root = str(root)
+
+    def _path(self, bucket, key):
+        return os.path.join(self.root, bucket, *key.split('/'))
+
+    def upload_fileobj(self, fileobj, bucket, key, ExtraArgs=None, Config=None):
+        path = self._path(bucket, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as destination:
+            shutil.copyfileobj(fileobj, destination, 1024 * 1024)
+
+    def get_object(self, Bucket, Key):
+        path = self._path(Bucket, Key)
+        if not os.path.isfile(path):
+            raise ObjectNotFound(Key)
+        return {'Body': open(path, 'rb'), 'ContentLength': os.path.getsize(path)}
+
+    def head_object(self, Bucket, Key):
+        path = self._path(Bucket, Key)
+        if not os.path.isfile(path):
+            raise ObjectNotFound(Key)
+        stat = os.stat(path)
+        return {
+            'ContentLength': stat.st_size,
+            'LastModified': datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc),
+        }
+
+    def delete_object(self, Bucket, Key):
+        path = self._path(Bucket, Key)
+        if os.path.isfile(path):
+            os.remove(path)
+
+    def get_paginator(self, operation):
+        return _LocalListPaginator(self)
+
+
+class _LocalListPaginator:
+    def __init__(self, client):
+        self.client = client
+
+    def paginate(self, Bucket, Prefix='', Delimiter=None):
+        base = os.path.join(self.client.root, Bucket)
+        contents, prefixes = [], set()
+        for dirpath, dirnames, filenames in os.walk(base):
+            for filename in filenames:
+                key = os.path.relpath(os.path.join(dirpath, filename), base).replace(os.sep, '/')
+                if not key.startswith(Prefix):
+                    continue
+                rest = key[len(Prefix):]
+                if Delimiter and Delimiter in rest:
+                    prefixes.add(Prefix + rest.split(Delimiter, 1)[0] + Delimiter)
+                else:
+                    contents.append({'Key': key, 'Size': os.path.getsize(os.path.join(dirpath, filename))})
+        yield {
+            'Contents': sorted(contents, key=lambda item: item['Key']),
+            'CommonPrefixes': [{'Prefix': prefix} for prefix in sorted(prefixes)],
+        }
+
+
+@deconstructible
+class ObjectStorage(Storage):
+    """
+    Storage backend for an S3-compatible object store.
+
+    Uploads go through `upload_fileobj`, which switches to multipart above
+    `multipart_threshold`. URLs are built locally from `base_url` (or the CDN
+    domain) so `.url` never touches the network. When `signing_key` is set,
+    URLs carry an expiry and an HMAC signature for token-authenticated CDNs.
+    """
+
+    def __init__(self, bucket=None, location='', endpoint_url=None, region_name=None,
+                 access_key=None, secret_key=None, base_url=None, cdn_domain=None,
+                 signing_key=None, url_expiry=3600, multipart_threshold=8 * 1024 * 1024,
+                 multipart_chunksize=8 * 1024 * 1024, max_concurrency=4, local_root=None):
+        self.bucket = bucket
+        self.location = location.strip('/')
+        self.endpoint_url = endpoint_url
+        self.region_name = region_name
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.cdn_domain = cdn_domain
+        self.signing_key = signing_key
+        self.url_expiry = int(url_expiry)
+        self.multipart_threshold = multipart_threshold
+        self.multipart_chunksize = multipart_chunksize
+        self.max_concurrency = max_concurrency
+        self.local_root = local_root
+
+        if cdn_domain:
+            self.base_url = f"https://{cdn_domain.rstrip('/')}/"
+        elif base_url:
+            self.base_url = base_url.rstrip('/') + '/'
+        elif local_root:
+            # Stand-in objects live under MEDIA_ROOT, so the DEBUG media route serves them
+            self.base_url = f"{settings.MEDIA_URL}{bucket}/"
+        else:
+            self.base_url = f"{(endpoint_url or 'https://s3.amazonaws.com').rstrip('/')}/{bucket}/"
+
+        self._client = None
+        self._transfer_config = None
+
+    @property
+    def client(self):
+        # Created on first use so importing settings never pulls in boto3
+        if self._client is None:
+            if self.local_root:
+                self._client = LocalObjectClient(self.local_root)
+            else:
+                import boto3
+                from boto3.s3.transfer import TransferConfig
+
+                self._client = boto3.client(
+                    's3',
+                    endpoint_url=self.endpoint_url,
+                    region_name=self.region_name,
+                    aws_access_key_id=self.access_key,
+                    aws_secret_access_key=self.secret_key,
+                )
+                self._transfer_config = TransferConfig(
+                    multipart_threshold=self.multipart_threshold,
+                    multipart_chunksize=self.multipart_chunksize,
+                    max_concurrency=self.max_concurrency,
+                )
+        return self._client
+
+    def _key(self, name):
+        name = name.replace('\\', '/').lstrip('/')
+        return posixpath.join(self.location, name) if self.location else name
+
+    def _head(self, name):
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self._key(name))
+        except Exception as error:
+            if _is_not_found(error):
+                return None
+            raise
+
+    def _open(self, name, mode='rb'):
+        if 'w' in mode or 'a' in mode:
+            raise ValueError("ObjectStorage only opens files for reading.")
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=self._key(name))
+        except Exception as error:
+            if _is_not_found(error):
+                raise FileNotFoundError(name) from error
+            raise
+        return File(response['Body'], name=name)
+
+    def _save(self, name, content):
+        content_type = getattr(content, 'content_type', None) or mimetypes.guess_type(name)[0]
+        extra_args = {'ContentType': content_type} if content_type else {}
+        try:
+            content.seek(0)
+        except (AttributeError, OSError):
+            pass  # Non-seekable streams (e.g. a request body) are read from where they are
+        # Stream the underlying file object; never read the upload into memory
+        fileobj = getattr(content, 'file', content)
+        self.client.upload_fileobj(
+            fileobj, self.bucket, self._key(name),
+            ExtraArgs=extra_args, Config=self._transfer_config,
+        )
+        return name.replace('\\', '/')
+
+    def delete(self, name):
+        if name:
+            self.client.delete_object(Bucket=self.bucket, Key=self._key(name))
+
+    def exists(self, name):
+        return self._head(name) is not None
+
+    def size(self, name):
+        head = self._head(name)
+        if head is None:
+            raise FileNotFoundError(name)
+        return head['ContentLength']
+
+    def get_modified_time(self, name):
+        head = self._head(name)
+        if head is None:
+            raise FileNotFoundError(name)
+        return head['LastModified']
+
+    def listdir(self, path):
+        prefix = self._key(path).rstrip('/')
+        prefix = f"{prefix}/" if prefix else ''
+        directories, files = [], []
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix, Delimiter='/'):
+            for entry in page.get('CommonPrefixes', []):
+                directories.append(entry['Prefix'][len(prefix):].rstrip('/'))
+            for entry in page.get('Contents', []):
+                files.append(entry['Key'][len(prefix):])
+        return directories, files
+
+    def url(self, name):
+        key = self._key(name)
+        url = self.base_url + quote(key)
+        if not self.signing_key:
+            return url
+
+        # Round the expiry to a window so repeated renders share one cacheable URL
+        now = int(time.time())
+        expires = (now // self.url_expiry + 2) * self.url_expiry
+        return f"{url}?{urlencode({'expires': expires, 'signature': self.sign('/' + key, expires)})}"
+
+    def sign(self, path, expires):
+        message = f"{path}:{expires}".encode()
+        return hmac.new(self.signing_key.encode(), message, hashlib.sha256).hexdigest()
@@ -0,0 +1,127 @@
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from .images import refresh_details
+from .jobs import task
+from .models import CustomUser, Racket, RacketVideo
+from .usercache import forget_user
+
+
+# Fetch oEmbed details for the videos of a racket that don't have them yet
+@task(queue='network', priority=5)
+def fetch_video_details(racket_id):
+    racket = Racket.objects.filter(pk=racket_id).first()
+    if racket is None:
+        return
+    fetched = 0
+    for video in RacketVideo.objects.filter(racket_id=racket_id, fetched_at__isnull=True):
+        info = racket.get_video_details(video.url)
+        # update() so a concurrent admin edit of the URL or position is not overwritten
+        fetched += RacketVideo.objects.filter(pk=video.pk, url=video.url).update(
+            title=(info['title'] or '')[:255], creator=(info['creator'] or '')[:255],
+            thumbnail=info['thumbnail'] or video.thumbnail, fetched_at=timezone.now(),
+        )
+    if fetched:
+        # update() sends no signal: bump the racket as signals.racket_data_changed would
+        Racket.objects.filter(pk=racket_id).update(updated_at=timezone.now())
+
+
+# Downscale a freshly uploaded profile photo and remove the one it replaced
+@task(queue='media', priority=10)
+def process_profile_photo(user_id, name, previous=None):
+    if previous:
+        default_storage.delete(previous)
+
+    user = CustomUser.objects.filter(pk=user_id).first()
+    if user is None or user.profile_image.name != name:
+        return  # The user was deleted or uploaded another photo meanwhile
+
+    from PIL import Image
+
+    max_size = getattr(settings, 'PROFILE_IMAGE_MAX_SIZE', 512)
+    with default_storage.open(name) as source:
+        image = Image.open(source)
+        image.load()
+    if max(image.size) > max_size:
+        image_format = image.format or 'PNG'
+        image.thumbnail((max_size, max_size))
+        buffer = BytesIO()
+        image.save(buffer, format=image_format)
+        default_storage.delete(name)
+        saved_name = default_storage.save(name, ContentFile(buffer.getvalue()))
+        if saved_name != name:
+            CustomUser.objects.filter(pk=user_id, profile_image=name).update(profile_image=saved_name)
+
+    # Measured here rather than by compute_image_details so it sees the downscaled file
+    refresh_details(CustomUser, user_id, 'profile_image')
+    forget_user(user_id)  # The rows were changed with update(), which sends no signal
+
+
+# Remove files that are no longer referenced
+@task(queue='media')
+def delete_media(names):
+    from .maintenance import referenced_among
+
+    names = [name for name in names if name]
+    kept = referenced_among(names)  # Rows may share a file (e.g. seeded placeholders)
+    for name in names:
+        if name not in kept:
+            default_storage.delete(name)
+
+
+# Record the size and placeholder of a newly uploaded image
+@task(queue='media', priority=4)
+def compute_image_details(model, pk, field):
+    refresh_details(apps.get_model(model), pk, field)
+
+
+# Move a racket to its new place on every leaderboard after its reviews changed
+@task(queue='leaderboards', priority=3)
+def refresh_leaderboards(racket_id):
+    from .leaderboards import update_racket
+    update_racket(racket_id)
+
+
+# Re-score every racket against the global means the latest reviews moved (see leaderboards.update_racket)
+@task(queue='leaderboards', priority=1)
+def rebuild_leaderboards():
+    from .leaderboards import rebuild_all
+    rebuild_all()
+
+
+# Recompute the weekly/monthly rating buckets a review write touched
+@task(queue='aggregates', priority=2)
+def refresh_rollups(racket_id, day):
+    from .rollups import refresh_buckets
+    refresh_buckets(racket_id, day)
+
+
+# Assemble a finished chunked upload into its gallery image or brand logo
+@task(queue='media', priority=8, max_attempts=3)
+def assemble_upload(session_id):
+    from .models import UploadSession
+    from .uploads import assemble, discard_chunks
+
+    session = UploadSession.objects.filter(pk=session_id, status='assembling').first()
+    if session is None:
+        return
+    try:
+        assemble(session)
+    except ValueError as error:
+        # Bad input won't get better on retry
+        session.status = 'failed'
+        session.error = str(error)
+        session.save(update_fields=['status', 'error', 'updated_at'])
+        discard_chunks(session)
+
+
+# Fold the review writes of the last few minutes into the recommender (see recommendations.py)
+@task(queue='aggregates', priority=1)
+def refresh_recommendations():
+    from .recommendations import train
+    train(incremental=True)
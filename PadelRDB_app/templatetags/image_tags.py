@@ -0,0 +1,20 @@
+from django import template
+from django.utils.html import format_html, mark_safe
+
+register = template.Library()
+
+
+@register.simple_tag
+def image_attrs(file, details, lazy=True, placeholder=True):
+    """
+    Extra <img> attributes from an image's stored details (see images.py):
+    intrinsic width/height, the blurred placeholder as background, and native
+    lazy loading. Stale details (for a previous file) are ignored.
+    """
+    attrs = mark_safe(' loading="lazy" decoding="async"') if lazy else mark_safe(' decoding="async"')
+    if not details or not file or details.get('name') != file.name:
+        return attrs
+    attrs = format_html(' width="{}" height="{}"', details['width'], details['height']) + attrs
+    if placeholder and details.get('placeholder'):
+        attrs += format_html(' style="background: url({}) center / cover no-repeat;"', details['placeholder'])
+    return attrs
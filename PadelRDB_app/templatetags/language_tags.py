@@ -0,0 +1,16 @@
+from django import template
+from django.conf import settings
+from django.urls import translate_url
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def translated_url(context, language):
+    """The current page in `language`: the same URL under that language's i18n_patterns prefix."""
+    return translate_url(context['request'].get_full_path(), language)
+
+
+@register.simple_tag
+def language_cookie_name():
+    return settings.LANGUAGE_COOKIE_NAME
@@ -0,0 +1,27 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+SEGMENTS = 10
+
+# Every possible bar, built once: a render is a list lookup
+BARS = [
+    mark_safe(
+        '<div class="rating-bar">'
+        + '<div class="bar filled"></div>' * filled
+        + '<div class="bar"></div>' * (SEGMENTS - filled)
+        + '</div>'
+    )
+    for filled in range(SEGMENTS + 1)
+]
+
+
+@register.simple_tag
+def score_bar(value):
+    """10-segment rating bar with one filled segment per whole point of `value` (None counts as 0)."""
+    try:
+        filled = int(float(value or 0))
+    except (TypeError, ValueError):
+        filled = 0
+    return BARS[max(0, min(filled, SEGMENTS))]
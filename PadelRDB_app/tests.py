@@ -1,3 +1,418 @@
-from django.test import TestCase
+import asyncio
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
 
-# Create your tests here.
+from django.core.files.base import ContentFile
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from . import jobs, ratelimit
+from .crawler import DEAD_AFTER, crawl, links_to_check, record
+from .models import Brand, CustomUser, Job, Racket, Review, StoreLink
+from .prerender import changed_since
+from .storage import ObjectStorage
+
+
+# Helper Functions
+class StandInShop(BaseHTTPRequestHandler):
+    """
+    Local stand-in for a retailer site. Paths: /robots.txt (ROBOTS),
+    /etag (200 with an ETag, 304 when it is sent back), /slow (SLOW seconds),
+    /gone (404), /error (500); anything else is a product page with a price.
+    """
+
+    ROBOTS = "User-agent: *\nDisallow: /private\n"
+    ETAG = '"v1"'
+    SLOW = 0.3
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append(self.path)
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            self._respond()
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def _respond(self):
+        if self.path == '/robots.txt':
+            return self._send(200, self.ROBOTS)
+        if self.path == '/etag' and self.headers.get('If-None-Match') == self.ETAG:
+            return self._send(304, '')
+        if self.path == '/gone':
+            return self._send(404, 'Not found')
+        if self.path == '/error':
+            return self._send(500, 'Oops')
+        if self.path.startswith('/slow'):
+            time.sleep(self.SLOW)
+        self._send(200, '<meta property="product:price:amount" content="199.95">'
+                        '<meta property="product:price:currency" content="EUR">', etag=self.ETAG)
+
+    def _send(self, status, body, etag=None):
+        body = body.encode()
+        self.send_response(status)
+        if etag:
+            self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StandInServerMixin:
+    def setUp(self):
+        super().setUp()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StandInShop)
+        self.server.lock = threading.Lock()
+        self.server.requests, self.server.in_flight, self.server.max_in_flight = [], 0, 0
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        super().tearDown()
+
+
+# Tests
+class ObjectStorageTests(SimpleTestCase):
+    """ObjectStorage against the in-process stand-in client (LocalObjectClient)."""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.storage = ObjectStorage(bucket='media-bucket', location='media', local_root=self.root,
+                                     base_url='https://media.example.com')
+
+    def test_save_open_exists_size(self):
+        name = self.storage.save('racket_images/a.png', ContentFile(b'12345'))
+        self.assertEqual(name, 'racket_images/a.png')
+        self.assertTrue(self.storage.exists(name))
+        self.assertFalse(self.storage.exists('racket_images/b.png'))
+        self.assertEqual(self.storage.size(name), 5)
+        with self.storage.open(name) as file:
+            self.assertEqual(file.read(), b'12345')
+        with self.assertRaises(FileNotFoundError):
+            self.storage.size('racket_images/b.png')
+
+    def test_collision_is_renamed(self):
+        first = self.storage.save('brand_logos/logo.png', ContentFile(b'one'))
+        second = self.storage.save('brand_logos/logo.png', ContentFile(b'two'))
+        self.assertNotEqual(first, second)
+        self.assertTrue(second.startswith('brand_logos/logo_') and second.endswith('.png'))
+        with self.storage.open(first) as file:
+            self.assertEqual(file.read(), b'one')
+
+    def test_url(self):
+        self.assertEqual(self.storage.url('brands/x y/a.png'), 'https://media.example.com/media/brands/x%20y/a.png')
+
+    def test_signed_url(self):
+        storage = ObjectStorage(bucket='media-bucket', local_root=self.root, cdn_domain='cdn.example.com',
+                                signing_key='secret', url_expiry=60)
+        url = urlsplit(storage.url('a.png'))
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        self.assertEqual((url.netloc, url.path), ('cdn.example.com', '/a.png'))
+        self.assertGreater(int(query['expires']), time.time())
+        self.assertEqual(query['signature'], storage.sign('/a.png', int(query['expires'])))
+
+    def test_listdir(self):
+        for name in ('brands/x/r1/a.png', 'brands/x/r2/b.png', 'brands/x/c.png', 'other.png'):
+            self.storage.save(name, ContentFile(b'x'))
+        self.assertEqual(self.storage.listdir('brands/x'), (['r1', 'r2'], ['c.png']))
+        self.assertEqual(self.storage.listdir(''), (['brands'], ['other.png']))
+
+    def test_delete(self):
+        name = self.storage.save('a.png', ContentFile(b'x'))
+        self.storage.delete(name)
+        self.assertFalse(self.storage.exists(name))
+        self.storage.delete(name)  # Deleting a missing object is not an error, as on S3
+
+
+class CrawlerTests(StandInServerMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        brand = Brand.objects.create(name='brand', logo='brand_logos/brand.png')
+        self.racket = Racket.objects.create(
+            brand=brand, name='Racket', core='EVA', surface='Carbon', weight='360g', shape='Round',
+            balance='Medium', gametype='Control', finish='Matte', thumbnail='brands/brand/racket.png',
+        )
+
+    def link(self, path):
+        return StoreLink.objects.create(racket=self.racket, retailer='shop', url=self.base_url + path)
+
+    def check(self, **options):
+        options = {'per_host': 2, 'concurrency': 20, 'timeout': 5.0, 'delay': 0, **options}
+        return record(asyncio.run(crawl(links_to_check(), **options)))
+
+    def test_price_and_etag_then_not_modified(self):
+        link = self.link('/etag')
+        self.assertEqual(self.check()['ok'], 1)
+        link.refresh_from_db()
+        self.assertEqual((link.status, link.etag, str(link.price), link.currency), ('ok', '"v1"', '199.95', 'EUR'))
+
+        counts = self.check()
+        link.refresh_from_db()
+        self.assertEqual(counts['not_modified'], 1)
+        self.assertEqual((link.http_status, link.status, link.price_snapshots.count()), (304, 'ok', 1))
+
+    def test_price_change_bumps_the_racket(self):
+        link = self.link('/product')
+        self.check()
+        self.racket.refresh_from_db()
+        checked = self.racket.updated_at
+
+        self.check()  # Same price, same status
+        self.racket.refresh_from_db()
+        self.assertEqual(self.racket.updated_at, checked)
+
+        StoreLink.objects.filter(pk=link.pk).update(price='150.00')
+        self.check()
+        self.racket.refresh_from_db()
+        self.assertGreater(self.racket.updated_at, checked)
+
+    def test_price_change_reaches_incremental_exports(self):
+        link = self.link('/product')
+        self.check()
+        since = timezone.now()
+        self.check()
+        self.assertEqual(changed_since(since), (set(), set()))
+
+        StoreLink.objects.filter(pk=link.pk).update(price='150.00')
+        self.check()
+        self.assertEqual(changed_since(since), ({self.racket.id}, set()))
+
+    def test_robots_disallow_is_never_fetched(self):
+        link = self.link('/private/racket')
+        self.assertEqual(self.check()['blocked'], 1)
+        self.assertNotIn('/private/racket', self.server.requests)
+        link.refresh_from_db()
+        self.assertEqual(link.status, 'unknown')
+
+    def test_per_host_limit(self):
+        for index in range(6):
+            self.link(f"/slow/{index}")
+        self.assertEqual(self.check(per_host=2)['ok'], 6)
+        self.assertLessEqual(self.server.max_in_flight, 2)
+
+    def test_waiting_for_a_slot_is_not_a_timeout(self):
+        # 10 requests of 0.3s through 2 slots take 1.5s, more than the 1s timeout of each
+        for index in range(10):
+            self.link(f"/slow/{index}")
+        counts = self.check(per_host=10, concurrency=2, timeout=1.0)
+        self.assertEqual(counts['ok'], 10)
+        self.assertLessEqual(self.server.max_in_flight, 2)
+
+    def test_dead_after_consecutive_failures(self):
+        link = self.link('/error')
+        for attempt in range(1, DEAD_AFTER):
+            self.assertEqual(self.check()['failed'], 1)
+            link.refresh_from_db()
+            self.assertEqual((link.status, link.failures), ('unknown', attempt))
+        self.assertEqual(self.check()['dead'], 1)
+        link.refresh_from_db()
+        self.assertEqual((link.status, link.http_status), ('dead', 500))
+
+    def test_gone_is_dead_at_once(self):
+        link = self.link('/gone')
+        self.assertEqual(self.check()['dead'], 1)
+        link.refresh_from_db()
+        self.assertEqual(link.status, 'dead')
+
+
+class ProfilePhotoTests(TestCase):
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        self.enterContext(override_settings(MEDIA_ROOT=root, JOB_QUEUE_EAGER=True))
+        self.user = CustomUser.objects.create(username='player')
+        self.user.profile_image.save('profile_pics/player.png', ContentFile(b'photo'), save=True)
+        self.client.force_login(self.user)
+
+    def test_delete_removes_the_old_file(self):
+        name = self.user.profile_image.name
+        self.assertTrue(default_storage.exists(name))
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/en/delete-profile-photo/')
+        self.assertTrue(response.json()['success'])
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.profile_image.name, 'profile_pics/default_profile.png')
+        self.assertFalse(default_storage.exists(name))
+
+
+@jobs.task(name='tests.always_fails', queue='serial')
+def always_fails(key=''):
+    raise ValueError(f"Failed: {key}")
+
+
+@override_settings(JOB_QUEUE_CONCURRENCY={'serial': 1}, JOB_QUEUE_EAGER=False)
+class JobQueueTests(TestCase):
+    def test_two_claimers_respect_a_limit_of_one(self):
+        _, second = Job.objects.bulk_create([Job(task='noop', queue='serial', priority=p) for p in (2, 1)])
+        claim = jobs._claim
+
+        def racing(job, worker_id):
+            if worker_id == 'a':  # Worker b claims the other job after a saw the queue empty, before a's UPDATE
+                self.assertTrue(claim(second, 'b'))
+            return claim(job, worker_id)
+
+        with mock.patch.object(jobs, '_claim', racing):
+            self.assertIsNone(jobs.claim_next('a'))
+        self.assertEqual(list(Job.objects.filter(status='running').values_list('pk', 'locked_by')), [(second.pk, 'b')])
+
+    def test_enqueue_dedup_returns_the_queued_job(self):
+        job = jobs.enqueue(always_fails, {'key': 'a'}, dedup_key='same')
+        self.assertEqual(jobs.enqueue(always_fails, {'key': 'b'}, dedup_key='same'), job)
+        self.assertEqual(Job.objects.count(), 1)
+
+        # A running job no longer holds the key: a later write needs a new run
+        self.assertEqual(jobs.claim_next('a'), job)
+        self.assertNotEqual(jobs.enqueue(always_fails, dedup_key='same'), job)
+        self.assertEqual(Job.objects.filter(status='queued').count(), 1)
+
+    @override_settings(JOB_QUEUE_BACKOFF_BASE=10, JOB_QUEUE_BACKOFF_MAX=3600)
+    def test_failed_job_is_retried_with_backoff_then_given_up(self):
+        self.assertTrue(8 <= jobs.backoff(1) <= 12)
+        self.assertTrue(32 <= jobs.backoff(3) <= 48)
+        self.assertTrue(2880 <= jobs.backoff(20) <= 4320)  # Capped, then jittered
+
+        job = jobs.enqueue(always_fails, {'key': 'retry'})
+        Job.objects.filter(pk=job.pk).update(max_attempts=2)
+        self.assertFalse(jobs.run_job(jobs.claim_next('a')))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('queued', 1))
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=7))
+        self.assertIn('ValueError', job.last_error)
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        self.assertFalse(jobs.run_job(jobs.claim_next('a')))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+
+    def test_claims_again_once_the_running_job_is_done(self):
+        Job.objects.bulk_create([Job(task='noop', queue='serial') for _ in range(2)])
+        first = jobs.claim_next('a')
+        self.assertIsNone(jobs.claim_next('b'))
+        Job.objects.filter(pk=first.pk).update(status='done')
+        self.assertIsNotNone(jobs.claim_next('b'))
+
+
+@override_settings(RATE_LIMITS={'test': {'ip': '2/m'}}, RATELIMIT_NUM_PROXIES=0)
+class RateLimitTests(SimpleTestCase):
+    START = 6000  # The start of a one-minute window
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def hit(self, seconds):
+        request = RequestFactory().post('/', REMOTE_ADDR='10.0.0.1')
+        request.user = AnonymousUser()
+        with mock.patch.object(ratelimit.time, 'time', return_value=self.START + seconds):
+            return ratelimit.check(request, 'test')
+
+    def test_retry_after_is_when_the_estimate_allows_a_request(self):
+        self.assertIsNone(self.hit(10))
+        self.assertIsNone(self.hit(20))
+        retry_after = self.hit(30)
+        # Next window: the 2 hits weigh 2 * (1 - elapsed) and one more must fit, half-way through it
+        self.assertEqual(retry_after, 60)
+        self.assertIsNotNone(self.hit(30 + retry_after - 1))
+        self.assertIsNone(self.hit(30 + retry_after))
+
+    def test_rejected_requests_are_not_counted(self):
+        self.hit(10)
+        self.hit(20)
+        for second in range(30, 90):
+            self.assertIsNotNone(self.hit(second))
+        self.assertIsNone(self.hit(90))
+
+    @override_settings(RATE_LIMITS={'submit_review': {'ip': '1/m'}})
+    def test_middleware_answers_429_with_retry_after(self):
+        def post(seconds):
+            with mock.patch.object(ratelimit.time, 'time', return_value=self.START + seconds):
+                return self.client.post('/en/submit-review/', REMOTE_ADDR='10.0.0.2')
+
+        self.assertNotEqual(post(0).status_code, 429)
+        response = post(30)
+        self.assertEqual(response.status_code, 429)
+        retry_after = int(response['Retry-After'])
+        self.assertEqual(post(30 + retry_after - 1).status_code, 429)
+        self.assertNotEqual(post(30 + retry_after).status_code, 429)
+
+    def test_wait_within_the_window_as_the_previous_one_decays(self):
+        self.hit(10)
+        self.hit(20)
+        # At 75s: 2 * 0.75 + 1 > 2; room for one more once 2 * (1 - elapsed) <= 1, at 90s
+        self.assertEqual(self.hit(75), 15)
+        self.assertIsNone(self.hit(90))
+
+
+class ApiTests(TestCase):
+    def setUp(self):
+        self.brand = Brand.objects.create(name='brand', logo='brand_logos/brand.png')
+        self.racket = Racket.objects.create(
+            brand=self.brand, name='Racket', core='EVA', surface='Carbon', weight='360g', shape='Round',
+            balance='Medium', gametype='Control', finish='Matte', thumbnail='brands/brand/racket.png',
+        )
+        self.url = f"/api/v1/rackets/{self.racket.slug}/"
+
+    def test_related_writes_change_the_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        for change in (
+            lambda: Brand.objects.get(pk=self.brand.pk).save(),
+            lambda: StoreLink.objects.create(racket=self.racket, retailer='shop', url='https://shop.example/r'),
+        ):
+            with self.captureOnCommitCallbacks(execute=True):
+                change()
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            etag = response['ETag']
+
+    def test_changed_since_needs_an_offset(self):
+        for value, status in [('2025-01-31T12:00:00', 400), ('2025-02-30T12:00:00Z', 400), ('2025-01-31T12:00:00Z', 200)]:
+            response = self.client.get('/api/v1/rackets/', {'changed_since': value})
+            self.assertEqual(response.status_code, status, value)
+
+
+@override_settings(STORAGES={**settings.STORAGES, 'staticfiles': {
+    'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',  # No manifest: collectstatic hasn't run
+}})
+class LanguageSwitcherTests(TestCase):
+    def test_links_to_the_page_in_the_other_language(self):
+        response = self.client.get('/en/browse/?page=2')
+        self.assertContains(response, 'href="/es/browse/?page=2" hreflang="es"')
+        self.assertNotIn(settings.CSRF_COOKIE_NAME, response.cookies)  # Nothing to keep the page from being cached
+
+    def test_set_language_checks_csrf(self):
+        response = Client(enforce_csrf_checks=True).post('/i18n/setlang/', {'language': 'es', 'next': '/'})
+        self.assertEqual(response.status_code, 403)
+
+
+class SubmitReviewTests(TestCase):
+    def test_each_score_is_stored_in_its_own_column(self):
+        brand = Brand.objects.create(name='brand', logo='brand_logos/brand.png')
+        racket = Racket.objects.create(
+            brand=brand, name='Racket', core='EVA', surface='Carbon', weight='360g', shape='Round',
+            balance='Medium', gametype='Control', finish='Matte', thumbnail='brands/brand/racket.png',
+        )
+        user = CustomUser.objects.create(username='player')
+        self.client.force_login(user)
+        scores = {'power': 1, 'control': 2, 'comfort': 3, 'agility': 4, 'spin': 5, 'hard': 6, 'exit': 7}
+        response = self.client.post('/en/submit-review/', {'racket_id': racket.id, 'comment': 'Great feel', **scores})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Review.objects.filter(user=user, racket=racket).values(*scores).get(), scores)
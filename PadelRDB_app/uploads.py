@@ -0,0 +1,209 @@
+"""
+Chunked, resumable uploads for admin gallery images and brand logos.
+
+The browser creates a session, PUTs the file in fixed-size chunks (each one
+streamed from the request straight to storage under `uploads/<id>/`), can
+ask which chunks already arrived to resume after a dropped connection, and
+finally asks for assembly. Assembly runs as a background job that streams
+the chunks in order into the final file, so no step holds the whole file in
+memory.
+"""
+
+import json
+import os
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.files.base import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_GET, require_http_methods, require_POST
+
+from .jobs import enqueue
+from .models import Brand, Racket, RacketImage, UploadSession
+from .tasks import assemble_upload, delete_media
+
+ALLOWED_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp', '.gif'}
+
+
+# Helper Functions
+class ChunkStream:
+    """Read-only file object that reads a session's stored chunks one after another."""
+
+    def __init__(self, session):
+        self.session = session
+        self.size = session.size
+        self.index = 0
+        self.current = None
+
+    def read(self, size=-1):
+        data = b''
+        while size < 0 or len(data) < size:
+            if self.current is None:
+                if self.index >= self.session.chunk_count:
+                    break
+                self.current = default_storage.open(self.session.chunk_name(self.index))
+                self.index += 1
+            piece = self.current.read(-1 if size < 0 else size - len(data))
+            if not piece:
+                self.current.close()
+                self.current = None
+                continue
+            data += piece
+        return data
+
+    def close(self):
+        if self.current is not None:
+            self.current.close()
+
+
+class _RequestStream:
+    """Caps reads of the raw request body at the chunk's declared length."""
+
+    def __init__(self, request, length):
+        self.request = request
+        self.remaining = length
+        self.size = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        data = self.request.read(size)
+        self.remaining -= len(data)
+        return data
+
+
+def _status(session):
+    return {
+        'id': str(session.id),
+        'status': session.status,
+        'chunk_size': session.chunk_size,
+        'chunk_count': session.chunk_count,
+        'received_chunks': sorted(session.received_chunks),
+        'result': default_storage.url(session.result_name) if session.result_name else None,
+        'error': session.error,
+    }
+
+
+def _target_field(target):
+    return RacketImage._meta.get_field('image') if target == 'racket_image' else Brand._meta.get_field('logo')
+
+
+def assemble(session):
+    """Stream the chunks into the final file and attach it to its racket or brand."""
+    filename = _target_field(session.target).generate_filename(None, session.filename)
+    stream = ChunkStream(session)
+    try:
+        name = default_storage.save(filename, File(stream, name=session.filename))
+    finally:
+        stream.close()
+
+    from PIL import Image, UnidentifiedImageError
+    try:
+        with default_storage.open(name) as saved:
+            Image.open(saved).verify()
+    except (UnidentifiedImageError, OSError, SyntaxError) as error:
+        default_storage.delete(name)
+        raise ValueError(f"Not a valid image: {error}")
+
+    with transaction.atomic():
+        if session.target == 'racket_image':
+            RacketImage.objects.create(racket_id=session.target_id, image=name)
+        else:
+            brand = Brand.objects.get(pk=session.target_id)
+            previous = brand.logo.name
+            brand.logo = name
+            brand.save()
+            if previous and previous != name:
+                # Through delete_media, which keeps a file other rows still use (e.g. a shared placeholder)
+                transaction.on_commit(lambda: enqueue(delete_media, {'names': [previous]}))
+        session.result_name = name
+        session.status = 'done'
+        session.save(update_fields=['result_name', 'status', 'updated_at'])
+
+    discard_chunks(session)
+
+
+def discard_chunks(session):
+    for index in range(session.chunk_count):
+        default_storage.delete(session.chunk_name(index))
+
+
+# Views
+@staff_member_required
+@require_POST
+def create_session(request):
+    try:
+        data = json.loads(request.body)
+        filename = os.path.basename(data['filename'])
+        size = int(data['size'])
+        target = data['target']
+        target_id = int(data['target_id'])
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'error': 'filename, size, target and target_id are required'}, status=400)
+
+    if os.path.splitext(filename)[1].lower() not in ALLOWED_EXTENSIONS:
+        return JsonResponse({'error': 'Unsupported file type'}, status=400)
+    if not 0 < size <= getattr(settings, 'CHUNKED_UPLOAD_MAX_SIZE', 50 * 1024 * 1024):
+        return JsonResponse({'error': 'File is empty or too large'}, status=400)
+    target_model = {'racket_image': Racket, 'brand_logo': Brand}.get(target)
+    if target_model is None or not target_model.objects.filter(pk=target_id).exists():
+        return JsonResponse({'error': 'Unknown upload target'}, status=400)
+
+    session = UploadSession.objects.create(
+        user=request.user, target=target, target_id=target_id, filename=filename, size=size,
+        chunk_size=getattr(settings, 'CHUNKED_UPLOAD_CHUNK_SIZE', 5 * 1024 * 1024),
+    )
+    return JsonResponse(_status(session), status=201)
+
+
+@staff_member_required
+@require_GET
+def session_status(request, session_id):
+    session = get_object_or_404(UploadSession, id=session_id, user=request.user)
+    return JsonResponse(_status(session))
+
+
+@staff_member_required
+@require_http_methods(['PUT'])
+def upload_chunk(request, session_id, index):
+    session = get_object_or_404(UploadSession, id=session_id, user=request.user)
+    if session.status != 'uploading':
+        return JsonResponse({'error': 'Upload is no longer accepting chunks'}, status=409)
+    if index >= session.chunk_count:
+        return JsonResponse({'error': 'Chunk index out of range'}, status=400)
+
+    expected = min(session.chunk_size, session.size - index * session.chunk_size)
+    if int(request.META.get('CONTENT_LENGTH') or 0) != expected:
+        return JsonResponse({'error': f'Chunk {index} must be {expected} bytes'}, status=400)
+
+    # Re-sending a chunk (e.g. after a timeout) simply replaces it
+    name = session.chunk_name(index)
+    default_storage.delete(name)
+    default_storage.save(name, File(_RequestStream(request, expected), name=name))
+
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(pk=session.pk)
+        if index not in session.received_chunks:
+            session.received_chunks.append(index)
+            session.save(update_fields=['received_chunks', 'updated_at'])
+    return JsonResponse(_status(session))
+
+
+@staff_member_required
+@require_POST
+def complete_session(request, session_id):
+    session = get_object_or_404(UploadSession, id=session_id, user=request.user)
+    missing = sorted(set(range(session.chunk_count)) - set(session.received_chunks))
+    if missing:
+        return JsonResponse({'error': 'Missing chunks', 'missing': missing}, status=400)
+
+    if session.status == 'uploading':
+        session.status = 'assembling'
+        session.save(update_fields=['status', 'updated_at'])
+        enqueue(assemble_upload, {'session_id': str(session.id)}, dedup_key=f"upload:{session.id}")
+        session.refresh_from_db()
+    return JsonResponse(_status(session), status=202)
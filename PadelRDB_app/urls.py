@@ -1,5 +1,5 @@
-from django.urls import path
-from . import views
+from django.urls import path, re_path
+from . import api, uploads, views
 from .views import (
     profile_view, change_password_ajax, review_view, delete_review,
     upload_profile_photo, delete_profile_photo, get_review, create_account, 
@@ -28,5 +28,17 @@ urlpatterns = [
     path('get_review/', views.get_review, name='get_review'),
     path('change-password/', CustomPasswordChangeView.as_view(), name='change_password'),
     path('review-entry/', views.review_gate, name='review_entry'),
+    path('leaderboards/<str:attribute>/', views.leaderboard, name='leaderboard'),
+    path('compare/', views.compare, name='compare'),
+    path('compare.json', views.compare_json, name='compare_json'),
+    path('get-trend/<slug:slug>/', views.get_trend, name='get_trend'),
+    path('api/v1/brands/', api.brands, name='api_brands'),
+    path('api/v1/rackets/', api.rackets, name='api_rackets'),
+    path('api/v1/rackets/<slug:slug>/', api.racket, name='api_racket'),
+    path('uploads/', uploads.create_session, name='upload_create'),
+    path('uploads/<uuid:session_id>/', uploads.session_status, name='upload_status'),
+    path('uploads/<uuid:session_id>/chunks/<int:index>/', uploads.upload_chunk, name='upload_chunk'),
+    path('uploads/<uuid:session_id>/complete/', uploads.complete_session, name='upload_complete'),
+    re_path(r'^export/(?P<dataset>reviews|rackets)\.(?P<fmt>csv|ndjson)$', views.export_data, name='export_data'),
 
 ]
@@ -0,0 +1,62 @@
+"""
+Cached loading of the logged-in user.
+
+CachedAuthenticationMiddleware replaces Django's AuthenticationMiddleware:
+request.user comes from the cache, keyed by user id, when the session's
+auth hash matches the cached user; anything else (no cached copy, a
+changed password, fallback secret keys) goes through django.contrib.auth's
+normal get_user and refreshes the cache. Entries are dropped whenever the
+user row changes (see signals.py and the profile photo tasks). That only
+reaches other workers through a shared cache: with USER_CACHE_TIMEOUT 0 (the
+default without Redis) every request loads the user from the database.
+"""
+
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+
+
+# Helper Functions
+def user_cache_key(user_id):
+    return f"user:{user_id}"
+
+
+def forget_user(user_id):
+    cache.delete(user_cache_key(user_id))
+
+
+def get_user(request):
+    if hasattr(request, '_cached_user'):
+        return request._cached_user
+
+    timeout = getattr(settings, 'USER_CACHE_TIMEOUT', 300)
+    if not timeout:
+        request._cached_user = auth.get_user(request)
+        return request._cached_user
+
+    session = request.session
+    user_id = session.get(SESSION_KEY)
+    user = None
+    if user_id is not None and session.get(BACKEND_SESSION_KEY) in settings.AUTHENTICATION_BACKENDS:
+        user = cache.get(user_cache_key(user_id))
+        session_hash = session.get(HASH_SESSION_KEY)
+        if user is not None and not (session_hash and constant_time_compare(session_hash, user.get_session_auth_hash())):
+            user = None
+
+    if user is None:
+        user = auth.get_user(request)
+        if user.is_authenticated:
+            cache.set(user_cache_key(user.pk), user, timeout)
+
+    request._cached_user = user
+    return user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_user(request))
@@ -1,14 +1,34 @@
-from django.shortcuts import render, get_object_or_404, redirect
+import re
+
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
+from django.contrib.auth import get_user_model, logout, update_session_auth_hash
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
-from django.db.models import Avg
 from django.contrib.auth.forms import PasswordChangeForm
-from django.contrib.auth import update_session_auth_hash
-from django.core.files.storage import default_storage
-from django.conf import settings
-import os
-from .models import Brand, Racket, Review
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.views import LoginView, PasswordChangeView
+from django.db import transaction
+from django.db.models import Q
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.templatetags.static import static
+from django.urls import reverse_lazy
+
+from .duplicates import near_duplicates
+from .exports import export_stream, parse_day
 from .forms import ReviewForm
+from .jobs import enqueue
+from .leaderboards import top
+from .models import Brand, LeaderboardEntry, Racket, Review, UserReviewStats
+from .pagination import decode_cursor, encode_cursor
+from .ratelimit import ratelimit
+from .recommendations import recommend
+from .rollups import trend_series
+from .scores import comparison_data, score_summary
+from .tasks import delete_media, process_profile_photo
+
+User = get_user_model()
 
 # Homepage view
 def index(request):
@@ -17,7 +37,7 @@ def index(request):
 # Browse page view
 def browse(request):
     brands = Brand.objects.all()
-    return render(request, 'browse.html', {'brands': brands})
+    return render(request, 'browse.html', {'brands': brands, 'recommended': recommend(request.user)})
 
 
 #Login page
@@ -57,37 +77,12 @@ def brand_page(request, name):
 
 # Racket detail view
 def racket_detail(request, name, slug):
-    racket = get_object_or_404(Racket, slug=slug)
+    racket = get_object_or_404(Racket.objects.prefetch_related('store_links', 'videos'), slug=slug)
 
-    # Average scores grouped by user type
-    avg_reviews = (
-        Review.objects.filter(racket=racket)
-        .values('user_type')
-        .annotate(
-            avg_power=Avg('power'),
-            avg_control=Avg('control'),
-            avg_comfort=Avg('comfort'),
-            avg_maneuverability=Avg('agility'),
-            avg_spin=Avg('spin'),
-            avg_hard=Avg('hard'),
-            avg_exit=Avg('exit'),
-        )
-    )
-
-    # Initialize empty dicts
-    user_scores = {'power': 0, 'control': 0, 'comfort': 0, 'agility': 0, 'spin': 0, 'hard': 0, 'exit': 0, 'total_reviews': 0}
-    expert_scores = {'power': 0, 'control': 0, 'comfort': 0, 'agility': 0, 'spin': 0, 'hard': 0, 'exit': 0, 'total_reviews': 0}
-
-    # Update with values from the aggregation
-    for review in avg_reviews:
-        if review['user_type'] == 'regular':
-            user_scores.update(review)
-        elif review['user_type'] == 'expert':
-            expert_scores.update(review)
-
-    # Add total review counts
-    user_scores['total_reviews'] = Review.objects.filter(racket=racket, user_type='regular').count()
-    expert_scores['total_reviews'] = Review.objects.filter(racket=racket, user_type='expert').count()
+    # Average scores and review counts grouped by user type (one query)
+    scores = score_summary([racket.id])[racket.id]
+    user_scores = scores['regular']
+    expert_scores = scores['expert']
 
     # Comments
     latest_comment = Review.objects.filter(racket=racket).order_by('-created_at').first()
@@ -99,8 +94,6 @@ def racket_detail(request, name, slug):
         'expert_scores': expert_scores,
         'comments': comments,
         'latest_comment': latest_comment,
-        'media_urls': racket.media_urls,
-        'store_links': racket.store_links,
     }
 
     return render(request, 'racket_detail.html', context)
@@ -168,10 +161,6 @@ def all_rackets(request):
 
 
 # Submit review (after form submission)
-from django.shortcuts import redirect
-from django.contrib.auth.decorators import login_required
-from .models import Review, Racket
-
 @login_required
 def submit_review(request):
     if request.method == 'POST':
@@ -184,11 +173,19 @@ def submit_review(request):
         spin = int(request.POST.get('spin', 0))
         hard = int(request.POST.get('hard', 0))
         exit = int(request.POST.get('exit', 0))
-        comment = request.POST.get('comment', '')
+        comment = request.POST.get('comment', '').strip()
 
         # Get the racket object based on the provided racket_id
         racket = Racket.objects.get(id=racket_id)
 
+        # Moderation: banned words, then text already posted in other reviews (copy-pasted promotion)
+        if contains_profanity(comment):
+            return JsonResponse({"error": "Your comment contains inappropriate language."}, status=400)
+        own_review_id = Review.objects.filter(user=user, racket=racket).values_list('id', flat=True).first()
+        duplicates = near_duplicates(comment, exclude=own_review_id)
+        if len(duplicates) >= getattr(settings, 'REVIEW_DUPLICATE_LIMIT', 2):
+            return JsonResponse({"error": "Your comment is nearly identical to other reviews."}, status=400)
+
         # Ensure the user_type is set to the current logged-in user's user_type
         user_type = user.user_type  # Get the user type ('regular' or 'expert')
 
@@ -202,8 +199,8 @@ def submit_review(request):
                 'comfort': comfort,
                 'agility': agility,
                 'spin': spin,
-                'hard': agility,
-                'exit': spin,
+                'hard': hard,
+                'exit': exit,
                 'comment': comment,
                 'user_type': user_type  # Set the user_type field here
             }
@@ -242,26 +239,66 @@ def get_racket(request, model_id):
         return JsonResponse({'error': 'Racket not found'}, status=404)
 
 # Profile view for logged-in user
-@login_required
-def profile_view(request):
+PROFILE_PAGE_SIZE = 24
+
+def _profile_review_page(request):
+    """One keyset page of the user's reviews, sorted by brand, racket name and id."""
     user_reviews = (
         Review.objects.filter(user=request.user)
         .select_related('racket__brand')  # Optimizes queries
-        .order_by('racket__brand__name', 'racket__name')  # Sort by brand then racket name
+        .order_by('racket__brand__name', 'racket__name', 'id')  # Sort by brand then racket name
     )
 
+    cursor = request.GET.get('cursor')
+    if cursor:
+        try:
+            values = decode_cursor(cursor)
+        except (ValueError, TypeError):  # binascii.Error, UnicodeDecodeError and JSON errors are ValueErrors
+            raise Http404("Invalid cursor")
+        # Exactly what encode_cursor wrote below: [brand name, racket name, review id]
+        if not (isinstance(values, list) and len(values) == 3 and isinstance(values[0], str)
+                and isinstance(values[1], str) and isinstance(values[2], int) and not isinstance(values[2], bool)):
+            raise Http404("Invalid cursor")
+        brand_name, racket_name, review_id = values
+        user_reviews = user_reviews.filter(
+            Q(racket__brand__name__gt=brand_name)
+            | Q(racket__brand__name=brand_name, racket__name__gt=racket_name)
+            | Q(racket__brand__name=brand_name, racket__name=racket_name, id__gt=review_id)
+        )
+
+    page = list(user_reviews[:PROFILE_PAGE_SIZE + 1])
+    next_cursor = None
+    if len(page) > PROFILE_PAGE_SIZE:
+        page = page[:PROFILE_PAGE_SIZE]
+        last = page[-1]
+        next_cursor = encode_cursor([last.racket.brand.name, last.racket.name, last.id])
+
     # Group reviews by brand
     reviews_by_brand = {}
-    for review in user_reviews:
-        brand_name = review.racket.brand.name
-        if brand_name not in reviews_by_brand:
-            reviews_by_brand[brand_name] = []
-        reviews_by_brand[brand_name].append(review)
+    for review in page:
+        reviews_by_brand.setdefault(review.racket.brand.name, []).append(review)
+    return reviews_by_brand, next_cursor
 
-    return render(request, 'profile.html', {'user': request.user, 'reviews': reviews_by_brand})
+
+@login_required
+def profile_view(request):
+    reviews_by_brand, next_cursor = _profile_review_page(request)
+    context = {'user': request.user, 'reviews': reviews_by_brand, 'next_cursor': next_cursor}
+
+    # Later pages are fetched by the "Load more" button and appended in place
+    if request.GET.get('cursor'):
+        return render(request, 'profile_reviews.html', context)
+
+    stats = UserReviewStats.objects.filter(user=request.user).first()
+    if stats is None:
+        stats = UserReviewStats.refresh(request.user.id)
+    context['stats'] = stats
+    context['recommended'] = recommend(request.user)
+    return render(request, 'profile.html', context)
 
 # Change password view via AJAX
 @login_required
+@ratelimit('change_password_ajax')
 def change_password_ajax(request):
     if request.method == 'POST':
         form = PasswordChangeForm(request.user, request.POST)
@@ -287,15 +324,15 @@ def upload_profile_photo(request):
         user = request.user
         new_image = request.FILES['profile_image']
         
-        # Delete old profile image if it exists (except default)
+        # Old profile image (except default) is deleted by the background job
+        previous = None
         if user.profile_image and not user.profile_image.name.startswith('profile_pics/default'):
-            old_path = user.profile_image.path
-            if os.path.exists(old_path):
-                os.remove(old_path)
+            previous = user.profile_image.name
 
-        # Save the new image
+        # Save the new image; downscaling happens in the background
         file_path = f"profile_pics/{user.username}_{new_image.name}"
         user.profile_image.save(file_path, new_image, save=True)
+        enqueue(process_profile_photo, {'user_id': user.id, 'name': user.profile_image.name, 'previous': previous})
 
         return JsonResponse({'success': True, 'image_url': user.profile_image.url})
 
@@ -312,22 +349,20 @@ def delete_profile_photo(request):
         if user.profile_image.name == default_image_path:
             return JsonResponse({'success': False, 'error': 'Cannot delete default profile picture.'})
 
-        # Remove old profile image (if exists and is not the default)
-        if user.profile_image and user.profile_image.name != default_image_path:
-            old_path = os.path.join(settings.MEDIA_ROOT, user.profile_image.name)
-            if os.path.exists(old_path):
-                os.remove(old_path)  # ✅ Physically delete the image file
+        previous = user.profile_image.name
 
         # Reset to default image
-        user.profile_image.name = default_image_path  
+        user.profile_image.name = default_image_path
         user.save()
 
+        # Remove old profile image once the row no longer points to it: delete_media keeps referenced files
+        if previous:
+            transaction.on_commit(lambda: enqueue(delete_media, {'names': [previous]}))
+
         return JsonResponse({'success': True, 'default_image_url': user.profile_image.url})
 
     return JsonResponse({'success': False, 'error': 'Invalid request'})
 
-from django.templatetags.static import static  # Import the static helper function
-
 def get_review(request):
     racket_id = request.GET.get("racket_id")
     user = request.user  # Get logged-in user
@@ -365,11 +400,6 @@ def get_review(request):
 
 
 
-from django.shortcuts import render, redirect
-from django.http import JsonResponse
-from .models import Review
-import re
-
 # List of banned words
 BANNED_WORDS = [
     "badword1", "badword2", "merde", "schlecht", "puta", "mierda", "f***", "sh*t",
@@ -382,44 +412,14 @@ def contains_profanity(text):
     text_lower = text.lower()
     return any(re.search(rf"\b{re.escape(word)}\b", text_lower) for word in BANNED_WORDS)
 
-def submit_review(request):
-    if request.method == "POST":
-        comment = request.POST.get("comment", "").strip()
-
-        # Check for profanity
-        if contains_profanity(comment):
-            return JsonResponse({"error": "Your comment contains inappropriate language."}, status=400)
-
-        # Save review if it's valid
-        review = Review.objects.create(
-            racket_id=request.POST.get("racket_id"),
-            power=request.POST.get("power"),
-            control=request.POST.get("control"),
-            comfort=request.POST.get("comfort"),
-            agility=request.POST.get("agility"),
-            spin=request.POST.get("spin"),
-            hard=request.POST.get("hard"),
-            exit=request.POST.get("exit"),
-            comment=comment
-        )
-        review.save()
-        return redirect("success_page")  # Redirect after successful submission
-
-    return JsonResponse({"error": "Invalid request."}, status=400)
 
 
-
-from django.contrib.auth.views import PasswordChangeView
-from django.urls import reverse_lazy
-
 class CustomPasswordChangeView(PasswordChangeView):
     template_name = 'change_password.html'
     success_url = reverse_lazy('profile')  # or any success URL
 
 
 
-from django.shortcuts import redirect
-
 def review_gate(request):
     if request.user.is_authenticated:
         return redirect('review')  # Or use 'review_view' if you meant the slug-based one
@@ -427,48 +427,11 @@ def review_gate(request):
         return redirect('redirect')  # Goes to your "please log in" page
 
 
-# views.py
-from django.contrib.auth import logout
-from django.shortcuts import redirect
-
 def logout_view(request):
     logout(request)
     return redirect('home')  # Redirect anywhere after logout
 
 
-from django.contrib.auth.models import User
-from django.contrib.auth import login
-from django.shortcuts import render, redirect
-from django.http import HttpResponseBadRequest
-
-def create_account(request):
-    if request.method == 'POST':
-        username = request.POST.get('username', '').strip()
-        email = request.POST.get('email', '').strip()
-        password = request.POST.get('password', '')
-        confirm_password = request.POST.get('confirm_password', '')
-        next_url = request.POST.get('next') or '/'
-
-        # Basic validation
-        if not username or not email or not password or password != confirm_password:
-            return HttpResponseBadRequest("Invalid form submission.")
-
-        # Check if username or email already exist
-        if User.objects.filter(username=username).exists():
-            return render(request, 'create.html', {'error': 'Username already taken'})
-        if User.objects.filter(email=email).exists():
-            return render(request, 'create.html', {'error': 'Email already used'})
-
-        # Create and log in the user
-        user = User.objects.create_user(username=username, email=email, password=password)
-        login(request, user)
-        return redirect(next_url)
-
-    return render(request, 'create.html')
-
-
-from django.contrib.auth.views import LoginView
-
 class CustomLoginView(LoginView):
     template_name = 'login.html'
 
@@ -478,13 +441,6 @@ class CustomLoginView(LoginView):
 
 
 
-from django.shortcuts import render, redirect
-from django.contrib.auth import get_user_model
-from django.contrib.auth.hashers import make_password
-from django.contrib import messages
-
-User = get_user_model()
-
 def create_account(request):
     if request.method == 'POST':
         username = request.POST.get('username')
@@ -513,3 +469,83 @@ def create_account(request):
         return redirect('login')
 
     return render(request, 'create.html')
+
+
+# Best rackets per attribute, ranked by Bayesian-smoothed score
+def leaderboard(request, attribute):
+    if attribute not in LeaderboardEntry.ATTRIBUTES:
+        raise Http404("Unknown attribute")
+
+    user_type = request.GET.get('type', 'regular')
+    if user_type not in dict(Review.USER_TYPES):
+        user_type = 'regular'
+
+    return render(request, 'leaderboard.html', {
+        'entries': top(attribute, user_type),
+        'attribute': attribute,
+        'attributes': LeaderboardEntry.ATTRIBUTES,
+        'user_type': user_type,
+        'user_types': Review.USER_TYPES,
+    })
+
+
+# Side-by-side comparison of several rackets: ?rackets=slug-a,slug-b
+def _compare_slugs(request):
+    slugs = [slug.strip() for slug in request.GET.get('rackets', '').split(',') if slug.strip()]
+    return slugs[:getattr(settings, 'COMPARE_MAX_RACKETS', 4)]
+
+
+def compare(request):
+    rackets = comparison_data(_compare_slugs(request))
+    spec_labels = [('core', 'Core'), ('surface', 'Surface'), ('weight', 'Weight'), ('shape', 'Shape'),
+                   ('balance', 'Balance'), ('gametype', 'Type of Game'), ('finish', 'Finish')]
+    score_labels = [('avg_power', 'Power'), ('avg_control', 'Control'), ('avg_comfort', 'Comfort'),
+                    ('avg_maneuverability', 'Maneuverability'), ('avg_spin', 'Spin'),
+                    ('avg_hard', 'Hardness'), ('avg_exit', 'Ball Exit')]
+
+    # One row per spec/score with a cell per racket, so the template needs no lookups
+    spec_rows = [(label, [racket['specs'][field] for racket in rackets]) for field, label in spec_labels]
+    score_rows = [
+        (label, [(racket['scores']['regular'][field], racket['scores']['expert'][field]) for racket in rackets])
+        for field, label in score_labels + [('total_reviews', 'Reviews')]
+    ]
+
+    return render(request, 'compare.html', {'rackets': rackets, 'spec_rows': spec_rows, 'score_rows': score_rows})
+
+
+def compare_json(request):
+    slugs = _compare_slugs(request)
+    if not slugs:
+        return JsonResponse({'error': 'No rackets selected'}, status=400)
+    return JsonResponse({'rackets': comparison_data(slugs)})
+
+
+# Rating trend of one attribute over time, read from the pre-bucketed rollups
+def get_trend(request, slug):
+    racket = get_object_or_404(Racket, slug=slug)
+    period = request.GET.get('period', 'month')
+    attribute = request.GET.get('attribute', 'power')
+    if period not in ('week', 'month') or attribute not in LeaderboardEntry.ATTRIBUTES:
+        return JsonResponse({'error': 'Invalid period or attribute'}, status=400)
+    return JsonResponse(trend_series(racket.id, period, attribute))
+
+
+# Staff-only streaming export: /export/reviews.csv?since=2025-01-01&until=2025-06-30&brand=adidas&gzip=1
+@staff_member_required
+def export_data(request, dataset, fmt):
+    try:
+        since = parse_day(request.GET.get('since'))
+        until = parse_day(request.GET.get('until'))
+    except ValueError:
+        return JsonResponse({'error': 'Dates must be YYYY-MM-DD'}, status=400)
+
+    compress = request.GET.get('gzip') == '1'
+    filename = f"{dataset}.{fmt}" + ('.gz' if compress else '')
+    content_type = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}[fmt]
+
+    response = StreamingHttpResponse(
+        export_stream(dataset, fmt, compress, since, until, request.GET.get('brand')),
+        content_type='application/gzip' if compress else content_type,
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
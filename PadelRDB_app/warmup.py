@@ -0,0 +1,164 @@
+"""
+Work a worker would otherwise do on its first requests.
+
+warm_up() imports every view through the URLconf, loads the translation
+catalogs of the languages the site has, and compiles the project's
+templates. warm_pages() then requests the pages a fresh deploy is hit with
+first (browse, every brand page, the most-reviewed rackets, the catalog
+JSON endpoints) through the real WSGI handler on a small thread pool, which
+runs the ORM code paths, opens the database connection and queues any
+missing video details. warm_process() does both and marks the process
+ready for /readyz (health.py).
+
+With preload_app this runs once in the gunicorn master and workers are
+forked warm; otherwise each worker warms itself after forking while /readyz
+answers 503 (see gunicorn.conf.py).
+"""
+
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.util import setup_testing_defaults
+
+from django.apps import apps
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import DatabaseError, connections
+from django.db.models import Count
+from django.template import TemplateSyntaxError, engines
+from django.urls import get_resolver, reverse
+from django.utils import translation
+
+from .models import Brand, Racket
+
+logger = logging.getLogger(__name__)
+
+# Per process, inherited by workers forked after a preload warm-up. None: no
+# warm-up runs in this process (runserver, shell), so readiness doesn't wait.
+_state = {'warm': None}
+
+
+# Helper Functions
+def template_names():
+    engine = engines['django'].engine
+    directories = [*engine.dirs, os.path.join(apps.get_app_config('PadelRDB_app').path, 'templates')]
+    for directory in directories:
+        for root, _, files in os.walk(directory):
+            for name in files:
+                if name.endswith('.html'):
+                    yield os.path.relpath(os.path.join(root, name), directory).replace(os.sep, '/')
+
+
+def catalog_languages():
+    """LANGUAGE_CODE plus every language the project has its own catalog for."""
+    directories = [
+        *settings.LOCALE_PATHS, os.path.join(settings.BASE_DIR, 'locale'),
+        os.path.join(apps.get_app_config('PadelRDB_app').path, 'locale'),
+    ]
+    languages = {settings.LANGUAGE_CODE}
+    for directory in map(str, directories):
+        if os.path.isdir(directory):
+            languages.update(
+                translation.to_language(name) for name in os.listdir(directory)
+                if os.path.isdir(os.path.join(directory, name, 'LC_MESSAGES'))
+            )
+    return sorted(languages)
+
+
+def warm_up():
+    """Returns what was loaded, and the templates that failed to compile."""
+    urls = len(get_resolver().reverse_dict)  # Imports every view module
+
+    languages = catalog_languages()
+    for language in languages:
+        with translation.override(language):
+            translation.gettext('')
+
+    templates, failed = 0, []
+    for name in template_names():
+        try:
+            engines['django'].get_template(name)
+            templates += 1
+        except TemplateSyntaxError as error:
+            failed.append(f"{name}: {error}")
+
+    return {'urls': urls, 'languages': languages, 'templates': templates, 'failed': failed}
+
+
+def is_warm():
+    return _state['warm'] is not False
+
+
+def mark_warming():
+    """Hold /readyz at 503 until warm_process() finishes in this process."""
+    _state['warm'] = False
+
+
+def default_host():
+    """A Host header the site accepts: the first concrete ALLOWED_HOSTS entry."""
+    host = next((host for host in settings.ALLOWED_HOSTS if host and '*' not in host), 'localhost')
+    return host.lstrip('.')
+
+
+def warmup_paths(rackets=None):
+    """Paths of the pages and JSON endpoints a fresh deploy is hit with first."""
+    rackets = getattr(settings, 'WARMUP_RACKETS', 20) if rackets is None else rackets
+    brands = list(Brand.objects.order_by('name').values_list('id', 'name'))
+    # No visit counts are kept; the rackets with the most reviews are the most visited ones
+    top = (
+        Racket.objects.select_related('brand').annotate(review_count=Count('reviews'))
+        .order_by('-review_count', 'id')[:rackets]
+    )
+
+    with translation.override(translation.get_supported_language_variant(settings.LANGUAGE_CODE)):
+        paths = [reverse('browse')]
+        paths += [reverse('brand_page', args=[name]) for _, name in brands]
+        paths += [reverse('racket_detail', args=[racket.brand.name, racket.slug]) for racket in top]
+        paths += [f"{reverse('get_models')}?brand_id={brand_id}" for brand_id, _ in brands]
+    paths += [reverse('api_brands'), reverse('api_rackets')]
+    return paths
+
+
+def _fetch(handler, host, path):
+    path, _, query = path.partition('?')
+    environ = {}
+    setup_testing_defaults(environ)
+    environ.update(PATH_INFO=path, QUERY_STRING=query, HTTP_HOST=host, HTTP_X_FORWARDED_PROTO='https')
+    statuses = []
+    start = time.perf_counter()
+    try:
+        body = handler(environ, lambda status, headers, exc_info=None: statuses.append(int(status[:3])))
+        for _ in body:
+            pass
+        body.close()  # request_finished: closes the thread's database connection
+    except Exception:
+        logger.exception("Warm-up request for %s failed", path)
+        statuses.append(None)
+    return path + (f"?{query}" if query else ''), statuses[0] if statuses else None, (time.perf_counter() - start) * 1000
+
+
+def warm_pages(paths, workers=None, host=None):
+    """Request `paths` on `workers` threads. Returns [(path, status, ms)]."""
+    workers = workers or getattr(settings, 'WARMUP_WORKERS', 4)
+    handler, host = WSGIHandler(), host or default_host()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda path: _fetch(handler, host, path), paths))
+    connections.close_all()
+    return results
+
+
+def warm_process(workers=None, rackets=None, host=None):
+    """warm_up() and warm_pages(), then mark this process ready. Returns a report."""
+    mark_warming()
+    try:
+        report = warm_up()
+        try:
+            report['pages'] = warm_pages(warmup_paths(rackets), workers, host)
+        except DatabaseError:
+            logger.exception("Warm-up could not list the pages to request")
+            report['pages'] = []
+        return report
+    finally:
+        connections.close_all()  # Never hand an open connection to forked workers
+        _state['warm'] = True  # Even after an error: a worker that is only cold can still serve
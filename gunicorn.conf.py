@@ -0,0 +1,86 @@
+"""
+Gunicorn settings (Procfile: gunicorn -c gunicorn.conf.py PadelRDB.wsgi:application).
+
+The app is imported once in the master (preload_app) and warmed up
+(views, translation catalogs, compiled templates, the busiest pages; see
+PadelRDB_app/warmup.py) before forking, so workers start warm and share
+those pages copy-on-write. Every value can be overridden from the
+environment.
+"""
+
+import gc
+import multiprocessing
+import os
+
+# ---------- PROCESS MODEL ----------
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+# ► 2 workers por CPU + 1 (recomendação do gunicorn), limitado para não estourar a RAM do plano
+workers = int(os.environ.get('WEB_CONCURRENCY', min(multiprocessing.cpu_count() * 2 + 1, 8)))
+# ► Threads > 1 troca para o worker gthread: requests lentos (S3, DB) não bloqueiam o processo
+threads = int(os.environ.get('GUNICORN_THREADS', 2))
+
+# ► Reinicia cada worker após N requests; o jitter evita que todos reiniciem ao mesmo tempo
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+keepalive = 5
+
+# ---------- STARTUP ----------
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'True') == 'True'
+
+
+def when_ready(server):
+    """Runs in the master after the app is loaded, before any worker is forked."""
+    if not preload_app:
+        return
+    from PadelRDB_app.warmup import warm_process
+
+    log_warm_up(server, warm_process())
+
+    # Keep the preloaded objects out of the collector's generations, so the
+    # first collection in each worker doesn't touch (and copy) those pages
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    """Runs in each new worker, before it loads the app (a no-op then without preload_app)."""
+    if preload_app:
+        from django.db import connections
+
+        connections.close_all()  # Never share the master's database sockets
+
+
+def post_worker_init(worker):
+    """
+    Runs in each worker once the app is loaded. Lets the memory ceiling
+    (PadelRDB_app/memory.py) stop the worker gracefully, and without
+    preload_app warms the worker up in the background.
+    """
+    from PadelRDB_app.memory import init_worker
+
+    init_worker(lambda: setattr(worker, 'alive', False))  # Finish in-flight requests, then exit; the master replaces it
+    if preload_app:
+        return
+    import threading
+
+    from PadelRDB_app.warmup import mark_warming, warm_process
+
+    mark_warming()  # /readyz answers 503 from the first request until the thread is done
+    threading.Thread(target=lambda: log_warm_up(worker, warm_process()), daemon=True).start()
+
+
+def log_warm_up(process, report):
+    slow = sorted(report['pages'], key=lambda page: page[2], reverse=True)[:3]
+    process.log.info(
+        "Warmed up: %s URLs, %s templates, languages %s, %s pages (slowest: %s)",
+        report['urls'], report['templates'], report['languages'], len(report['pages']),
+        ', '.join(f"{path} {ms:.0f} ms" for path, status, ms in slow),
+    )
+    for failure in report['failed']:
+        process.log.warning("Template failed to compile: %s", failure)
+    for path, status, ms in report['pages']:
+        if status is None or status >= 500:
+            process.log.warning("Warm-up request %s answered %s", path, status)